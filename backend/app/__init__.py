@@ -20,9 +20,11 @@ import schedule
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import exc, inspect, text
+from sqlalchemy import exc
 from werkzeug.exceptions import HTTPException
 
+from .cache import LRUCache
+
 
 # -------------------------------------------------------------------------
 # App + extensions
@@ -107,66 +109,16 @@ def _wait_for_db(max_retries: int = 10, delay: int = 2) -> None:
             current_delay = min(current_delay * 2, 30)
 
 
-def _ensure_notification_columns() -> None:
-    """Idempotently add notification-tracking columns to file_upload for
-    instances upgrading from a schema that predates this feature.
-    db.create_all() only creates missing tables, it never alters existing
-    ones, so this defensive step is required on every startup. Each ALTER
-    is additive-only (nullable, no data rewrite) and individually
-    existence-checked, so it is safe to run unconditionally and repeatedly.
-    """
-    inspector = inspect(db.engine)
-    if 'file_upload' not in inspector.get_table_names():
-        return  # create_all() just made it fresh with all columns already
-
-    wanted = {
-        'notification_status_recipient': 'VARCHAR(16)',
-        'notification_error_recipient': 'VARCHAR(500)',
-        'notification_status_sender': 'VARCHAR(16)',
-        'notification_error_sender': 'VARCHAR(500)',
-        'notification_status_download': 'VARCHAR(16)',
-        'notification_error_download': 'VARCHAR(500)',
-    }
-
-    is_mysql = db.engine.dialect.name in ('mysql', 'mariadb')
-    lock_acquired = False
-    try:
-        if is_mysql:
-            # Guard against the 4 Gunicorn worker processes racing to ALTER
-            # the same table concurrently at startup.
-            with db.engine.connect() as conn:
-                lock_acquired = bool(conn.execute(
-                    text("SELECT GET_LOCK('itransfer_schema_migration', 10)")
-                ).scalar())
-
-        # Re-inspect after acquiring the lock: another worker may have
-        # already finished the migration while we waited.
-        existing = {col['name'] for col in inspect(db.engine).get_columns('file_upload')}
-        missing = {name: ddl for name, ddl in wanted.items() if name not in existing}
-        if not missing:
-            return
-
-        for name, ddl in missing.items():
-            try:
-                with db.engine.begin() as conn:
-                    app.logger.info("Migrating schema: adding column %s to file_upload", name)
-                    conn.execute(text(f"ALTER TABLE file_upload ADD COLUMN {name} {ddl} DEFAULT NULL"))
-            except exc.OperationalError:
-                # Another worker process won the race despite the advisory
-                # lock (e.g. GET_LOCK timed out under heavy contention) and
-                # already added this column -- not a real failure.
-                app.logger.info("Column %s already exists, skipping", name)
-    finally:
-        if lock_acquired:
-            with db.engine.connect() as conn:
-                conn.execute(text("SELECT RELEASE_LOCK('itransfer_schema_migration')"))
-
-
+# Startup migrates the schema only when migrate.py has not already done so
+# (see migrations.py); otherwise it is a single version check.
 with app.app_context():
     _wait_for_db()
-    from . import models  # noqa: F401  (register models before create_all)
-    db.create_all()
-    _ensure_notification_columns()
+    from . import migrations
+    migrations.ensure_current()
+
+# Set by migrate.py, which imports the app only to migrate the schema and
+# must not start the background threads below.
+_migrate_only = os.environ.get('ITRANSFER_MIGRATE_ONLY') == '1'
 
 
 # -------------------------------------------------------------------------
@@ -186,16 +138,29 @@ def _handle_unexpected(error):
 
 
 # -------------------------------------------------------------------------
-# Background email executor
+# Background executors
 # -------------------------------------------------------------------------
-# Bounds concurrent SMTP connections per worker process (this is one pool
-# per Gunicorn worker, not shared across the 4 worker processes -- fine at
-# this app's volume, see notification dispatch in routes.py). A bounded
-# pool (rather than a bare thread per email) caps how many concurrent
-# connections get opened against the self-hoster's SMTP relay account if
-# uploads burst, which several providers rate-limit or temp-block on.
-# Defined before importing routes, which imports this module by name.
-email_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='itransfer-mail')
+# Defined before importing routes, which imports them by name.
+
+# Deflates archive blocks in parallel (see archive.ZipBuilder). zlib releases
+# the GIL while compressing, so threads scale across cores; the pool is
+# shared by every archive this worker builds, which keeps concurrent
+# uploads from multiplying the thread count.
+archive_executor = ThreadPoolExecutor(
+    max_workers=app.config['ARCHIVE_WORKERS'], thread_name_prefix='itransfer-zip',
+)
+
+# Admin bulk jobs (see bulk_transfers in routes.py) run one at a time per
+# worker so a large purge cannot starve the database; each hands the
+# unlinking of the files it released to the purge pool, so slow deletes
+# (a lazy archive is a whole directory) overlap with the next batch.
+job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='itransfer-job')
+purge_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='itransfer-purge')
+
+# What the public endpoints need about each download link, keyed by link id
+# (see _transfer_info in routes.py). Whoever deletes a transfer or flips a
+# downloaded flag drops the affected entries.
+transfer_cache = LRUCache(app.config['TRANSFER_CACHE_SIZE'], ttl=app.config['TRANSFER_CACHE_TTL'])
 
 
 # -------------------------------------------------------------------------
@@ -209,34 +174,70 @@ from . import routes  # noqa: E402,F401
 # -------------------------------------------------------------------------
 def _cleanup_expired_files() -> None:
     from datetime import datetime
-    from .models import FileUpload
+    from sqlalchemy import delete, select
+    from sqlalchemy.orm import defer
+    from . import blobs, jobs, outbox, progress, uploads
+    from .models import FileUpload, TransferFile
+    from .paths import UnsafePathError
     try:
-        expired = FileUpload.query.filter(
-            FileUpload.expires_at < datetime.utcnow()
+        # Ids only, each transfer loaded on its own: every commit expires
+        # whatever the session still holds, so loading them all upfront
+        # made each commit cost as much as the transfers left to go.
+        expired = db.session.scalars(
+            select(FileUpload.id).where(FileUpload.expires_at < datetime.utcnow())
         ).all()
-        upload_root = os.path.realpath(app.config['UPLOAD_FOLDER'])
-        for record in expired:
+        upload_root = app.config['UPLOAD_FOLDER']
+        for file_id in expired:
+            record = db.session.get(FileUpload, file_id, options=[defer(FileUpload.files_list)])
+            if record is None:
+                continue  # deleted meanwhile (admin, bulk job)
+            # One commit per transfer: blob references are dropped in the
+            # same transaction as the row, and files only unlinked after it.
+            doomed = []
             try:
-                candidate = os.path.realpath(
-                    os.path.join(app.config['UPLOAD_FOLDER'], record.filename)
-                )
-                if (
-                    candidate == upload_root
-                    or not candidate.startswith(upload_root + os.sep)
-                ):
+                try:
+                    doomed = blobs.release_transfer(upload_root, record)
+                except UnsafePathError:
                     app.logger.warning(
-                        "Refusing to delete %s (outside upload folder)", record.id
+                        "Refusing to delete %s (outside upload folder)", file_id
                     )
-                elif os.path.exists(candidate):
-                    os.remove(candidate)
-                    app.logger.info("Removed expired file %s", record.id)
+                db.session.execute(delete(TransferFile).where(TransferFile.file_id == file_id))
                 db.session.delete(record)
+                db.session.commit()
             except Exception:
-                app.logger.exception("Failed to remove expired file %s", record.id)
-        db.session.commit()
+                db.session.rollback()
+                blobs.restore(doomed)
+                app.logger.exception("Failed to remove expired file %s", file_id)
+                continue
+            blobs.purge(doomed)
+            transfer_cache.discard_if(lambda info, file_id=file_id: info['file_id'] == file_id)
+            app.logger.info("Removed expired file %s", file_id)
     except Exception:
         app.logger.exception("Cleanup task failed")
 
+    try:
+        removed = uploads.expire_stale_sessions(
+            app.config['UPLOAD_FOLDER'], app.config['UPLOAD_SESSION_TTL_HOURS'] * 3600,
+        )
+        if removed:
+            app.logger.info("Removed %d abandoned upload session(s)", removed)
+        progress.expire(
+            app.config['UPLOAD_FOLDER'], app.config['UPLOAD_SESSION_TTL_HOURS'] * 3600,
+        )
+        jobs.expire(
+            app.config['UPLOAD_FOLDER'], app.config['UPLOAD_SESSION_TTL_HOURS'] * 3600,
+        )
+    except Exception:
+        app.logger.exception("Upload session cleanup failed")
+
+    try:
+        purged = outbox.purge()
+        if purged:
+            app.logger.info("Purged %d finished notification(s) from the outbox", purged)
+    except Exception:
+        db.session.rollback()
+        app.logger.exception("Outbox cleanup failed")
+
 
 def _run_scheduler() -> None:
     with app.app_context():
@@ -248,4 +249,103 @@ def _run_scheduler() -> None:
             time.sleep(60)  # Check every minute so scheduled jobs fire on time
 
 
-threading.Thread(target=_run_scheduler, daemon=True, name='itransfer-cleanup').start()
+if not _migrate_only:
+    threading.Thread(target=_run_scheduler, daemon=True, name='itransfer-cleanup').start()
+    # Competes for the mail dispatcher role (see mailer.py). Only the winner
+    # sends the notifications queued in the outbox; every other worker just
+    # queues them.
+    threading.Thread(target=routes._run_outbox_dispatcher, daemon=True, name='itransfer-mail').start()
+
+
+# -------------------------------------------------------------------------
+# Background integrity scrubber
+# -------------------------------------------------------------------------
+_SCRUB_BATCH = 50
+_SCRUB_LOCK_RETRY = 300  # seconds between attempts to become the scrubbing worker
+
+
+def _scrub_stored_files(upload_root: str) -> None:
+    """Run (or resume) the due scrub pass to completion. Only called by the
+    process holding the scrub lock."""
+    from datetime import datetime
+    from sqlalchemy import update
+    from . import scrub
+    from .models import FileUpload
+    from .paths import UnsafePathError
+
+    state = scrub.load_state(upload_root)
+    if state.get('cursor') is None:
+        last = state.get('completed_at')
+        if last and time.time() - last < app.config['SCRUB_INTERVAL_HOURS'] * 3600:
+            return
+        total = FileUpload.query.filter(FileUpload.expires_at > datetime.utcnow()).count()
+        state = scrub.new_pass(state, total)
+        app.logger.info("Integrity scrub pass started over %d transfer(s)", total)
+
+    throttle = scrub.Throttle(
+        app.config['SCRUB_MAX_MBPS'] * 1024 * 1024, app.config['SCRUB_MAX_IOPS'],
+    )
+    verified = set()
+    run_started = time.monotonic()
+    bytes_before = state['bytes']
+    while True:
+        rows = (
+            db.session.query(
+                FileUpload.id, FileUpload.filename, FileUpload.blob_sha256, FileUpload.encrypted_data,
+            )
+            .filter(FileUpload.id > state['cursor'], FileUpload.expires_at > datetime.utcnow())
+            .order_by(FileUpload.id)
+            .limit(_SCRUB_BATCH)
+            .all()
+        )
+        db.session.commit()  # hand the connection back while files are read
+        if not rows:
+            break
+        for row in rows:
+            try:
+                status, error = scrub.verify(upload_root, row, throttle, verified)
+            except UnsafePathError:
+                status, error = scrub.MISSING, "Stored filename is unsafe"
+            db.session.execute(update(FileUpload).where(FileUpload.id == row.id).values(
+                integrity_status=status, integrity_error=error,
+                integrity_checked_at=datetime.utcnow(),
+            ))
+            db.session.commit()
+            if status != scrub.OK:
+                app.logger.warning("Integrity scrub: transfer %s is %s: %s", row.id, status, error)
+                state[status] += 1
+            state['cursor'] = row.id
+            state['checked'] += 1
+            state['bytes'] = bytes_before + throttle.bytes
+            state['bytes_per_second'] = throttle.bytes / max(time.monotonic() - run_started, 1e-6)
+            state['updated_at'] = time.time()
+            scrub.save_state(upload_root, state)
+
+    summary = scrub.finish_pass(state)
+    scrub.save_state(upload_root, summary)
+    app.logger.info(
+        "Integrity scrub pass finished: %d checked, %d corrupt, %d missing",
+        state['checked'], state['corrupt'], state['missing'],
+    )
+
+
+def _run_scrubber() -> None:
+    from . import scrub
+    upload_root = app.config['UPLOAD_FOLDER']
+    while True:
+        lock_fh = scrub.try_lock(upload_root)
+        if lock_fh is not None:
+            try:
+                with app.app_context():
+                    _scrub_stored_files(upload_root)
+            except Exception:
+                app.logger.exception("Integrity scrub failed")
+            finally:
+                with app.app_context():
+                    db.session.remove()
+                scrub.unlock(lock_fh)
+        time.sleep(_SCRUB_LOCK_RETRY)
+
+
+if app.config['SCRUB_ENABLED'] and not _migrate_only:
+    threading.Thread(target=_run_scrubber, daemon=True, name='itransfer-scrub').start()
@@ -0,0 +1,177 @@
+"""
+Admission control for uploads: disk-space reservations and a cap on
+concurrent finalize jobs.
+
+Before an upload writes anything it reserves the space it will need in
+``UPLOAD_FOLDER`` at its peak (staged copy plus archive, see
+``projected_bytes``). Reservations are files under
+``UPLOAD_FOLDER/reservations`` holding a byte count, checked and written
+under one flock()ed lock so concurrent requests on any Gunicorn worker see
+each other's claims. A request that does not fit is refused straight away
+with ``InsufficientStorage`` instead of filling the volume halfway through
+its archive. Reservations are released when the request (or upload
+session) ends; one orphaned by a killed worker lapses once it has not been
+touched for the session TTL.
+
+The space already written by an upload that holds a reservation is counted
+twice (it is gone from the free space and still reserved) until the
+reservation is released. That errs on the side of refusing during a burst,
+which is the point.
+
+Packaging work (zipping, hashing) takes one of ``FINALIZE_MAX_CONCURRENT``
+slots per host: each slot is a lock file flock()ed without blocking, so a
+slot is freed by the kernel even if its worker dies. A slot covers the
+packaging step only, never the time spent receiving the body. When all
+are taken the request is refused with ``Busy`` rather than queued behind
+them, unless the caller is prepared to ``wait`` a little: an upload whose
+body has already arrived would otherwise lose it. A request that can still
+be refused cheaply checks for a free slot (``check_slot``) before it
+reads its body.
+"""
+import fcntl
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+
+from . import archive
+
+_RESERVATION_DIR = 'reservations'
+_LEDGER_LOCK = '.lock'
+_SLOT_DIR = 'locks'
+_SLOT_POLL_SECONDS = 0.1
+
+
+class AdmissionError(Exception):
+    """Raised when an upload cannot be accepted right now. ``status`` is the
+    HTTP status to answer with; the client should retry later."""
+    status = 503
+
+
+class InsufficientStorage(AdmissionError):
+    status = 507
+
+
+class Busy(AdmissionError):
+    status = 503
+
+
+def projected_bytes(files_list, zipped: bool, staged: bool) -> int:
+    """Peak disk usage of storing ``files_list`` (client-declared ``name``
+    and ``size`` entries): the files themselves when they are ``staged``
+    before packaging or stored as they are, plus the archive when the
+    transfer is ``zipped``."""
+    total = sum(int(f['size']) for f in files_list)
+    projected = total if staged or not zipped else 0
+    if zipped:
+        projected += archive.max_archive_size((f['name'], int(f['size'])) for f in files_list)
+    return projected
+
+
+@contextmanager
+def _ledger(upload_root: str):
+    directory = os.path.join(upload_root, _RESERVATION_DIR)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, _LEDGER_LOCK), 'a+') as lock_fh:
+        fcntl.flock(lock_fh, fcntl.LOCK_EX)
+        try:
+            yield directory
+        finally:
+            fcntl.flock(lock_fh, fcntl.LOCK_UN)
+
+
+def _reservation_path(directory: str, file_id: str) -> str:
+    # Server-generated UUIDs only, so the name never carries path components.
+    return os.path.join(directory, str(uuid.UUID(file_id)))
+
+
+def _reserved_bytes(directory: str, exclude: str, max_age_seconds: float) -> int:
+    cutoff = time.time() - max_age_seconds
+    reserved = 0
+    for name in os.listdir(directory):
+        if name == _LEDGER_LOCK or name == exclude:
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                continue
+            with open(path, 'r', encoding='ascii') as fh:
+                reserved += int(fh.read() or 0)
+        except (OSError, ValueError):
+            continue
+    return reserved
+
+
+def reserve(upload_root: str, file_id: str, nbytes: int, min_free_bytes: int,
+            max_age_seconds: float) -> None:
+    """Claim ``nbytes`` for ``file_id`` (replacing any earlier claim of its
+    own), keeping ``min_free_bytes`` spare on the volume once every live
+    reservation is accounted for. Raises InsufficientStorage otherwise."""
+    with _ledger(upload_root) as directory:
+        path = _reservation_path(directory, file_id)
+        reserved = _reserved_bytes(directory, os.path.basename(path), max_age_seconds)
+        free = shutil.disk_usage(upload_root).free
+        if free - reserved - nbytes < min_free_bytes:
+            raise InsufficientStorage("Not enough storage space for this transfer")
+        with open(path, 'w', encoding='ascii') as fh:
+            fh.write(str(nbytes))
+
+
+def touch(upload_root: str, file_id: str) -> None:
+    """Keep a long-running upload session's reservation from lapsing."""
+    try:
+        os.utime(_reservation_path(os.path.join(upload_root, _RESERVATION_DIR), file_id))
+    except OSError:
+        pass
+
+
+def release(upload_root: str, file_id: str) -> None:
+    try:
+        os.remove(_reservation_path(os.path.join(upload_root, _RESERVATION_DIR), file_id))
+    except OSError:
+        pass
+
+
+def acquire_slot(upload_root: str, slots: int, wait: float = 0.0):
+    """Take a free finalize slot, polling for up to ``wait`` seconds.
+    Returns the handle to pass to ``release_slot``; raises Busy when every
+    slot stayed taken."""
+    directory = os.path.join(upload_root, _SLOT_DIR)
+    os.makedirs(directory, exist_ok=True)
+    deadline = time.monotonic() + wait
+    while True:
+        for index in range(max(1, slots)):
+            fh = open(os.path.join(directory, f'finalize.{index}.lock'), 'a+')
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                fh.close()
+                continue
+            return fh
+        if time.monotonic() >= deadline:
+            raise Busy("Too many transfers are being packaged, try again shortly")
+        time.sleep(_SLOT_POLL_SECONDS)
+
+
+def check_slot(upload_root: str, slots: int) -> None:
+    """Raise Busy if every finalize slot is taken right now. The slot is not
+    kept: this only spares a client sending a body that would be refused."""
+    release_slot(acquire_slot(upload_root, slots))
+
+
+def release_slot(fh) -> None:
+    if fh is None or fh.closed:
+        return
+    fcntl.flock(fh, fcntl.LOCK_UN)
+    fh.close()
+
+
+@contextmanager
+def finalize_slot(upload_root: str, slots: int, wait: float = 0.0):
+    fh = acquire_slot(upload_root, slots, wait)
+    try:
+        yield
+    finally:
+        release_slot(fh)
@@ -0,0 +1,601 @@
+"""
+Helpers for writing stored transfer files.
+
+Every byte of a stored transfer is hashed on its way to disk, so the SHA-256
+recorded in ``FileUpload.encrypted_data`` never requires reading the final
+file back (and never holds more than one copy buffer in memory, whatever the
+transfer size).
+
+``ZipBuilder`` is the archive engine for zipped transfers. It compresses on
+a thread pool (zlib releases the GIL while deflating) but emits a plain
+sequential ZIP64 stream, so the output can still be hashed on the fly and
+read by any standard unzip tool. Each member is cut into blocks that are
+deflated independently, each primed with the previous block's last 32 KiB
+as its dictionary, and concatenated in order: every block but the last ends
+on a byte-aligned sync flush, so the result is one ordinary deflate stream
+(the technique pigz uses). Blocks of consecutive members share one ordered
+pipeline, so folders of many small files keep every core busy as well.
+
+``ARCHIVE_MODE=lazy`` skips packaging altogether: the members are kept as
+plain files (blobs, see blobs.py) listed in a manifest (``store_lazy``),
+and ``StoredZip`` assembles a ``ZIP_STORED`` archive from them at download
+time. Every header is derived from the manifest, so the archive's exact
+size is known before the first byte is sent and any byte range can be
+served without reading what precedes it.
+"""
+import bisect
+import collections
+import hashlib
+import json
+import os
+import shutil
+import struct
+import time
+import zlib
+import zipfile
+
+from .compression import SAMPLE_SIZE, CompressionStats
+
+COPY_BUFSIZE = 1024 * 1024
+
+
+class HashingWriter:
+    """Write-only file wrapper that feeds every written byte to SHA-256.
+
+    It deliberately has no ``seek``: archives are written strictly
+    sequentially (with data descriptors instead of patching local headers
+    after the fact), so the running digest equals the digest of the final
+    archive.
+    """
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._sha256 = hashlib.sha256()
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._fileobj.write(data)
+        self._sha256.update(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        self._fileobj.flush()
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
+
+def save_stream(stream, path: str) -> tuple[int, str, int]:
+    """Copy ``stream`` to ``path``. Returns ``(size, sha256 hex digest, crc32)``;
+    the CRC is what a lazy archive's headers carry for the file."""
+    crc = 0
+    with open(path, 'wb') as fh:
+        writer = HashingWriter(fh)
+        while True:
+            buf = stream.read(COPY_BUFSIZE)
+            if not buf:
+                break
+            writer.write(buf)
+            crc = zlib.crc32(buf, crc)
+    return writer.tell(), writer.hexdigest(), crc
+
+
+def checksum_file(path: str) -> tuple[str, int]:
+    """Incremental ``(sha256 hex digest, crc32)`` of a file already on disk,
+    for content whose bytes did not arrive in order (e.g. chunked upload
+    sessions)."""
+    sha256 = hashlib.sha256()
+    crc = 0
+    with open(path, 'rb') as fh:
+        while True:
+            buf = fh.read(COPY_BUFSIZE)
+            if not buf:
+                break
+            sha256.update(buf)
+            crc = zlib.crc32(buf, crc)
+    return sha256.hexdigest(), crc
+
+
+def sha256_file(path: str) -> str:
+    """Incremental SHA-256 of a file already on disk."""
+    return checksum_file(path)[0]
+
+
+# -------------------------------------------------------------------------
+# ZIP64 stream writer
+# -------------------------------------------------------------------------
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+_DATA_DESCRIPTOR = struct.Struct('<IIQQ')
+_ZIP64_END = struct.Struct('<IQHHIIQQQQ')
+_ZIP64_LOCATOR = struct.Struct('<IIQI')
+_END = struct.Struct('<IHHHHIIH')
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_VERSION = 45                      # ZIP64
+_MADE_BY = (3 << 8) | _VERSION     # Unix
+_EXTERNAL_ATTR = 0o100644 << 16
+_MAX32 = 0xFFFFFFFF
+_MAX16 = 0xFFFF
+# Sizes, offsets and counts from which ZipBuilder's central directory
+# switches to ZIP64 fields (the classic ones then hold _MAX32 / _MAX16).
+_ZIP64_LIMIT = _MAX32
+_ZIP64_COUNT_LIMIT = _MAX16
+_WINDOW = 32 * 1024
+BLOCK_SIZE = 1024 * 1024
+
+
+def _dos_datetime(timestamp: float) -> tuple[int, int]:
+    t = time.localtime(timestamp)
+    dos_date = (max(t.tm_year, 1980) - 1980) << 9 | t.tm_mon << 5 | t.tm_mday
+    dos_time = t.tm_hour << 11 | t.tm_min << 5 | t.tm_sec // 2
+    return dos_time, dos_date
+
+
+def _read_full(src, size: int) -> bytes:
+    """Read exactly ``size`` bytes from ``src``, or fewer only at EOF."""
+    data = src.read(size)
+    while data and len(data) < size:
+        more = src.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def _deflate_block(data: bytes, level: int, zdict: bytes, last: bool) -> tuple[bytes, float]:
+    started = time.thread_time()
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    out = compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return out, time.thread_time() - started
+
+
+class _Entry:
+    __slots__ = ('name', 'method', 'dos_time', 'dos_date', 'offset',
+                 'crc', 'file_size', 'compress_size', 'sha256')
+
+    def __init__(self, name, method, dos_time, dos_date):
+        self.name = name
+        self.method = method
+        self.dos_time = dos_time
+        self.dos_date = dos_date
+        self.offset = 0
+        self.crc = 0
+        self.file_size = 0
+        self.compress_size = 0
+        self.sha256 = None
+
+
+class ZipBuilder:
+    """Sequential ZIP64 writer with parallel deflate.
+
+    ``out`` only needs ``write`` (a ``HashingWriter`` in practice);
+    ``executor`` is a ``concurrent.futures`` executor shared by every
+    archive built in this process. At most ``max_pending`` blocks are in
+    flight, which bounds memory to roughly twice that many blocks.
+    """
+
+    def __init__(self, out, executor, policy, max_pending: int = 8, block_size: int = BLOCK_SIZE):
+        self._out = out
+        self._executor = executor
+        self._policy = policy
+        self._max_pending = max(1, max_pending)
+        self._block_size = block_size
+        self._position = 0
+        self._entries = []
+        # Ordered output: bytes, Futures resolving to (bytes, cpu) for a
+        # given entry, or callables producing bytes once everything before
+        # them has been written. ``_blocks`` counts the data blocks queued.
+        self._pending = collections.deque()
+        self._blocks = 0
+        self.stats = CompressionStats()
+
+    # -- output pipeline ---------------------------------------------------
+    def _emit(self, data: bytes) -> None:
+        self._out.write(data)
+        self._position += len(data)
+
+    def _drain_one(self) -> None:
+        kind, item, entry = self._pending.popleft()
+        if kind == 'bytes':
+            self._blocks -= 1
+            self._emit(item)
+        elif kind == 'future':
+            self._blocks -= 1
+            data, cpu = item.result()
+            entry.compress_size += len(data)
+            self.stats.cpu_seconds += cpu
+            self._emit(data)
+        else:
+            self._emit(item())
+
+    def _push(self, kind, item, entry=None) -> None:
+        self._pending.append((kind, item, entry))
+        if kind != 'call':
+            self._blocks += 1
+        while self._blocks > self._max_pending:
+            self._drain_one()
+
+    def _flush(self) -> None:
+        while self._pending:
+            self._drain_one()
+
+    # -- members -----------------------------------------------------------
+    def _local_header(self, entry: _Entry) -> bytes:
+        name = entry.name.encode('utf-8')
+        flags = _FLAG_DATA_DESCRIPTOR | (_FLAG_UTF8 if not entry.name.isascii() else 0)
+        # Sizes are unknown until the data is written: zeroed here, real
+        # values in the trailing data descriptor and the central directory.
+        extra = struct.pack('<HHQQ', 0x0001, 16, 0, 0)
+        return _LOCAL_HEADER.pack(
+            0x04034b50, _VERSION, flags, entry.method, entry.dos_time, entry.dos_date,
+            0, _MAX32, _MAX32, len(name), len(extra),
+        ) + name + extra
+
+    def _record_offset(self, entry: _Entry) -> bytes:
+        entry.offset = self._position
+        return self._local_header(entry)
+
+    def add(self, arcname: str, src, mtime: float | None = None) -> int:
+        """Append the readable ``src`` as ``arcname``, stored or deflated as
+        the compression policy decides from its first bytes. Works on
+        streams (nothing is read twice), so it serves the streaming ingest
+        path as well as staged files. Returns the member's uncompressed
+        size."""
+        sampled_at = time.thread_time()
+        sample = _read_full(src, SAMPLE_SIZE)
+        method, level = self._policy.choose(arcname, sample)
+        self.stats.cpu_seconds += time.thread_time() - sampled_at
+
+        entry = _Entry(arcname, method, *_dos_datetime(mtime if mtime is not None else time.time()))
+        self._entries.append(entry)
+        self._push('call', lambda: self._record_offset(entry))
+
+        crc = 0
+        digest = hashlib.sha256()
+        size = 0
+        zdict = b''
+        block = sample
+        if len(sample) == SAMPLE_SIZE:
+            block += _read_full(src, self._block_size - SAMPLE_SIZE)
+        while True:
+            # Read one block ahead: the last block must be finished with
+            # Z_FINISH rather than a sync flush.
+            nxt = _read_full(src, self._block_size) if len(block) == self._block_size else b''
+            last = not nxt
+            crc = zlib.crc32(block, crc)
+            digest.update(block)
+            size += len(block)
+            if method == zipfile.ZIP_STORED:
+                entry.compress_size += len(block)
+                self._push('bytes', block)
+            else:
+                self._push('future', self._executor.submit(_deflate_block, block, level, zdict, last), entry)
+                zdict = block[-_WINDOW:]
+            if last:
+                break
+            block = nxt
+
+        entry.crc = crc
+        entry.sha256 = digest.hexdigest()
+        entry.file_size = size
+        self.stats.input_bytes += size
+        self._push('call', lambda: _DATA_DESCRIPTOR.pack(
+            0x08074b50, entry.crc, entry.compress_size, entry.file_size,
+        ))
+        return size
+
+    def members(self) -> list:
+        """``name``, ``size``, ``offset`` (of the local header) and
+        ``sha256`` of every member, in archive order. Offsets are only
+        final once ``close`` has run."""
+        return [
+            {'name': e.name, 'size': e.file_size, 'offset': e.offset, 'sha256': e.sha256}
+            for e in self._entries
+        ]
+
+    # -- central directory -------------------------------------------------
+    def _central_header(self, entry: _Entry) -> bytes:
+        name = entry.name.encode('utf-8')
+        flags = _FLAG_DATA_DESCRIPTOR | (_FLAG_UTF8 if not entry.name.isascii() else 0)
+        zip64 = []
+        file_size, compress_size, offset = entry.file_size, entry.compress_size, entry.offset
+        if file_size >= _ZIP64_LIMIT:
+            zip64.append(file_size)
+            file_size = _MAX32
+        if compress_size >= _ZIP64_LIMIT:
+            zip64.append(compress_size)
+            compress_size = _MAX32
+        if offset >= _ZIP64_LIMIT:
+            zip64.append(offset)
+            offset = _MAX32
+        extra = struct.pack('<HH%dQ' % len(zip64), 0x0001, 8 * len(zip64), *zip64) if zip64 else b''
+        return _CENTRAL_HEADER.pack(
+            0x02014b50, _MADE_BY, _VERSION, flags, entry.method, entry.dos_time, entry.dos_date,
+            entry.crc, compress_size, file_size, len(name), len(extra), 0, 0, 0,
+            _EXTERNAL_ATTR, offset,
+        ) + name + extra
+
+    def close(self) -> CompressionStats:
+        """Write the central directory and end records. Returns the
+        archive's compression stats."""
+        self._flush()
+        cd_offset = self._position
+        for entry in self._entries:
+            self._emit(self._central_header(entry))
+        cd_size = self._position - cd_offset
+        count = len(self._entries)
+
+        count16 = _MAX16 if count >= _ZIP64_COUNT_LIMIT else count
+        cd_size32 = _MAX32 if cd_size >= _ZIP64_LIMIT else cd_size
+        cd_offset32 = _MAX32 if cd_offset >= _ZIP64_LIMIT else cd_offset
+        if count >= _ZIP64_COUNT_LIMIT or cd_size >= _ZIP64_LIMIT or cd_offset >= _ZIP64_LIMIT:
+            zip64_end_offset = self._position
+            self._emit(_ZIP64_END.pack(
+                0x06064b50, _ZIP64_END.size - 12, _MADE_BY, _VERSION, 0, 0,
+                count, count, cd_size, cd_offset,
+            ))
+            self._emit(_ZIP64_LOCATOR.pack(0x07064b50, 0, zip64_end_offset, 1))
+        self._emit(_END.pack(
+            0x06054b50, 0, 0, count16, count16, cd_size32, cd_offset32, 0,
+        ))
+        self.stats.saved_bytes = sum(e.file_size - e.compress_size for e in self._entries)
+        return self.stats
+
+
+def max_archive_size(members) -> int:
+    """Upper bound on the size of the archive ZipBuilder writes for
+    ``(name, size)`` members: per-member headers (ZIP64 extras included)
+    and data descriptor, plus zlib's worst-case expansion of incompressible
+    data and one sync-flush marker per block."""
+    total = _ZIP64_END.size + _ZIP64_LOCATOR.size + _END.size
+    for name, size in members:
+        name_len = len(name.encode('utf-8'))
+        total += _LOCAL_HEADER.size + 20 + _CENTRAL_HEADER.size + 28 + 2 * name_len
+        total += _DATA_DESCRIPTOR.size
+        total += size + (size >> 12) + (size >> 14) + 13 + 5 * (size // BLOCK_SIZE + 1)
+    return total
+
+
+# -------------------------------------------------------------------------
+# Lazy archives (ARCHIVE_MODE=lazy)
+# -------------------------------------------------------------------------
+MANIFEST_NAME = 'manifest.json'
+MEMBERS_DIR = 'members'
+_LOCAL_ZIP64_EXTRA = struct.Struct('<HHQQ')
+_CENTRAL_ZIP64_EXTRA = struct.Struct('<HHQQQ')
+
+
+def is_lazy(stored_path: str) -> bool:
+    """A lazy transfer is stored as a directory under its archive name."""
+    return os.path.isdir(stored_path)
+
+
+def store_lazy(stored_path: str, file_list: list, mtime: float | None = None) -> str:
+    """Write the manifest of a lazy transfer at ``stored_path`` for the
+    staged files in ``file_list`` (``relative``, ``abs`` and optionally
+    ``sha256``/``crc32``, which are computed and filled in when missing).
+    The member files themselves go to the blob store, keyed by ``sha256``.
+    Returns the manifest's SHA-256, which pins every member's digest and
+    therefore stands in for the archive's."""
+    members = []
+    for entry in file_list:
+        if not (entry.get('sha256') and 'crc32' in entry):
+            entry['sha256'], entry['crc32'] = checksum_file(entry['abs'])
+        members.append({
+            'name': entry['relative'],
+            'size': os.path.getsize(entry['abs']),
+            'crc32': entry['crc32'],
+            'sha256': entry['sha256'],
+        })
+    manifest = json.dumps({
+        'mtime': int(mtime if mtime is not None else time.time()),
+        'blobs': True,
+        'members': members,
+    }).encode('utf-8')
+    os.makedirs(stored_path)
+    try:
+        with open(os.path.join(stored_path, MANIFEST_NAME), 'wb') as fh:
+            fh.write(manifest)
+    except BaseException:
+        shutil.rmtree(stored_path, ignore_errors=True)
+        raise
+    return hashlib.sha256(manifest).hexdigest()
+
+
+def read_manifest(stored_path: str) -> dict:
+    try:
+        with open(os.path.join(stored_path, MANIFEST_NAME), 'rb') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {'members': []}
+
+
+class StoredZip:
+    """Read-only view of a lazy transfer as a ``ZIP_STORED`` ZIP64 archive.
+    ``locate_blob`` maps a member's SHA-256 to its file in the blob store.
+
+    The archive is described as an ordered list of segments, each either
+    literal header bytes or a member file, so ``size`` is exact and
+    ``iter_range`` can start anywhere. Every entry carries ZIP64 extras
+    unconditionally, which keeps header sizes independent of member sizes.
+    ``members`` describes each entry as ``ZipBuilder.members`` does.
+    """
+
+    def __init__(self, stored_path: str, locate_blob):
+        with open(os.path.join(stored_path, MANIFEST_NAME), 'rb') as fh:
+            manifest = json.load(fh)
+        members_root = os.path.join(stored_path, MEMBERS_DIR)
+        dos_time, dos_date = _dos_datetime(manifest['mtime'])
+
+        self._starts = []
+        self._segments = []
+        position = 0
+
+        def add(segment, length):
+            nonlocal position
+            self._starts.append(position)
+            self._segments.append(segment)
+            position += length
+
+        central = []
+        self.members = []
+        for member in manifest['members']:
+            name = member['name'].encode('utf-8')
+            flags = _FLAG_UTF8 if not member['name'].isascii() else 0
+            size, crc = member['size'], member['crc32']
+            offset = position
+            self.members.append({
+                'name': member['name'], 'size': size, 'offset': offset, 'sha256': member.get('sha256'),
+            })
+            header = _LOCAL_HEADER.pack(
+                0x04034b50, _VERSION, flags, zipfile.ZIP_STORED, dos_time, dos_date,
+                crc, _MAX32, _MAX32, len(name), _LOCAL_ZIP64_EXTRA.size,
+            ) + name + _LOCAL_ZIP64_EXTRA.pack(0x0001, 16, size, size)
+            add(header, len(header))
+            if size:
+                if manifest.get('blobs'):
+                    path = locate_blob(member['sha256'])
+                else:
+                    # Layout of lazy transfers written before the blob store.
+                    path = os.path.join(members_root, *member['name'].split('/'))
+                add((path, size), size)
+            central.append(_CENTRAL_HEADER.pack(
+                0x02014b50, _MADE_BY, _VERSION, flags, zipfile.ZIP_STORED, dos_time, dos_date,
+                crc, _MAX32, _MAX32, len(name), _CENTRAL_ZIP64_EXTRA.size, 0, 0, 0,
+                _EXTERNAL_ATTR, _MAX32,
+            ) + name + _CENTRAL_ZIP64_EXTRA.pack(0x0001, 24, size, size, offset))
+
+        cd_offset = position
+        cd = b''.join(central)
+        count = len(central)
+        trailer = cd + _ZIP64_END.pack(
+            0x06064b50, _ZIP64_END.size - 12, _MADE_BY, _VERSION, 0, 0,
+            count, count, len(cd), cd_offset,
+        ) + _ZIP64_LOCATOR.pack(
+            0x07064b50, 0, cd_offset + len(cd), 1,
+        ) + _END.pack(
+            0x06054b50, 0, 0, min(count, _MAX16), min(count, _MAX16),
+            min(len(cd), _MAX32), min(cd_offset, _MAX32), 0,
+        )
+        add(trailer, len(trailer))
+        self.size = position
+
+    def iter_range(self, start: int = 0, stop: int | None = None):
+        """Yield the archive bytes in ``[start, stop)``."""
+        stop = self.size if stop is None else min(stop, self.size)
+        index = max(bisect.bisect_right(self._starts, start) - 1, 0)
+        while start < stop and index < len(self._segments):
+            segment = self._segments[index]
+            seg_start = self._starts[index]
+            if isinstance(segment, bytes):
+                piece = segment[start - seg_start:stop - seg_start]
+                yield piece
+                start += len(piece)
+            else:
+                path, length = segment
+                remaining = min(stop, seg_start + length) - start
+                with open(path, 'rb') as fh:
+                    fh.seek(start - seg_start)
+                    while remaining > 0:
+                        buf = fh.read(min(COPY_BUFSIZE, remaining))
+                        if not buf:
+                            raise IOError(f"Member file truncated: {path}")
+                        yield buf
+                        remaining -= len(buf)
+                        start += len(buf)
+            index += 1
+
+
+# -------------------------------------------------------------------------
+# Single-member access
+# -------------------------------------------------------------------------
+def list_members(stored_path: str, locate_blob) -> list:
+    """Members of a zipped or lazy transfer in archive order, as dicts with
+    ``name``, ``size``, ``compressed_size`` and ``crc32`` plus where the data
+    lives: the ``path`` of the member's own file for lazy transfers, or the
+    local header ``offset`` and compression ``method`` within the zip, read
+    from its central directory."""
+    if is_lazy(stored_path):
+        manifest = read_manifest(stored_path)
+        members_root = os.path.join(stored_path, MEMBERS_DIR)
+        return [{
+            'name': member['name'],
+            'size': member['size'],
+            'compressed_size': member['size'],
+            'crc32': member['crc32'],
+            'path': (locate_blob(member['sha256']) if manifest.get('blobs')
+                     else os.path.join(members_root, *member['name'].split('/'))),
+        } for member in manifest['members']]
+
+    with zipfile.ZipFile(stored_path) as zf:
+        return [{
+            'name': info.filename,
+            'size': info.file_size,
+            'compressed_size': info.compress_size,
+            'crc32': info.CRC,
+            'method': info.compress_type,
+            'offset': info.header_offset,
+        } for info in zf.infolist() if not info.is_dir()]
+
+
+def iter_member(stored_path: str, member: dict):
+    """Return an iterator over the uncompressed bytes of one zip member
+    (from ``list_members``), which seeks straight to it and inflates on the
+    fly; nothing else in the archive is read. A member that cannot be read
+    at all (unsupported compression method, bad local header) raises
+    ``zipfile.BadZipFile`` here, before the caller has sent anything. The
+    CRC can only be checked once the data has been yielded, so a mismatch
+    raises ``zipfile.BadZipFile`` from the iterator, after the fact."""
+    if member['method'] not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        raise zipfile.BadZipFile(f"Unsupported compression method {member['method']} for {member['name']}")
+    chunks = _iter_member(stored_path, member)
+    next(chunks)  # opens the archive and checks the local header
+    return chunks
+
+
+def _iter_member(stored_path: str, member: dict):
+    with open(stored_path, 'rb') as fh:
+        fh.seek(member['offset'])
+        header = _read_full(fh, _LOCAL_HEADER.size)
+        if len(header) != _LOCAL_HEADER.size or header[:4] != b'PK\x03\x04':
+            raise zipfile.BadZipFile(f"Bad local header for {member['name']}")
+        name_len, extra_len = _LOCAL_HEADER.unpack(header)[-2:]
+        fh.seek(name_len + extra_len, os.SEEK_CUR)
+        # Consumed by iter_member: all of the above runs before it returns.
+        yield b''
+
+        inflater = zlib.decompressobj(-15) if member['method'] == zipfile.ZIP_DEFLATED else None
+        crc = 0
+        remaining = member['compressed_size']
+        while remaining > 0:
+            buf = fh.read(min(COPY_BUFSIZE, remaining))
+            if not buf:
+                raise zipfile.BadZipFile(f"Truncated data for {member['name']}")
+            remaining -= len(buf)
+            if inflater is None:
+                crc = zlib.crc32(buf, crc)
+                yield buf
+                continue
+            # Bounded output per call: highly compressible data must not
+            # balloon into one huge buffer.
+            data = inflater.decompress(buf, COPY_BUFSIZE)
+            while data:
+                crc = zlib.crc32(data, crc)
+                yield data
+                data = inflater.decompress(inflater.unconsumed_tail, COPY_BUFSIZE)
+        if inflater is not None:
+            data = inflater.flush()
+            if data:
+                crc = zlib.crc32(data, crc)
+                yield data
+    if crc != member['crc32']:
+        raise zipfile.BadZipFile(f"CRC mismatch for {member['name']}")
@@ -0,0 +1,207 @@
+"""
+Content-addressed, reference-counted blob store.
+
+Stored transfer content lives once per distinct SHA-256 under
+``UPLOAD_FOLDER/blobs/<first two hex digits>/<sha256>``. The ``blob`` table
+counts the references to each blob: one per FileUpload whose stored file it
+is, plus one per lazy-archive member backed by it. Sending the same 20 GB
+master to ten recipients therefore costs 20 GB of disk, not 200.
+
+Reference changes run inside the caller's ``db.session`` transaction and
+take the blob row's lock first, so an upload adding a reference and a
+cleanup dropping the last one are serialised. A new reference puts its
+content in the store before the commit without consuming the staged file
+(``acquire``), so a committed transfer always has its blob; a failed
+commit removes only the files it created (``abandon``) and the staged
+file is left for a retry. A blob whose count reaches zero is renamed
+aside (``release``) and only unlinked once the transaction has committed
+(``purge``).
+
+Transfers recorded before the blob store existed have ``blob_sha256`` NULL
+and keep their flat file (or lazy archive directory) in ``UPLOAD_FOLDER``.
+"""
+import functools
+import os
+import re
+import shutil
+import threading
+
+from sqlalchemy import delete, func, select, update
+
+from . import archive, db
+from .models import Blob
+from .paths import safe_join, safe_stored_filename
+
+_SHA256_HEX = re.compile(r'^[0-9a-f]{64}$')
+_BLOB_DIR = 'blobs'
+_TOMBSTONE_SUFFIX = '.deleting'
+
+
+def blob_path(upload_root: str, sha256: str) -> str:
+    """Path of the blob for ``sha256``. Only lowercase hex digests are
+    accepted, so the digest can never smuggle path components."""
+    if not isinstance(sha256, str) or not _SHA256_HEX.match(sha256):
+        raise ValueError("Invalid blob digest")
+    return os.path.join(upload_root, _BLOB_DIR, sha256[:2], sha256)
+
+
+def stored_path(upload_root: str, record) -> str:
+    """Where a transfer's stored content lives: its blob, or for legacy
+    transfers and lazy archives the file/directory named after it."""
+    if record.blob_sha256:
+        return blob_path(upload_root, record.blob_sha256)
+    return safe_join(upload_root, safe_stored_filename(record.filename))
+
+
+def download_size(upload_root: str, path: str) -> int:
+    """Bytes a full download of the content stored at ``path`` sends: the
+    file itself, or for a lazy archive the zip streamed from its members."""
+    if archive.is_lazy(path):
+        return archive.StoredZip(path, functools.partial(blob_path, upload_root)).size
+    return os.path.getsize(path)
+
+
+def _increment(sha256: str, size: int) -> None:
+    dialect = db.engine.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(Blob).values(sha256=sha256, size=size, refcount=1)
+        stmt = stmt.on_duplicate_key_update(refcount=Blob.refcount + 1)
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(Blob).values(sha256=sha256, size=size, refcount=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Blob.sha256], set_={'refcount': Blob.refcount + 1},
+        )
+    else:
+        updated = db.session.execute(
+            update(Blob).where(Blob.sha256 == sha256).values(refcount=Blob.refcount + 1)
+        ).rowcount
+        if updated:
+            return
+        stmt = Blob.__table__.insert().values(sha256=sha256, size=size, refcount=1)
+    db.session.execute(stmt)
+
+
+def acquire(upload_root: str, sha256: str, staged_path: str) -> str | None:
+    """Add a reference to the blob for ``sha256``, whose content is the file
+    at ``staged_path``, and put that content in the store if the blob file
+    is missing: hard-linked, or copied where the filesystem cannot link, so
+    the staged file stays as it was. Must be followed by a commit of the
+    session. Returns the blob path when this call created the file, to pass
+    to ``abandon`` if the transaction rolls back instead."""
+    path = blob_path(upload_root, sha256)
+    # Upsert first: the row lock it takes keeps a concurrent release() from
+    # setting the file aside, and a concurrent acquire() from creating it,
+    # until this transaction ends.
+    _increment(sha256, os.path.getsize(staged_path))
+    if os.path.exists(path):
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.link(staged_path, path)
+    except OSError:
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            shutil.copyfile(staged_path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    return path
+
+
+def abandon(paths) -> None:
+    """Undo the files ``acquire`` created, before rolling its transaction
+    back (while the row lock still keeps other uploads away from them)."""
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def discard_staged(staged_path: str) -> None:
+    """Remove a staged file once its reference has committed; the store
+    has its own copy (or link) of it by then."""
+    os.remove(staged_path)
+
+
+def release(upload_root: str, sha256: str) -> str | None:
+    """Drop one reference to ``sha256``. When it was the last one the row is
+    deleted and the file renamed aside; the returned path must be passed to
+    ``purge`` after the session commits (or ``restore`` on rollback)."""
+    path = blob_path(upload_root, sha256)
+    db.session.execute(
+        update(Blob).where(Blob.sha256 == sha256).values(refcount=Blob.refcount - 1)
+    )
+    remaining = db.session.execute(
+        select(Blob.refcount).where(Blob.sha256 == sha256)
+    ).scalar()
+    if remaining is None or remaining > 0:
+        return None
+    db.session.execute(delete(Blob).where(Blob.sha256 == sha256))
+    tombstone = path + _TOMBSTONE_SUFFIX
+    try:
+        os.replace(path, tombstone)
+    except FileNotFoundError:
+        return None
+    return tombstone
+
+
+def release_transfer(upload_root: str, record) -> list:
+    """Drop every reference ``record`` holds. Returns the paths to ``purge``
+    once the deletion of the record has committed."""
+    if record.blob_sha256:
+        tombstone = release(upload_root, record.blob_sha256)
+        return [tombstone] if tombstone else []
+
+    path = safe_join(upload_root, safe_stored_filename(record.filename))
+    doomed = [path] if os.path.exists(path) else []
+    if archive.is_lazy(path):
+        manifest = archive.read_manifest(path)
+        if manifest.get('blobs'):
+            for member in manifest['members']:
+                tombstone = release(upload_root, member['sha256'])
+                if tombstone:
+                    doomed.append(tombstone)
+    return doomed
+
+
+def purge(paths) -> None:
+    """Delete what ``release``/``release_transfer`` set aside."""
+    for path in paths:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def restore(paths) -> None:
+    """Undo ``release`` renames after a rolled-back transaction."""
+    for path in paths:
+        if path.endswith(_TOMBSTONE_SUFFIX) and os.path.exists(path):
+            os.replace(path, path[:-len(_TOMBSTONE_SUFFIX)])
+
+
+def usage() -> dict:
+    """Physical vs logical size of everything in the store."""
+    count, stored, referenced = db.session.query(
+        func.count(Blob.sha256),
+        func.coalesce(func.sum(Blob.size), 0),
+        func.coalesce(func.sum(Blob.size * Blob.refcount), 0),
+    ).one()
+    stored, referenced = int(stored), int(referenced)
+    return {
+        'blobs': count,
+        'stored_bytes': stored,
+        'referenced_bytes': referenced,
+        'saved_bytes': referenced - stored,
+        'dedup_ratio': referenced / stored if stored else 1.0,
+    }
@@ -0,0 +1,66 @@
+"""
+Small per-process caches for data that is read far more often than it
+changes.
+
+A committed transfer never changes its stored file or its metadata; only
+the downloaded flags move, and the row eventually disappears. Caching what
+the public endpoints read saves a round trip to the database (and a few
+stat() calls) on every page view of a popular link. Each Gunicorn worker
+keeps its own cache. Invalidation is therefore explicit only in the worker
+that made the change; every other worker notices within ``ttl`` seconds at
+worst, which is why callers keep checks that must be exact (expiry, and
+whether the transfer still exists) out of the cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe mapping holding at most ``maxsize`` entries, least
+    recently used evicted first. With a ``ttl``, an entry also lapses that
+    many seconds after it was stored."""
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: 'OrderedDict[object, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_if(self, predicate) -> int:
+        """Drop every entry whose value satisfies ``predicate``. Returns the
+        number dropped."""
+        with self._lock:
+            doomed = [key for key, (_, value) in self._entries.items() if predicate(value)]
+            for key in doomed:
+                del self._entries[key]
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,127 @@
+"""
+Per-entry compression policy for zipped transfers.
+
+Deflating video, JPEG or already-compressed archives burns a core for
+minutes and saves next to nothing, so each archive member is classified from
+its name and a sample of its first bytes before it is written:
+
+1. its extension or libmagic-detected MIME type is on the store list, or
+2. the sample's Shannon entropy is above the threshold (random-looking
+   bytes will not shrink)
+
+and stored with ``ZIP_STORED`` if either holds, deflated otherwise. A
+member shorter than the sample skips both checks and is deflated (unless
+its extension is listed): deflating it, even for nothing, costs less than
+classifying it.
+
+libmagic is optional: python-magic raises at import time when the shared
+library is missing, in which case detection falls back to extensions and
+entropy only. Its text and charset tests scan the whole sample and make up
+most of its cost on text members; they only ever answer ``text/*``, so they
+are switched off unless such a type is listed.
+"""
+import math
+import os
+import threading
+import zipfile
+from collections import Counter
+
+try:
+    import magic
+except (ImportError, OSError):
+    magic = None
+
+SAMPLE_SIZE = 64 * 1024
+
+# Policies built by from_config, by their settings. Shared like the archive
+# executor: one libmagic cookie per process instead of one per upload.
+_policies = {}
+_policies_lock = threading.Lock()
+
+
+def shannon_entropy(sample: bytes) -> float:
+    """Entropy of ``sample`` in bits per byte (0.0 .. 8.0)."""
+    if not sample:
+        return 0.0
+    total = len(sample)
+    return -sum(c / total * math.log2(c / total) for c in Counter(sample).values())
+
+
+def _detector(mime_types: tuple):
+    if magic is None or not mime_types:
+        return None
+    try:
+        detector = magic.Magic(mime=True)
+        if not any(t.startswith('text/') for t in mime_types):
+            magic.magic_setflags(
+                detector.cookie,
+                detector.flags | magic.MAGIC_NO_CHECK_TEXT | magic.MAGIC_NO_CHECK_ENCODING,
+            )
+    except Exception:
+        return None
+    return detector
+
+
+class CompressionPolicy:
+    """Chooses ``(compress_type, compresslevel)`` for each archive member."""
+
+    def __init__(self, level: int, entropy_threshold: float, store_types: str):
+        self.level = level
+        self.entropy_threshold = entropy_threshold
+        types = [t.strip().lower() for t in store_types.split(',') if t.strip()]
+        self.extensions = {t for t in types if t.startswith('.')}
+        self.mime_types = tuple(t for t in types if not t.startswith('.'))
+        self._magic = _detector(self.mime_types)
+
+    @classmethod
+    def from_config(cls, config) -> 'CompressionPolicy':
+        """The policy for ``config``'s settings, built (and its magic
+        database loaded) the first time they are seen, then reused by every
+        archive this process builds. python-magic serialises lookups on a
+        cookie, so sharing one across threads is safe."""
+        key = (
+            config['ZIP_COMPRESSION_LEVEL'],
+            config['ZIP_STORE_ENTROPY_THRESHOLD'],
+            config['ZIP_STORE_TYPES'],
+        )
+        with _policies_lock:
+            policy = _policies.get(key)
+            if policy is None:
+                policy = _policies[key] = cls(*key)
+        return policy
+
+    def _listed_mime(self, sample: bytes) -> bool:
+        if self._magic is None:
+            return False
+        try:
+            mime = self._magic.from_buffer(sample).lower()
+        except Exception:
+            return False
+        return any(
+            mime.startswith(t) if t.endswith('/') else mime == t
+            for t in self.mime_types
+        )
+
+    def choose(self, name: str, sample: bytes) -> tuple[int, int | None]:
+        if self.level == 0:
+            return zipfile.ZIP_STORED, None
+        if os.path.splitext(name)[1].lower() in self.extensions:
+            return zipfile.ZIP_STORED, None
+        if len(sample) < SAMPLE_SIZE:
+            return zipfile.ZIP_DEFLATED, self.level
+        if (
+            self._listed_mime(sample)
+            or shannon_entropy(sample) >= self.entropy_threshold
+        ):
+            return zipfile.ZIP_STORED, None
+        return zipfile.ZIP_DEFLATED, self.level
+
+
+class CompressionStats:
+    """Accumulates what the policy cost and saved for one archive."""
+
+    def __init__(self):
+        self.input_bytes = 0
+        self.saved_bytes = 0
+        self.cpu_seconds = 0.0
+
@@ -7,16 +7,35 @@ def _abs(path: str) -> str:
     return os.path.realpath(os.path.abspath(path))
 
 
+# Extensions and MIME types (exact, or prefixes ending in '/') that the
+# compression policy stores without even sampling.
+_DEFAULT_ZIP_STORE_TYPES = (
+    '.jpg,.jpeg,.png,.gif,.webp,.heic,.avif,'
+    '.mp4,.m4v,.mov,.mkv,.avi,.webm,.mp3,.m4a,.aac,.ogg,.opus,.flac,'
+    '.zip,.gz,.tgz,.bz2,.xz,.zst,.7z,.rar,.jar,.apk,.docx,.xlsx,.pptx,.pdf,'
+    'video/,audio/,image/jpeg,image/png,image/gif,image/webp,'
+    'application/zip,application/gzip,application/x-xz,application/x-bzip2,'
+    'application/zstd,application/x-7z-compressed,application/vnd.rar'
+)
+
+
 class Config:
     # Database
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # A thread holds a connection only while it queries: the session is
+    # removed when the view returns, before any body is streamed, so few of
+    # a worker's GUNICORN_THREADS (see gunicorn.conf.py) need one at once.
+    # The pool keeps DB_POOL_SIZE open, opens up to DB_MAX_OVERFLOW more in
+    # a burst, and past that a thread waits DB_POOL_TIMEOUT seconds for one.
+    # The database must accept GUNICORN_WORKERS times the first two.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '10'))
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_pre_ping': True,
         'pool_recycle': 3600,
-        'pool_timeout': 30,
-        'pool_size': 10,
-        'max_overflow': 20,
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', '30')),
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '20')),
     }
 
     # Secrets
@@ -50,6 +69,104 @@ class Config:
 
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024 * 1024  # 50 GB
 
+    # Upper bound on the recipients of one transfer. They share a single
+    # stored payload; each gets its own download link and notification.
+    MAX_RECIPIENTS = int(os.environ.get('MAX_RECIPIENTS', '20'))
+
+    # Resumable chunked uploads (/upload/sessions). Every chunk but the last
+    # of each file must be exactly this size. Sessions untouched for
+    # UPLOAD_SESSION_TTL_HOURS are purged by the cleanup scheduler.
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+    UPLOAD_SESSION_TTL_HOURS = int(os.environ.get('UPLOAD_SESSION_TTL_HOURS', '24'))
+
+    # Admission control (see admission.py). An upload whose projected disk
+    # usage would leave less than UPLOAD_MIN_FREE_BYTES free on the upload
+    # volume is refused with 507; packaging work beyond
+    # FINALIZE_MAX_CONCURRENT concurrent jobs per host is refused with 503.
+    # Both tell the client to retry after ADMISSION_RETRY_AFTER seconds.
+    UPLOAD_MIN_FREE_BYTES = int(os.environ.get('UPLOAD_MIN_FREE_BYTES', str(1024 * 1024 * 1024)))
+    FINALIZE_MAX_CONCURRENT = int(os.environ.get('FINALIZE_MAX_CONCURRENT', '2'))
+    ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', '30'))
+
+    # Per-worker cache of what /transfer and /download read about a link
+    # (see cache.py). Expiry and deletion are read from the database on
+    # every request; TRANSFER_CACHE_TTL is also the max-age of /transfer.
+    TRANSFER_CACHE_SIZE = int(os.environ.get('TRANSFER_CACHE_SIZE', '1024'))
+    TRANSFER_CACHE_TTL = int(os.environ.get('TRANSFER_CACHE_TTL', '60'))
+
+    # Seconds /api/stats/overview answers from a per-worker cache (also
+    # its private max-age). The figures come from a daily rollup, so this
+    # only spares repeated dashboard refreshes.
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', '60'))
+
+    # Notification outbox (see outbox.py). The mail dispatcher sends up to
+    # OUTBOX_BATCH_SIZE due emails per SMTP session, looks for new ones
+    # every OUTBOX_POLL_SECONDS (at once only for those queued by the worker
+    # that runs it, so others may wait that long), and gives up on an email
+    # after OUTBOX_MAX_ATTEMPTS transient failures.
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '50'))
+    OUTBOX_POLL_SECONDS = float(os.environ.get('OUTBOX_POLL_SECONDS', '5'))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '5'))
+
+    # The single mail dispatcher (see mailer.py). It holds at most
+    # MAIL_CONCURRENCY SMTP sessions for the whole deployment and sends at
+    # most MAIL_RATE_PER_MINUTE emails a minute per SMTP account (0: no
+    # limit), in bursts of up to MAIL_BURST.
+    MAIL_CONCURRENCY = max(1, int(os.environ.get('MAIL_CONCURRENCY', '2')))
+    MAIL_RATE_PER_MINUTE = float(os.environ.get('MAIL_RATE_PER_MINUTE', '0'))
+    MAIL_BURST = int(os.environ.get('MAIL_BURST', '10'))
+
+    # SMTP sessions kept open between notification batches (see
+    # smtp_pool.py): one per sender thread, each closed after
+    # SMTP_POOL_IDLE_TIMEOUT idle seconds and replaced after
+    # SMTP_POOL_MAX_MESSAGES messages.
+    SMTP_POOL_IDLE_TIMEOUT = float(os.environ.get('SMTP_POOL_IDLE_TIMEOUT', '60'))
+    SMTP_POOL_MAX_MESSAGES = int(os.environ.get('SMTP_POOL_MAX_MESSAGES', '100'))
+
+    # Background integrity scrubbing (see scrub.py). A pass re-hashes every
+    # live transfer, reading at most SCRUB_MAX_MBPS megabytes and
+    # SCRUB_MAX_IOPS reads per second, and starts SCRUB_INTERVAL_HOURS after
+    # the previous one finished.
+    SCRUB_ENABLED = os.environ.get('SCRUB_ENABLED', 'true').lower() == 'true'
+    SCRUB_MAX_MBPS = float(os.environ.get('SCRUB_MAX_MBPS', '20'))
+    SCRUB_MAX_IOPS = float(os.environ.get('SCRUB_MAX_IOPS', '100'))
+    SCRUB_INTERVAL_HOURS = float(os.environ.get('SCRUB_INTERVAL_HOURS', '168'))
+
+    # Hand stored files to a fronting web server instead of streaming them
+    # through a Gunicorn worker. 'x-accel' answers with X-Accel-Redirect
+    # pointing at DOWNLOAD_ACCEL_PREFIX (an nginx `internal` location
+    # aliased to UPLOAD_FOLDER); 'x-sendfile' answers with X-Sendfile and
+    # the absolute path (Apache mod_xsendfile, lighttpd). Empty serves the
+    # file from the worker, through wsgi.file_wrapper (sendfile) wherever
+    # the response allows it.
+    DOWNLOAD_OFFLOAD = os.environ.get('DOWNLOAD_OFFLOAD', '').lower()
+    DOWNLOAD_ACCEL_PREFIX = '/' + os.environ.get('DOWNLOAD_ACCEL_PREFIX', '/protected/').strip('/') + '/'
+
+    # Parse /upload request bodies incrementally and write each file part
+    # straight to its final archive/path. Set to false to fall back to
+    # Werkzeug's spooled request.files + temp directory staging.
+    UPLOAD_STREAMING_INGEST = os.environ.get('UPLOAD_STREAMING_INGEST', 'true').lower() == 'true'
+
+    # Compression policy for zipped transfers (see compression.py). Members
+    # whose type is listed in ZIP_STORE_TYPES, or whose first bytes look
+    # random (entropy in bits/byte at or above the threshold), are stored
+    # instead of deflated. A level of 0 stores everything.
+    ZIP_COMPRESSION_LEVEL = int(os.environ.get('ZIP_COMPRESSION_LEVEL', '6'))
+    ZIP_STORE_ENTROPY_THRESHOLD = float(os.environ.get('ZIP_STORE_ENTROPY_THRESHOLD', '7.5'))
+    ZIP_STORE_TYPES = os.environ.get('ZIP_STORE_TYPES') or _DEFAULT_ZIP_STORE_TYPES
+
+    # How multi-file transfers are stored. 'eager' builds the zip when the
+    # upload completes; 'lazy' keeps the members as plain files plus a
+    # manifest and streams a ZIP_STORED archive at download time (no
+    # compression, no second copy, nothing spent on transfers that expire
+    # unread). Existing transfers keep working whichever mode is active.
+    ARCHIVE_MODE = os.environ.get('ARCHIVE_MODE', 'eager').lower()
+
+    # Threads deflating archive blocks in parallel, per Gunicorn worker.
+    # The output is byte-for-byte a normal ZIP64 file; only the wall-clock
+    # time of packaging changes.
+    ARCHIVE_WORKERS = int(os.environ.get('ARCHIVE_WORKERS') or os.cpu_count() or 2)
+
     # Admin credentials (no defaults: failing closed is safer than shipping
     # known credentials).
     ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME')
@@ -0,0 +1,88 @@
+"""
+Progress of admin bulk jobs (see bulk_transfers in routes.py).
+
+Deleting thousands of transfers takes longer than an HTTP request should,
+so the request only queues the job and answers with its id. The job runs
+on a background thread of whichever worker accepted it, while the status
+poll may land on any worker. Each job therefore keeps a JSON snapshot at
+``UPLOAD_FOLDER/jobs/<job_id>.json``, replaced after every batch (see
+snapshots.py: atomically, and skipped rather than failing the job when it
+cannot be written).
+"""
+import json
+import os
+import time
+import uuid
+
+from .snapshots import expire_snapshots, write_snapshot
+
+_JOBS_DIR = 'jobs'
+
+
+def _snapshot_path(upload_root: str, job_id: str) -> str:
+    # job_id comes from the URL; canonicalising it as a UUID (ValueError
+    # otherwise) keeps it from carrying path components.
+    return os.path.join(upload_root, _JOBS_DIR, f'{uuid.UUID(job_id)}.json')
+
+
+class Job:
+    """State of one bulk job, as written by the thread running it."""
+
+    def __init__(self, upload_root: str, action: str, total: int):
+        self.job_id = str(uuid.uuid4())
+        self.path = _snapshot_path(upload_root, self.job_id)
+        now = time.time()
+        self.state = {
+            'job_id': self.job_id,
+            'action': action,
+            'pid': os.getpid(),
+            'status': 'queued',
+            'total': total,
+            'processed': 0,
+            'affected': 0,
+            'failed': 0,
+            'created_at': now,
+            'updated_at': now,
+            'finished_at': None,
+            'error': None,
+        }
+        self._flush()
+
+    def start(self) -> None:
+        self.state['status'] = 'running'
+        self._flush()
+
+    def advance(self, processed: int, affected: int, failed: int = 0) -> None:
+        """Account for one batch: ``processed`` transfers looked at, of
+        which ``affected`` were changed and ``failed`` could not be."""
+        self.state['processed'] += processed
+        self.state['affected'] += affected
+        self.state['failed'] += failed
+        self._flush()
+
+    def finish(self, error: str | None = None) -> None:
+        self.state['status'] = 'failed' if error else 'done'
+        self.state['error'] = error
+        self.state['finished_at'] = time.time()
+        self._flush()
+
+    def _flush(self) -> None:
+        self.state['updated_at'] = time.time()
+        write_snapshot(self.path, self.state)
+
+
+def load(upload_root: str, job_id: str) -> dict | None:
+    """The latest snapshot of ``job_id``, or None if there is none (or the
+    id is not a UUID)."""
+    try:
+        with open(_snapshot_path(upload_root, job_id), 'r', encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def expire(upload_root: str, max_age_seconds: float) -> int:
+    """Remove snapshots not updated for ``max_age_seconds``: finished jobs
+    nobody polls any more, or jobs whose worker was killed. Returns the
+    number removed."""
+    return expire_snapshots(os.path.join(upload_root, _JOBS_DIR), max_age_seconds)
@@ -0,0 +1,143 @@
+"""
+The single mail dispatcher.
+
+Web workers only queue notifications (see outbox.py). Sending is done by
+one process for the whole deployment: whichever worker first flock()s
+``UPLOAD_FOLDER/mail/dispatcher.lock`` without blocking, as with the
+scrubber. The others retry now and then, so the role moves to another
+worker when the holder exits (the kernel drops the lock with it). Being
+alone, the dispatcher can enforce limits that per-worker senders could
+only multiply:
+
+* at most ``MAIL_CONCURRENCY`` SMTP sessions at once, one per sender
+  thread;
+* at most ``MAIL_RATE_PER_MINUTE`` messages a minute per SMTP account,
+  metered by a token bucket holding up to ``MAIL_BURST`` tokens.
+
+It also keeps the only view of send latency. ``Metrics`` summarises
+recent sends, and the dispatcher writes the summary to
+``UPLOAD_FOLDER/mail/status.json`` (see snapshots.py), so an admin
+request served by any worker can read it.
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from .snapshots import write_snapshot
+
+_MAIL_DIR = 'mail'
+_LOCK_FILE = 'dispatcher.lock'
+_STATUS_FILE = 'status.json'
+# Sends the latency figures are computed over.
+_SAMPLES = 200
+
+
+def try_lock(upload_root: str):
+    """Become the dispatching process. Returns the lock's file handle,
+    to keep open for as long as the process dispatches (closing it gives
+    up the role), or None when another process holds it."""
+    directory = os.path.join(upload_root, _MAIL_DIR)
+    os.makedirs(directory, exist_ok=True)
+    fh = open(os.path.join(directory, _LOCK_FILE), 'a+')
+    try:
+        fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        fh.close()
+        return None
+    return fh
+
+
+class RateLimiter:
+    """One token bucket per SMTP account: ``rate_per_minute`` tokens a
+    minute, at most ``burst`` saved up. A rate of 0 lifts the limit."""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate_per_minute = rate_per_minute
+        self._burst = max(burst, 1)
+        self._lock = threading.Lock()
+        self._buckets = {}  # account -> (tokens, monotonic time they were counted)
+
+    def take(self, smtp_config: dict) -> None:
+        """Spend a token of the account ``smtp_config`` logs into,
+        sleeping until one is available."""
+        if self.rate_per_minute <= 0:
+            return
+        account = (smtp_config.get('smtp_server'), str(smtp_config.get('smtp_port')), smtp_config.get('smtp_user'))
+        per_second = self.rate_per_minute / 60
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, counted = self._buckets.get(account, (self._burst, now))
+                tokens = min(self._burst, tokens + (now - counted) * per_second)
+                if tokens >= 1:
+                    self._buckets[account] = (tokens - 1, now)
+                    return
+                self._buckets[account] = (tokens, now)
+                wait = (1 - tokens) / per_second
+            time.sleep(wait)
+
+
+def _summary(samples) -> dict | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return {
+        'avg': round(sum(ordered) / len(ordered), 3),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'max': round(ordered[-1], 3),
+    }
+
+
+class Metrics:
+    """Counters and latencies of the sends made since this process became
+    the dispatcher (``start``). Recorded by every sender thread."""
+
+    def __init__(self, concurrency: int, rate_per_minute: float):
+        self._lock = threading.Lock()
+        self._send_seconds = deque(maxlen=_SAMPLES)
+        self._queued_seconds = deque(maxlen=_SAMPLES)
+        self._state = {
+            'pid': None,
+            'since': None,
+            'concurrency': concurrency,
+            'rate_per_minute': rate_per_minute,
+            'sent': 0,
+            'failed': 0,
+        }
+
+    def start(self) -> None:
+        with self._lock:
+            self._state.update(pid=os.getpid(), since=time.time())
+
+    def record_send(self, seconds: float, success: bool) -> None:
+        """One message the server accepted (or rejected) in ``seconds``."""
+        with self._lock:
+            self._send_seconds.append(seconds)
+            self._state['sent' if success else 'failed'] += 1
+
+    def record_delivery(self, queued_seconds: float) -> None:
+        """A message sent ``queued_seconds`` after it was queued."""
+        with self._lock:
+            self._queued_seconds.append(queued_seconds)
+
+    def save(self, upload_root: str) -> None:
+        with self._lock:
+            state = dict(
+                self._state,
+                updated_at=time.time(),
+                send_seconds=_summary(self._send_seconds),
+                queued_seconds=_summary(self._queued_seconds),
+            )
+        write_snapshot(os.path.join(upload_root, _MAIL_DIR, _STATUS_FILE), state)
+
+
+def load_status(upload_root: str) -> dict:
+    """The dispatcher's last snapshot, or {} before one was written."""
+    try:
+        with open(os.path.join(upload_root, _MAIL_DIR, _STATUS_FILE), 'r', encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,295 @@
+"""
+Versioned schema migrations.
+
+Each entry of ``MIGRATIONS`` takes the database from one version to the
+next and is recorded in ``schema_migration`` once applied. ``upgrade``
+runs whatever is missing. Under Gunicorn it runs once, in a process of its
+own, before any worker is forked (see migrate.py and gunicorn.conf.py). A
+worker starting up then only reads the current version
+(``ensure_current``): one MAX() over a handful of rows instead of
+inspecting every table.
+
+Databases that predate this runner have no version recorded. Their schema
+is at whatever point the ad-hoc startup upgrades it replaced left it. Every
+migration is therefore idempotent:
+
+* each table, column and index is existence-checked;
+* data migrations only touch rows still in the old shape.
+
+A fresh database simply goes through the same list. Data migrations work
+``_BATCH`` rows at a time and commit after each batch, so none of them
+holds a long transaction.
+
+Append new migrations at the end. Once released, a migration is never
+edited or reordered.
+"""
+import json
+import time
+from datetime import date
+
+from sqlalchemy import exc, func, insert, inspect, select, text, update
+
+from . import app, blobs, db, stats
+from .models import FileUpload, OutboxMessage, SchemaMigration, TransferFile, TransferRecipient
+from .paths import UnsafePathError
+
+_BATCH = 500
+_LOCK_NAME = 'itransfer_schema_migration'
+# Seconds a process waits for another one to finish migrating. Generous:
+# the data migrations of a large upgrade can take a while, and starting
+# against a half-migrated schema is worse than starting late.
+_LOCK_TIMEOUT = 3600
+
+
+def _create_tables() -> None:
+    """Tables that do not exist yet, as the models declare them."""
+    db.create_all()
+
+
+def _add_file_upload_columns() -> None:
+    """Columns added to file_upload after its first release: notification
+    tracking, compression stats, blob reference, integrity scrubbing,
+    denormalised sizes. create_all() never alters an existing table. Each
+    ALTER is additive (nullable, no data rewrite)."""
+    wanted = {
+        'notification_status_recipient': 'VARCHAR(16)',
+        'notification_error_recipient': 'VARCHAR(500)',
+        'notification_status_sender': 'VARCHAR(16)',
+        'notification_error_sender': 'VARCHAR(500)',
+        'notification_status_download': 'VARCHAR(16)',
+        'notification_error_download': 'VARCHAR(500)',
+        'compression_input_bytes': 'BIGINT',
+        'compression_saved_bytes': 'BIGINT',
+        'compression_cpu_seconds': 'DOUBLE',
+        'blob_sha256': 'VARCHAR(64)',
+        'integrity_status': 'VARCHAR(16)',
+        'integrity_error': 'VARCHAR(500)',
+        'integrity_checked_at': 'DATETIME',
+        'file_count': 'INT',
+        'total_size': 'BIGINT',
+        'stored_size': 'BIGINT',
+    }
+    existing = {col['name'] for col in inspect(db.engine).get_columns('file_upload')}
+    for name, ddl in wanted.items():
+        if name in existing:
+            continue
+        app.logger.info("Migrating schema: adding column %s to file_upload", name)
+        with db.engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE file_upload ADD COLUMN {name} {ddl} DEFAULT NULL"))
+
+
+def _create_indexes() -> None:
+    """Indexes declared on the models after their table first shipped:
+    like columns, create_all() never adds them to an existing table."""
+    for table in (FileUpload.__table__, TransferRecipient.__table__):
+        existing = {index['name'] for index in inspect(db.engine).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                app.logger.info("Migrating schema: creating index %s on %s", index.name, table.name)
+                index.create(db.engine)
+
+
+def _backfill_transfer_sizes() -> None:
+    """Fill file_count, total_size and stored_size on rows written before
+    those columns existed. A row whose stored content is gone keeps
+    stored_size NULL."""
+    upload_root = app.config['UPLOAD_FOLDER']
+    cursor = ''
+    while True:
+        rows = (
+            db.session.query(
+                FileUpload.id, FileUpload.filename, FileUpload.blob_sha256, FileUpload.files_list,
+            )
+            .filter(FileUpload.file_count.is_(None), FileUpload.id > cursor)
+            .order_by(FileUpload.id)
+            .limit(_BATCH)
+            .all()
+        )
+        if not rows:
+            return
+        for row in rows:
+            files = json.loads(row.files_list) if row.files_list else []
+            try:
+                stored_size = blobs.download_size(upload_root, blobs.stored_path(upload_root, row))
+            except (OSError, ValueError, KeyError, UnsafePathError):
+                stored_size = None
+            db.session.execute(update(FileUpload).where(FileUpload.id == row.id).values(
+                file_count=len(files),
+                total_size=sum(int(f.get('size', 0)) for f in files),
+                stored_size=stored_size,
+            ))
+        db.session.commit()
+        cursor = rows[-1].id
+
+
+def _move_files_lists() -> None:
+    """Move the files_list JSON of rows written before transfer_file
+    existed into that table, clearing the column in the same transaction.
+    Runs after _backfill_transfer_sizes, which reads the JSON."""
+    cursor = ''
+    while True:
+        rows = (
+            db.session.query(FileUpload.id, FileUpload.files_list)
+            .filter(FileUpload.files_list.isnot(None), FileUpload.id > cursor)
+            .order_by(FileUpload.id)
+            .limit(_BATCH)
+            .all()
+        )
+        if not rows:
+            return
+        for row in rows:
+            # Claim the row first, so a concurrent mover (two processes on a
+            # database without advisory locks) never inserts it twice.
+            claimed = db.session.execute(
+                update(FileUpload)
+                .where(FileUpload.id == row.id, FileUpload.files_list.isnot(None))
+                .values(files_list=None)
+            ).rowcount
+            files = json.loads(row.files_list)
+            if claimed and files:
+                db.session.execute(insert(TransferFile), [{
+                    'file_id': row.id,
+                    'position': position,
+                    'name': f['name'],
+                    'size': int(f.get('size', 0)),
+                } for position, f in enumerate(files)])
+        db.session.commit()
+        cursor = rows[-1].id
+
+
+def _seed_daily_stats() -> None:
+    """Start an empty daily_stats rollup from the transfers still on disk,
+    so the statistics do not begin at zero on upgrade. Expired transfers
+    are gone and cannot be counted."""
+    if not stats.is_empty():
+        return
+    day = db.func.date(FileUpload.created_at)
+    counts = {}
+    for created, sender, transfers, uploaded, stored in db.session.query(
+        day, FileUpload.sender_email, db.func.count(FileUpload.id),
+        db.func.sum(FileUpload.total_size), db.func.sum(FileUpload.stored_size),
+    ).group_by(day, FileUpload.sender_email):
+        counts[(created, sender)] = dict(
+            transfers=transfers, uploaded_bytes=uploaded or 0, stored_bytes=stored or 0,
+        )
+    for created, sender, links, downloaded in db.session.query(
+        day, FileUpload.sender_email, db.func.count(TransferRecipient.id),
+        db.func.sum(db.case((TransferRecipient.downloaded.is_(True), 1), else_=0)),
+    ).join(TransferRecipient, TransferRecipient.file_id == FileUpload.id).group_by(day, FileUpload.sender_email):
+        counts.setdefault((created, sender), {}).update(links=links, links_downloaded=downloaded or 0)
+    for (created, sender), values in counts.items():
+        if created is None:
+            continue
+        # SQLite's date() returns text, MySQL's a date.
+        stats.bump(sender, created if isinstance(created, date) else date.fromisoformat(created), **values)
+    db.session.commit()
+
+
+def _create_email_outbox() -> None:
+    """The notification outbox. Notifications were queued in memory
+    before it existed: whatever was still marked 'pending' then was lost
+    with the process that held it, so it is marked failed."""
+    OutboxMessage.__table__.create(db.engine, checkfirst=True)
+    lost = 'Lost on restart before sending'
+    for model, status, error in (
+        (FileUpload, 'notification_status_recipient', 'notification_error_recipient'),
+        (FileUpload, 'notification_status_sender', 'notification_error_sender'),
+        (FileUpload, 'notification_status_download', 'notification_error_download'),
+        (TransferRecipient, 'notification_status', 'notification_error'),
+        (TransferRecipient, 'notification_status_download', 'notification_error_download'),
+    ):
+        db.session.execute(
+            update(model).where(getattr(model, status) == 'pending').values({status: 'failed', error: lost})
+        )
+    db.session.commit()
+
+
+def _create_sqlite_listing_index() -> None:
+    """On SQLite, /api/transfers orders by datetime(created_at) (see
+    list_transfers in routes.py), which the plain (created_at, id) index
+    cannot serve: every page sorted the whole table. An index on the same
+    expression can. Other databases order by the column itself."""
+    if db.engine.dialect.name != 'sqlite':
+        return
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_file_upload_created_at_sqlite '
+        'ON file_upload (datetime(created_at), id)'
+    ))
+    db.session.commit()
+
+
+MIGRATIONS = (
+    (1, 'create tables', _create_tables),
+    (2, 'add file_upload columns', _add_file_upload_columns),
+    (3, 'create indexes', _create_indexes),
+    (4, 'backfill transfer sizes', _backfill_transfer_sizes),
+    (5, 'move files_list to transfer_file', _move_files_lists),
+    (6, 'seed daily_stats', _seed_daily_stats),
+    (7, 'create email_outbox', _create_email_outbox),
+    (8, 'create sqlite listing index', _create_sqlite_listing_index),
+)
+LATEST = MIGRATIONS[-1][0]
+
+
+def current_version() -> int:
+    """Highest migration applied, 0 for a database that has none."""
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(select(func.max(SchemaMigration.version))).scalar() or 0
+    except (exc.OperationalError, exc.ProgrammingError):
+        return 0  # no schema_migration table yet
+
+
+def upgrade() -> int:
+    """Apply every migration the database lacks, in order. On MySQL an
+    advisory lock makes a concurrent caller wait for the one already
+    migrating, then find nothing left to do. Returns the number applied."""
+    lock_conn = None
+    if db.engine.dialect.name in ('mysql', 'mariadb'):
+        # Held on a connection of its own: the session hands its connection
+        # back to the pool at every commit, and the lock belongs to it.
+        lock_conn = db.engine.connect()
+        if not lock_conn.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"), {'name': _LOCK_NAME, 'timeout': _LOCK_TIMEOUT},
+        ).scalar():
+            lock_conn.close()
+            raise RuntimeError("Timed out waiting for another process to migrate the schema")
+    try:
+        SchemaMigration.__table__.create(db.engine, checkfirst=True)
+        version = current_version()
+        applied = 0
+        for number, name, migrate in MIGRATIONS:
+            if number <= version:
+                continue
+            app.logger.info("Migrating schema to version %d (%s)", number, name)
+            started = time.monotonic()
+            try:
+                migrate()
+                db.session.add(SchemaMigration(version=number, name=name))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            app.logger.info("Schema version %d applied in %.2fs", number, time.monotonic() - started)
+            applied += 1
+        return applied
+    finally:
+        db.session.remove()
+        if lock_conn is not None:
+            lock_conn.execute(text("SELECT RELEASE_LOCK(:name)"), {'name': _LOCK_NAME})
+            lock_conn.close()
+
+
+def ensure_current() -> None:
+    """Check the schema version at worker start-up: a single query when
+    migrate.py already ran. Migrates in place otherwise (the dev server,
+    or Gunicorn started without gunicorn.conf.py)."""
+    version = current_version()
+    if version == LATEST:
+        return
+    if version > LATEST:
+        app.logger.warning(
+            "Database schema is at version %d, newer than this release (%d)", version, LATEST,
+        )
+        return
+    upgrade()
@@ -5,23 +5,45 @@ from . import db
 
 class FileUpload(db.Model):
     __tablename__ = 'file_upload'
+    # The admin listing pages through transfers newest first on
+    # (created_at, id) and filters on expiry, sender and legacy recipient.
+    __table_args__ = (
+        db.Index('ix_file_upload_created_at_id', 'created_at', 'id'),
+        db.Index('ix_file_upload_expires_at', 'expires_at'),
+        db.Index('ix_file_upload_sender_email', 'sender_email'),
+        db.Index('ix_file_upload_email', 'email'),
+    )
 
     id = db.Column(db.String(36), primary_key=True)
     filename = db.Column(db.String(256), nullable=False)
     email = db.Column(db.String(256), nullable=False)
     sender_email = db.Column(db.String(256), nullable=False)
     # Historical name kept for schema compatibility. Holds a SHA-256 hex
-    # digest of the stored file, used for integrity checks only.
+    # digest of the stored file (of its manifest.json for lazy archives,
+    # which lists each member's own digest), used for integrity checks only.
     encrypted_data = db.Column(db.String(256), nullable=False)
     downloaded = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     expires_at = db.Column(db.DateTime, nullable=False)
+    # Legacy JSON list of {name, size}. Files now live in transfer_file;
+    # rows written before it existed are moved over by a schema migration
+    # (see migrations.py), which then clears this column.
     files_list = db.Column(db.Text, nullable=True)
 
+    # Denormalised when the row is written (and backfilled for older rows)
+    # so listings and aggregates neither parse files_list nor stat() the
+    # upload folder: how many files were uploaded, their combined size, and
+    # the bytes a full download sends (the zip, streamed or not).
+    file_count = db.Column(db.Integer, nullable=True)
+    total_size = db.Column(db.BigInteger, nullable=True)
+    stored_size = db.Column(db.BigInteger, nullable=True)
+
     # Outcome of each background notification attempt: NULL (never attempted),
-    # 'pending', 'sent', or 'failed'. Populated by the background email
-    # executor in routes.py; see _ensure_notification_columns() in __init__.py
-    # for how these columns reach already-deployed databases.
+    # 'pending', 'sent', or 'failed'. Set to 'pending' when the email is
+    # queued in the outbox (outbox.py), then updated by the mail dispatcher
+    # (mailer.py, _dispatch_outbox in routes.py); see
+    # _add_file_upload_columns() in migrations.py for how these columns
+    # reach already-deployed databases.
     notification_status_recipient = db.Column(db.String(16), nullable=True)
     notification_error_recipient = db.Column(db.String(500), nullable=True)
     notification_status_sender = db.Column(db.String(16), nullable=True)
@@ -29,8 +51,136 @@ class FileUpload(db.Model):
     notification_status_download = db.Column(db.String(16), nullable=True)
     notification_error_download = db.Column(db.String(500), nullable=True)
 
-    def set_files_list(self, files):
-        self.files_list = json.dumps(files) if files else None
+    # What the compression policy did for zipped transfers (NULL otherwise):
+    # bytes fed into the archive, bytes saved by deflate, and CPU seconds
+    # spent building it. Summed by /api/stats/compression.
+    compression_input_bytes = db.Column(db.BigInteger, nullable=True)
+    compression_saved_bytes = db.Column(db.BigInteger, nullable=True)
+    compression_cpu_seconds = db.Column(db.Float, nullable=True)
+
+    # SHA-256 of the blob holding the stored file (see blobs.py). NULL for
+    # transfers stored before the blob store existed, whose file sits at
+    # UPLOAD_FOLDER/filename, and for lazy archives, whose members are
+    # blobs referenced from their manifest instead.
+    blob_sha256 = db.Column(db.String(64), nullable=True)
+
+    # Last verdict of the background integrity scrubber (see scrub.py):
+    # NULL (not scrubbed yet), 'ok', 'corrupt' or 'missing', with what
+    # failed and when it was checked.
+    integrity_status = db.Column(db.String(16), nullable=True)
+    integrity_error = db.Column(db.String(500), nullable=True)
+    integrity_checked_at = db.Column(db.DateTime, nullable=True)
+
+    # One row per recipient, each with its own download link. ``email``
+    # above keeps the first recipient for rows predating multi-recipient
+    # transfers (which have no recipient rows at all).
+    recipients = db.relationship(
+        'TransferRecipient', backref='transfer', cascade='all, delete-orphan',
+        order_by='TransferRecipient.position',
+    )
 
     def get_files_list(self):
         return json.loads(self.files_list) if self.files_list else []
+
+
+class TransferRecipient(db.Model):
+    """A recipient of a transfer. ``id`` doubles as the recipient's
+    download link id, so downloads and their notifications are tracked per
+    recipient while every recipient shares the transfer's stored file."""
+    __tablename__ = 'transfer_recipient'
+
+    id = db.Column(db.String(36), primary_key=True)
+    file_id = db.Column(
+        db.String(36), db.ForeignKey('file_upload.id', ondelete='CASCADE'),
+        nullable=False, index=True,
+    )
+    position = db.Column(db.Integer, nullable=False, default=0)
+    email = db.Column(db.String(256), nullable=False, index=True)
+    downloaded = db.Column(db.Boolean, default=False)
+    downloaded_at = db.Column(db.DateTime, nullable=True)
+
+    # Same NULL / 'pending' / 'sent' / 'failed' lifecycle as the
+    # notification_status_* columns of FileUpload.
+    notification_status = db.Column(db.String(16), nullable=True)
+    notification_error = db.Column(db.String(500), nullable=True)
+    notification_status_download = db.Column(db.String(16), nullable=True)
+    notification_error_download = db.Column(db.String(500), nullable=True)
+
+
+class TransferFile(db.Model):
+    """One file of a transfer, in upload order. ``archive_offset`` is where
+    its local header starts in the zip a full download sends (NULL when the
+    transfer is stored as the file itself). ``sha256`` is NULL for files
+    moved over from ``FileUpload.files_list``, which never recorded it."""
+    __tablename__ = 'transfer_file'
+
+    file_id = db.Column(
+        db.String(36), db.ForeignKey('file_upload.id', ondelete='CASCADE'), primary_key=True,
+    )
+    position = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.Text, nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    archive_offset = db.Column(db.BigInteger, nullable=True)
+    sha256 = db.Column(db.String(64), nullable=True)
+
+
+class Blob(db.Model):
+    """One physical file in the content-addressed store, shared by every
+    transfer (or lazy archive member) with the same content."""
+    __tablename__ = 'blob'
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+
+class DailyStats(db.Model):
+    """Activity counters of one sender on one UTC day (see stats.py)."""
+    __tablename__ = 'daily_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    sender_email = db.Column(db.String(256), primary_key=True)
+    transfers = db.Column(db.Integer, nullable=False, default=0)
+    links = db.Column(db.Integer, nullable=False, default=0)
+    uploaded_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    stored_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    downloads = db.Column(db.Integer, nullable=False, default=0)
+    downloaded_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    links_downloaded = db.Column(db.Integer, nullable=False, default=0)
+    notifications_sent = db.Column(db.Integer, nullable=False, default=0)
+    notifications_failed = db.Column(db.Integer, nullable=False, default=0)
+
+
+class OutboxMessage(db.Model):
+    """A notification email waiting to be sent, or what became of it (see
+    outbox.py). ``kind`` is 'recipient', 'sender' or 'download';
+    ``payload`` holds the JSON the message is rendered from."""
+    __tablename__ = 'email_outbox'
+    # Dispatchers look for pending rows that are due.
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_available_at', 'status', 'available_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)
+    file_id = db.Column(db.String(36), nullable=False)
+    recipient_id = db.Column(db.String(36), nullable=True)
+    to_addr = db.Column(db.String(256), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    # 'pending' until sent ('sent') or given up on ('failed').
+    status = db.Column(db.String(16), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    available_at = db.Column(db.DateTime, nullable=False)
+    last_error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+
+class SchemaMigration(db.Model):
+    """One applied schema migration (see migrations.py)."""
+    __tablename__ = 'schema_migration'
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=db.func.current_timestamp())
@@ -0,0 +1,107 @@
+"""
+Incremental multipart/form-data reader for streaming upload ingest.
+
+Going through ``request.files`` makes Werkzeug spool every file part to a
+temporary file of its own before the view runs. ``iter_parts`` walks the
+request body exactly once instead, yielding each form field as it completes
+and each file part as a readable stream, so the caller can write file data
+straight to its final destination.
+"""
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+_READ_SIZE = 64 * 1024
+
+
+class _EventSource:
+    """Feeds the sans-IO decoder from the request stream on demand."""
+
+    def __init__(self, stream, boundary: bytes):
+        self._stream = stream
+        self._decoder = MultipartDecoder(boundary)
+        self._eof = False
+
+    def next(self):
+        while True:
+            try:
+                event = self._decoder.next_event()
+            except ValueError:
+                # The decoder's answer to a body that ends mid-part.
+                raise BadRequest('Truncated multipart body')
+            if not isinstance(event, NeedData):
+                return event
+            if self._eof:
+                raise BadRequest('Truncated multipart body')
+            buf = self._stream.read(_READ_SIZE)
+            if buf:
+                self._decoder.receive_data(buf)
+            else:
+                self._eof = True
+                self._decoder.receive_data(None)
+
+    def next_data(self) -> Data:
+        event = self.next()
+        if not isinstance(event, Data):
+            raise BadRequest('Malformed multipart body')
+        return event
+
+
+class FilePart:
+    """A file part being received. ``read`` returns at most ``size`` bytes
+    (fewer whenever that is what the network delivered) and ``b''`` once the
+    part is exhausted. Must be consumed before the next part is requested;
+    ``iter_parts`` drains whatever the caller leaves unread."""
+
+    def __init__(self, source: _EventSource, name: str, filename: str, content_type: str | None):
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self._source = source
+        self._buffer = b''
+        self._done = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._buffer and not self._done:
+            event = self._source.next_data()
+            self._buffer = event.data
+            self._done = not event.more_data
+        if size is None or size < 0 or size >= len(self._buffer):
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def drain(self) -> None:
+        while self.read(_READ_SIZE):
+            pass
+
+
+def iter_parts(stream, content_type: str | None, max_field_size: int | None = None):
+    """Yield ``(name, value)`` tuples for form fields and ``FilePart``
+    objects for file parts, in body order. Raises BadRequest on a malformed
+    or truncated body and RequestEntityTooLarge on an oversized field."""
+    mimetype, options = parse_options_header(content_type or '')
+    boundary = options.get('boundary', '')
+    if mimetype != 'multipart/form-data' or not boundary:
+        raise BadRequest('Expected a multipart/form-data body')
+
+    source = _EventSource(stream, boundary.encode('latin-1'))
+    while True:
+        event = source.next()
+        if isinstance(event, Epilogue):
+            return
+        if isinstance(event, Field):
+            value = bytearray()
+            while True:
+                data = source.next_data()
+                value += data.data
+                if max_field_size is not None and len(value) > max_field_size:
+                    raise RequestEntityTooLarge()
+                if not data.more_data:
+                    break
+            yield event.name, value.decode('utf-8', 'replace')
+        elif isinstance(event, File):
+            part = FilePart(source, event.name, event.filename, event.headers.get('Content-Type'))
+            yield part
+            part.drain()
@@ -0,0 +1,126 @@
+"""
+Durable queue of notification emails.
+
+A notification is a row of ``email_outbox`` added in the same transaction
+as the event it reports: a recorded transfer, the first download of a
+link. It is therefore never lost to a worker recycled with mail still
+queued, and never sent for an upload that rolled back. The sender threads
+of the mail dispatcher (see mailer.py and _run_outbox_sender in
+routes.py) claim due rows a batch at a time, send them and record the
+outcome. A transient SMTP failure puts the row back with an exponential
+backoff.
+
+Claiming a row pushes its ``available_at`` forward by ``LEASE_SECONDS``
+instead of flagging it. A row claimed by a process that died mid-send is
+then simply due again once the lease runs out (so delivery is at least
+once, not exactly once). On MySQL/MariaDB and PostgreSQL the claim selects
+with ``FOR UPDATE SKIP LOCKED``, so concurrent senders split the due rows
+between them without waiting on each other. Elsewhere (SQLite) each row is
+claimed by a conditional UPDATE instead.
+"""
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, select, update
+
+from . import db
+from .models import OutboxMessage
+
+LEASE_SECONDS = 300
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+RETENTION_DAYS = 7
+
+_SKIP_LOCKED_DIALECTS = ('mysql', 'mariadb', 'postgresql')
+
+
+def enqueue(kind: str, file_id: str, to_addr: str, recipient_id: str | None = None, **payload) -> None:
+    """Queue a ``kind`` notification ('recipient', 'sender' or 'download')
+    about ``file_id`` for ``to_addr``, with what rendering it needs in
+    ``payload``. Must be followed by a commit."""
+    db.session.add(OutboxMessage(
+        kind=kind,
+        file_id=file_id,
+        recipient_id=recipient_id,
+        to_addr=to_addr,
+        payload=json.dumps(payload),
+        status='pending',
+        attempts=0,
+        available_at=datetime.utcnow(),
+    ))
+
+
+def claim(limit: int) -> list:
+    """Lease up to ``limit`` due messages, oldest first, and commit. Returns
+    them as dicts (``payload`` decoded, ``attempts`` counting this one)."""
+    now = datetime.utcnow()
+    due = and_(OutboxMessage.status == 'pending', OutboxMessage.available_at <= now)
+    lease = {
+        'available_at': now + timedelta(seconds=LEASE_SECONDS),
+        'attempts': OutboxMessage.attempts + 1,
+    }
+    candidates = select(OutboxMessage.id).where(due).order_by(OutboxMessage.available_at).limit(limit)
+    try:
+        if db.engine.dialect.name in _SKIP_LOCKED_DIALECTS:
+            ids = db.session.execute(candidates.with_for_update(skip_locked=True)).scalars().all()
+            if ids:
+                db.session.execute(update(OutboxMessage).where(OutboxMessage.id.in_(ids)).values(**lease))
+        else:
+            ids = [
+                message_id for message_id in db.session.execute(candidates).scalars().all()
+                if db.session.execute(
+                    update(OutboxMessage).where(OutboxMessage.id == message_id, due).values(**lease)
+                ).rowcount
+            ]
+        rows = db.session.query(
+            OutboxMessage.id, OutboxMessage.kind, OutboxMessage.file_id, OutboxMessage.recipient_id,
+            OutboxMessage.to_addr, OutboxMessage.payload, OutboxMessage.attempts, OutboxMessage.created_at,
+        ).filter(OutboxMessage.id.in_(ids)).order_by(OutboxMessage.id).all() if ids else []
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return [dict(row._mapping, payload=json.loads(row.payload)) for row in rows]
+
+
+def depth() -> dict:
+    """Messages waiting to be sent: all of them, those due now, and when
+    the oldest due one was queued."""
+    now = datetime.utcnow()
+    pending, due, oldest = db.session.query(
+        db.func.count(OutboxMessage.id),
+        db.func.sum(db.case((OutboxMessage.available_at <= now, 1), else_=0)),
+        db.func.min(db.case((OutboxMessage.available_at <= now, OutboxMessage.created_at), else_=None)),
+    ).filter(OutboxMessage.status == 'pending').one()
+    return {'pending': pending, 'due': int(due or 0), 'oldest_due_at': oldest}
+
+
+def finish(message_id: int, error: str | None = None) -> None:
+    """Record the final outcome of a message: sent, or failed with
+    ``error``. Must be followed by a commit."""
+    db.session.execute(update(OutboxMessage).where(OutboxMessage.id == message_id).values(
+        status='failed' if error else 'sent',
+        last_error=error,
+        finished_at=datetime.utcnow(),
+    ))
+
+
+def postpone(message_id: int, attempts: int, error: str) -> None:
+    """Make a message that failed transiently due again after a backoff
+    growing with its ``attempts``. Must be followed by a commit."""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    db.session.execute(update(OutboxMessage).where(OutboxMessage.id == message_id).values(
+        available_at=datetime.utcnow() + timedelta(seconds=delay),
+        last_error=error,
+    ))
+
+
+def purge(max_age_days: int = RETENTION_DAYS) -> int:
+    """Delete messages finished more than ``max_age_days`` ago. Returns the
+    number deleted."""
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    deleted = db.session.execute(
+        delete(OutboxMessage).where(OutboxMessage.status != 'pending', OutboxMessage.finished_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return deleted
@@ -0,0 +1,165 @@
+"""
+Registry of transfers that are still being received or finalised.
+
+Committed transfers are visible through the database; an upload in flight
+is not. Each one therefore keeps a small JSON snapshot at
+``UPLOAD_FOLDER/progress/<file_id>.json`` recording the bytes received so
+far, the current stage (receiving, zipping, hashing, committing), how long
+each stage took and the receive rate measured over the last interval. The
+folder is shared by every Gunicorn worker, so the admin endpoint sees
+uploads served by any of them -- including chunked sessions whose chunks
+land on different workers.
+
+Snapshots are replaced atomically (see snapshots.py) and, while bytes
+flow, rewritten at most every ``_FLUSH_INTERVAL`` seconds; a stage change
+is written immediately. A snapshot that cannot be written is skipped:
+instrumentation must never fail an upload.
+"""
+import json
+import os
+import time
+import uuid
+
+from .snapshots import expire_snapshots, write_snapshot
+
+_PROGRESS_DIR = 'progress'
+_FLUSH_INTERVAL = 0.5
+
+
+def _snapshot_path(upload_root: str, file_id: str) -> str:
+    # file_id is always a server-generated UUID; re-canonicalise it anyway
+    # so it can never carry path components.
+    return os.path.join(upload_root, _PROGRESS_DIR, f'{uuid.UUID(file_id)}.json')
+
+
+class Tracker:
+    """Progress of one transfer, as written by the worker handling it."""
+
+    def __init__(self, upload_root: str, file_id: str, kind: str, expected_bytes: int | None = None):
+        self.path = _snapshot_path(upload_root, file_id)
+        now = time.time()
+        self.state = {
+            'file_id': file_id,
+            'kind': kind,
+            'pid': os.getpid(),
+            'started_at': now,
+            'updated_at': now,
+            'stage': None,
+            'stage_started_at': None,
+            'stages': {},
+            'bytes_received': 0,
+            'expected_bytes': expected_bytes,
+            'bytes_per_second': 0.0,
+        }
+        self._flushed_at = 0.0
+        self._flushed_bytes = 0
+
+    @classmethod
+    def load(cls, upload_root: str, file_id: str, kind: str, expected_bytes: int | None = None):
+        """Pick up the snapshot another request (or worker) left for
+        ``file_id``, or start a new one."""
+        tracker = cls(upload_root, file_id, kind, expected_bytes)
+        try:
+            with open(tracker.path, 'r', encoding='utf-8') as fh:
+                tracker.state.update(json.load(fh), pid=os.getpid())
+        except (OSError, ValueError):
+            return tracker
+        tracker._flushed_at = tracker.state['updated_at']
+        tracker._flushed_bytes = tracker.state['bytes_received']
+        return tracker
+
+    def stage(self, name: str) -> None:
+        """Close the current stage and enter ``name``."""
+        now = time.time()
+        self._close_stage(now)
+        self.state['stage'] = name
+        self.state['stage_started_at'] = now
+        self._flush(now)
+
+    def add(self, nbytes: int) -> None:
+        self.set_received(self.state['bytes_received'] + nbytes)
+
+    def set_received(self, total: int) -> None:
+        self.state['bytes_received'] = total
+        now = time.time()
+        if now - self._flushed_at >= _FLUSH_INTERVAL:
+            self._flush(now)
+
+    def wrap(self, stream):
+        """Return ``stream`` with every read counted as received bytes."""
+        return _CountingReader(stream, self)
+
+    def finish(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _close_stage(self, now: float) -> None:
+        if self.state['stage'] is not None:
+            stages = self.state['stages']
+            elapsed = now - self.state['stage_started_at']
+            stages[self.state['stage']] = stages.get(self.state['stage'], 0.0) + elapsed
+
+    def _flush(self, now: float) -> None:
+        elapsed = now - self._flushed_at
+        if self._flushed_at and elapsed > 0:
+            self.state['bytes_per_second'] = (self.state['bytes_received'] - self._flushed_bytes) / elapsed
+        self.state['updated_at'] = now
+        self._flushed_at = now
+        self._flushed_bytes = self.state['bytes_received']
+        write_snapshot(self.path, self.state)
+
+
+class _CountingReader:
+    def __init__(self, stream, tracker: Tracker):
+        self._stream = stream
+        self._tracker = tracker
+
+    def read(self, size: int = -1) -> bytes:
+        buf = self._stream.read(size)
+        if buf:
+            self._tracker.add(len(buf))
+        return buf
+
+
+def discard(upload_root: str, file_id: str) -> None:
+    """Drop the snapshot of a transfer that was abandoned."""
+    try:
+        os.remove(_snapshot_path(upload_root, file_id))
+    except OSError:
+        pass
+
+
+def active(upload_root: str) -> list:
+    """Snapshots of every transfer in flight, oldest first, each with the
+    running stage's elapsed time folded into ``stages`` and the seconds
+    since it was last updated (a stalled client, or a killed worker)."""
+    directory = os.path.join(upload_root, _PROGRESS_DIR)
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    now = time.time()
+    result = []
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as fh:
+                state = json.load(fh)
+        except (OSError, ValueError):
+            continue  # finished (or being replaced) while we listed
+        if state.get('stage') is not None:
+            stages = state['stages']
+            stages[state['stage']] = stages.get(state['stage'], 0.0) + now - state['stage_started_at']
+        state['idle_seconds'] = max(0.0, now - state['updated_at'])
+        result.append(state)
+    result.sort(key=lambda s: s['started_at'])
+    return result
+
+
+def expire(upload_root: str, max_age_seconds: float) -> int:
+    """Remove snapshots not updated for ``max_age_seconds`` (left behind by
+    a worker killed mid-upload). Returns the number removed."""
+    return expire_snapshots(os.path.join(upload_root, _PROGRESS_DIR), max_age_seconds)
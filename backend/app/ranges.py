@@ -0,0 +1,103 @@
+"""
+Byte-range helpers for /download (RFC 7233).
+
+Werkzeug's own range handling covers a single range only (a multi-range
+request is answered 416). Transfers are large and immutable, so download
+managers and resumed fetches routinely ask for several ranges or for the
+tail of a file; these helpers parse any ``Range`` header, resolve it
+against the stored size and build the ``multipart/byteranges`` body when
+more than one range survives.
+"""
+import os
+import uuid
+
+from .archive import COPY_BUFSIZE
+
+# Beyond this many (coalesced) ranges the request is answered with the
+# full body, which RFC 7233 allows; it keeps a header listing thousands of
+# tiny ranges from turning into as many seeks and part headers.
+MAX_RANGES = 32
+
+
+def parse(header: str | None) -> list | None:
+    """Parse a ``Range: bytes=...`` header into ``(first, last)`` pairs as
+    sent: inclusive offsets, ``last`` None for an open end, ``first`` None
+    for a suffix of ``last`` bytes. Werkzeug's parser refuses overlapping
+    or unordered ranges, which RFC 7233 permits. Returns None for a header
+    that is absent or malformed, which is then ignored."""
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes':
+        return None
+    byte_ranges = []
+    for item in spec.split(','):
+        first, dash, last = item.strip().partition('-')
+        if not dash or not (first + last).isdigit():
+            return None
+        first = int(first) if first else None
+        last = int(last) if last else None
+        if first is not None and last is not None and last < first:
+            return None
+        byte_ranges.append((first, last))
+    return byte_ranges
+
+
+def resolve(byte_ranges, size: int) -> list:
+    """Turn parsed ranges into the sorted, coalesced ``[start, stop)``
+    ranges that can be served from ``size`` bytes. An empty list means
+    none is satisfiable."""
+    resolved = []
+    for first, last in byte_ranges:
+        if first is None:
+            start, stop = max(size - last, 0), size
+        else:
+            start, stop = first, size if last is None else min(last + 1, size)
+        if start < stop:
+            resolved.append((start, stop))
+    resolved.sort()
+    merged = []
+    for start, stop in resolved:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def iter_file(path: str, start: int, stop: int):
+    """Yield the bytes of ``path`` in ``[start, stop)``."""
+    remaining = stop - start
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        while remaining > 0:
+            buf = fh.read(min(COPY_BUFSIZE, remaining))
+            if not buf:
+                raise IOError(f"File truncated: {os.path.basename(path)}")
+            yield buf
+            remaining -= len(buf)
+
+
+def multipart_byteranges(byte_ranges, size: int, content_type: str, read_range):
+    """Body of a ``multipart/byteranges`` response for ``byte_ranges``,
+    reading each with ``read_range(start, stop)``. Returns
+    ``(content_type_header, content_length, iterator)``."""
+    boundary = uuid.uuid4().hex
+    heads = [
+        (f'--{boundary}\r\nContent-Type: {content_type}\r\n'
+         f'Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n').encode('ascii')
+        for start, stop in byte_ranges
+    ]
+    tail = f'--{boundary}--\r\n'.encode('ascii')
+    length = len(tail) + sum(
+        len(head) + (stop - start) + 2 for head, (start, stop) in zip(heads, byte_ranges)
+    )
+
+    def generate():
+        for head, (start, stop) in zip(heads, byte_ranges):
+            yield head
+            yield from read_range(start, stop)
+            yield b'\r\n'
+        yield tail
+
+    return f'multipart/byteranges; boundary={boundary}', length, generate()
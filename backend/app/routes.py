@@ -10,8 +10,11 @@ Security posture:
 * Rate limiting via in-process token bucket (no Redis dependency).
 * Recipient/sender emails are validated before any processing.
 """
-import hashlib
+import base64
+import functools
+import itertools
 import json
+import mimetypes
 import os
 import re
 import shutil
@@ -19,20 +22,30 @@ import smtplib
 import threading
 import time
 import uuid
-import zipfile
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import formataddr, formatdate, make_msgid
+from urllib.parse import quote
 import pytz
-from flask import Response, current_app, jsonify, request, send_from_directory, stream_with_context
-
-from . import app, db, email_executor
+from flask import Response, current_app, jsonify, request, send_file, stream_with_context
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.orm import defer, selectinload
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_date
+from werkzeug.wsgi import wrap_file
+
+from . import (
+    admission, app, archive, archive_executor, blobs, compression, db, job_executor, jobs, mailer,
+    multipart, outbox, progress, purge_executor, ranges, scrub, stats, transfer_cache, uploads,
+)
+from .cache import LRUCache
 from .auth import issue_token, require_auth
 from .deliverability import check_dkim, check_dmarc, check_spf
-from .models import FileUpload
-from .paths import UnsafePathError, safe_join, safe_stored_filename
+from .models import FileUpload, TransferFile, TransferRecipient
+from .paths import UnsafePathError, safe_join, safe_stored_filename, sanitize_relative_path
+from .smtp_pool import SMTPPool
 
 
 # -------------------------------------------------------------------------
@@ -80,6 +93,7 @@ _EMAIL_LOCAL  = re.compile(r'^[A-Za-z0-9._%+\-]{1,64}$')
 _EMAIL_DOMAIN = re.compile(r'^[A-Za-z0-9.\-]{1,253}$')
 _EMAIL_TLD    = re.compile(r'^[A-Za-z]{2,}$')
 _DKIM_SELECTOR = re.compile(r'^[A-Za-z0-9_\-]{1,63}$')
+_RECIPIENT_SEPARATORS = re.compile(r'[,;\s]+')
 
 
 def _valid_email(addr: str) -> bool:
@@ -111,6 +125,19 @@ def format_size(num_bytes: float) -> str:
     return f"{num_bytes:.2f} PB"
 
 
+# Files listed by name in a notification; the rest are only counted, or a
+# folder of thousands of files would make a mail of several megabytes.
+_SUMMARY_MAX_FILES = 50
+
+
+def _files_summary(files, file_count) -> str:
+    shown = files[:_SUMMARY_MAX_FILES]
+    summary = "".join(f"- {f['name']} ({format_size(f['size'])})\n" for f in shown)
+    if file_count > len(shown):
+        summary += f"- ... and {file_count - len(shown)} more\n"
+    return summary
+
+
 def _load_smtp_config():
     path = app.config['SMTP_CONFIG_PATH']
     with open(path, 'r', encoding='utf-8') as fh:
@@ -164,44 +191,77 @@ class _PermanentSMTPError(Exception):
 _SMTP_TIMEOUT = 20  # seconds; a hung connection would otherwise block a worker thread forever
 
 
-def send_email_with_smtp(msg, smtp_config) -> None:
-    """Single delivery attempt. Raises _TransientSMTPError or
-    _PermanentSMTPError on failure so callers can decide whether to retry."""
-    server = None
+def _open_smtp(smtp_config):
+    """Connect (implicit TLS on 465, STARTTLS otherwise) and log in."""
+    port = int(smtp_config['smtp_port'])
+    if port == 465:
+        server = smtplib.SMTP_SSL(smtp_config['smtp_server'], port, timeout=_SMTP_TIMEOUT)
+    else:
+        server = smtplib.SMTP(smtp_config['smtp_server'], port, timeout=_SMTP_TIMEOUT)
     try:
-        port = int(smtp_config['smtp_port'])
-        if port == 465:
-            server = smtplib.SMTP_SSL(smtp_config['smtp_server'], port, timeout=_SMTP_TIMEOUT)
-        else:
-            server = smtplib.SMTP(smtp_config['smtp_server'], port, timeout=_SMTP_TIMEOUT)
+        if port != 465:
             server.starttls()
         server.login(smtp_config['smtp_user'], smtp_config['smtp_password'])
-        server.send_message(msg)
-    except (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused) as e:
-        raise _PermanentSMTPError(str(e)) from e
-    except smtplib.SMTPResponseException as e:
+    except Exception:
+        _close_smtp(server)
+        raise
+    return server
+
+
+def _close_smtp(server) -> None:
+    try:
+        server.quit()
+    except Exception:
+        pass
+
+
+# Sessions the mail dispatcher's sender threads reuse across batches, one
+# per thread. The SMTP test endpoint keeps opening a fresh connection: it
+# exists to check the login.
+_smtp_pool = SMTPPool(
+    _open_smtp,
+    size=app.config['MAIL_CONCURRENCY'],
+    idle_timeout=app.config['SMTP_POOL_IDLE_TIMEOUT'],
+    max_messages=app.config['SMTP_POOL_MAX_MESSAGES'],
+)
+_send_rate = mailer.RateLimiter(app.config['MAIL_RATE_PER_MINUTE'], app.config['MAIL_BURST'])
+_mail_metrics = mailer.Metrics(app.config['MAIL_CONCURRENCY'], app.config['MAIL_RATE_PER_MINUTE'])
+
+
+def _classify_smtp_error(e: Exception) -> Exception:
+    """Map a failure to _TransientSMTPError or _PermanentSMTPError."""
+    if isinstance(e, (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused)):
+        return _PermanentSMTPError(str(e))
+    if isinstance(e, smtplib.SMTPResponseException):
         # 4xx = temporary failure (greylisting, rate limit) -> retry.
         # 5xx = permanent failure (policy reject, bad address) -> don't.
         if 400 <= e.smtp_code < 500:
-            raise _TransientSMTPError(f"SMTP {e.smtp_code}: {e.smtp_error}") from e
-        raise _PermanentSMTPError(f"SMTP {e.smtp_code}: {e.smtp_error}") from e
-    except (smtplib.SMTPServerDisconnected, ConnectionError, OSError) as e:
+            return _TransientSMTPError(f"SMTP {e.smtp_code}: {e.smtp_error}")
+        return _PermanentSMTPError(f"SMTP {e.smtp_code}: {e.smtp_error}")
+    if isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError, OSError)):
         # Pure connectivity failures (refused/unreachable/timed out) with no
         # SMTP response to classify -- always worth retrying. Note:
         # SMTPConnectError *is* a SMTPResponseException (it fires after a
         # non-220 banner) so it's already handled by the code-based branch
         # above, not here.
-        raise _TransientSMTPError(str(e)) from e
+        return _TransientSMTPError(str(e))
+    # Unclassified failure: treat as permanent rather than retry-looping
+    # on something that is more likely a bug than a transient blip.
+    return _PermanentSMTPError(str(e))
+
+
+def send_email_with_smtp(msg, smtp_config) -> None:
+    """Single delivery attempt. Raises _TransientSMTPError or
+    _PermanentSMTPError on failure so callers can decide whether to retry."""
+    server = None
+    try:
+        server = _open_smtp(smtp_config)
+        server.send_message(msg)
     except Exception as e:
-        # Unclassified failure: treat as permanent rather than retry-looping
-        # on something that is more likely a bug than a transient blip.
-        raise _PermanentSMTPError(str(e)) from e
+        raise _classify_smtp_error(e) from e
     finally:
         if server:
-            try:
-                server.quit()
-            except Exception:
-                pass
+            _close_smtp(server)
 
 
 def send_email_with_retry(msg, smtp_config, max_attempts: int = 3) -> tuple[bool, str | None]:
@@ -227,6 +287,36 @@ def send_email_with_retry(msg, smtp_config, max_attempts: int = 3) -> tuple[bool
     return False, last_error
 
 
+def send_batch(messages, smtp_config) -> list:
+    """One delivery attempt for ``messages`` over a pooled SMTP session, at
+    the pace the account's send rate allows. A message the server rejects
+    fails on its own without disturbing the rest of the batch; a
+    connection-level failure fails every message not sent yet. Returns one
+    (success, error, transient) triple per message, ``transient`` telling
+    whether a later attempt might succeed."""
+    results = [None] * len(messages)
+    if not messages:
+        return results
+    try:
+        with _smtp_pool.session(smtp_config) as session:
+            for i, msg in enumerate(messages):
+                _send_rate.take(smtp_config)
+                started = time.monotonic()
+                try:
+                    session.send(msg)
+                    results[i] = (True, None, False)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                    error = _classify_smtp_error(e)
+                    results[i] = (False, str(error)[:500], isinstance(error, _TransientSMTPError))
+                _mail_metrics.record_send(time.monotonic() - started, results[i][0])
+    except Exception as e:
+        error = _classify_smtp_error(e)
+        app.logger.warning("SMTP session failed: %s", error)
+        failure = (False, str(error)[:500], isinstance(error, _TransientSMTPError))
+        results = [result or failure for result in results]
+    return results
+
+
 def get_backend_url() -> str:
     backend_url = os.environ.get('BACKEND_URL')
     if backend_url:
@@ -287,150 +377,260 @@ def create_email_template(title, message, file_summary, total_size, download_lin
     return html, text
 
 
-def _send_recipient_notification(recipient_email, file_id, files_summary, total_size, smtp_config, sender_email):
-    """Build and send the recipient notification. Returns (success, error)."""
-    try:
-        file_info = FileUpload.query.get(file_id)
-        if not file_info:
-            return False, "transfer not found"
-        tz = pytz.timezone(app.config.get('TIMEZONE', 'Europe/Paris'))
-        expiration_formatted = file_info.expires_at.astimezone(tz).strftime('%d/%m/%Y at %H:%M:%S')
-        frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:3500').rstrip('/')
-        download_page_link = f"{frontend_url}/download/{file_id}"
-        title = "You have received files"
-        message = (
-            f"{sender_email} sent you files. Click the button below "
-            f"to access the download page.<br><br>"
-            f"This link will expire on {expiration_formatted}"
-        )
-        html, text = create_email_template(
-            title, message, files_summary, total_size, download_page_link,
-            sender_domain=_sender_domain(smtp_config),
-        )
-        msg = _build_message(smtp_config, recipient_email,
-                             f"{sender_email} sent you files",
-                             text, html, reply_to=sender_email)
-        return send_email_with_retry(msg, smtp_config)
-    except Exception:
-        app.logger.exception("Failed to prepare recipient notification")
-        return False, "internal error"
+def _build_recipient_notification(message, smtp_config):
+    """The notification telling a recipient about their download link."""
+    payload = message['payload']
+    sender_email = payload['sender_email']
+    tz = pytz.timezone(app.config.get('TIMEZONE', 'Europe/Paris'))
+    expiration_formatted = (
+        datetime.fromisoformat(payload['expires_at']).astimezone(tz).strftime('%d/%m/%Y at %H:%M:%S')
+    )
+    frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:3500').rstrip('/')
+    title = "You have received files"
+    text_message = (
+        f"{sender_email} sent you files. Click the button below "
+        f"to access the download page.<br><br>"
+        f"This link will expire on {expiration_formatted}"
+    )
+    html, text = create_email_template(
+        title, text_message, payload['files_summary'], payload['total_size'],
+        f"{frontend_url}/download/{message['recipient_id']}",
+        sender_domain=_sender_domain(smtp_config),
+    )
+    return _build_message(smtp_config, message['to_addr'], f"{sender_email} sent you files",
+                          text, html, reply_to=sender_email)
+
+
+def _build_sender_confirmation(message, smtp_config):
+    """The confirmation sent to the sender of a transfer."""
+    payload = message['payload']
+    frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:3500').rstrip('/')
+    download_page_link = f"{frontend_url}/download/{message['file_id']}"
+    title = "Your files have been sent"
+    text_message = (
+        f"Your files have been sent to: {payload['recipient_email']}<br><br>"
+        f"Download page: {download_page_link}"
+    )
+    html, text = create_email_template(
+        title, text_message, payload['files_summary'], payload['total_size'],
+        sender_domain=_sender_domain(smtp_config),
+    )
+    return _build_message(smtp_config, message['to_addr'],
+                          f"Transfer confirmation to {payload['recipient_email']}", text, html)
 
 
-def _send_sender_confirmation(sender_email, file_id, files_list, total_size, smtp_config, recipient_email):
-    """Build and send the sender confirmation. Returns (success, error)."""
-    try:
-        frontend_url = os.environ.get('FRONTEND_URL', 'http://localhost:3500').rstrip('/')
-        download_page_link = f"{frontend_url}/download/{file_id}"
-        files_summary = "".join(f"- {f['name']} ({format_size(f['size'])})\n" for f in files_list)
-        title = "Your files have been sent"
-        message = (
-            f"Your files have been sent to: {recipient_email}<br><br>"
-            f"Download page: {download_page_link}"
-        )
-        html, text = create_email_template(
-            title, message, files_summary, total_size,
-            sender_domain=_sender_domain(smtp_config),
-        )
-        msg = _build_message(smtp_config, sender_email,
-                             f"Transfer confirmation to {recipient_email}",
-                             text, html)
-        return send_email_with_retry(msg, smtp_config)
-    except Exception:
-        app.logger.exception("Failed to prepare sender confirmation")
-        return False, "internal error"
-
-
-def _send_download_notification(sender_email, file_id, smtp_config):
-    """Build and send the download notification. Returns (success, error)."""
-    try:
-        tz = pytz.timezone(app.config.get('TIMEZONE', 'Europe/Paris'))
-        download_time = datetime.now(tz).strftime('%d/%m/%Y at %H:%M:%S (%Z)')
-        file_info = FileUpload.query.get(file_id)
-        if not file_info:
-            return False, "transfer not found"
-        files_list = file_info.get_files_list()
-        if files_list:
-            total = sum(f['size'] for f in files_list)
-            files_summary = "".join(f"- {f['name']} ({format_size(f['size'])})\n" for f in files_list)
-            total_formatted = format_size(total)
-        else:
-            stored_name = safe_stored_filename(file_info.filename)
-            stored_path = safe_join(app.config['UPLOAD_FOLDER'], stored_name)
-            size = os.path.getsize(stored_path)
-            files_summary = f"- {stored_name} ({format_size(size)})"
-            total_formatted = format_size(size)
-        title = "Your files have been downloaded"
-        message = f"Your files were downloaded on {download_time}."
-        html, text = create_email_template(
-            title, message, files_summary, total_formatted,
-            sender_domain=_sender_domain(smtp_config),
-        )
-        msg = _build_message(smtp_config, sender_email,
-                             "Your files have been downloaded", text, html)
-        return send_email_with_retry(msg, smtp_config)
-    except Exception:
-        app.logger.exception("Failed to prepare download notification")
-        return False, "internal error"
+def _build_download_notification(message, smtp_config):
+    """The notification telling the sender a link was first downloaded."""
+    file_id = message['file_id']
+    tz = pytz.timezone(app.config.get('TIMEZONE', 'Europe/Paris'))
+    download_time = (
+        datetime.fromisoformat(message['payload']['downloaded_at'])
+        .replace(tzinfo=timezone.utc).astimezone(tz).strftime('%d/%m/%Y at %H:%M:%S (%Z)')
+    )
+    file_info = FileUpload.query.get(file_id)
+    files = _transfer_files(file_id, 0, _SUMMARY_MAX_FILES)
+    if files:
+        file_count, total = _transfer_totals(file_info)
+        files_summary = _files_summary(files, file_count)
+        total_formatted = format_size(total)
+    else:
+        stored_name = safe_stored_filename(file_info.filename)
+        stored_path = blobs.stored_path(app.config['UPLOAD_FOLDER'], file_info)
+        size = os.path.getsize(stored_path)
+        files_summary = f"- {stored_name} ({format_size(size)})"
+        total_formatted = format_size(size)
+    recipient = TransferRecipient.query.get(message['recipient_id']) if message['recipient_id'] else None
+    title = "Your files have been downloaded"
+    downloaded_by = f" by {recipient.email}" if recipient else ""
+    text_message = f"Your files were downloaded{downloaded_by} on {download_time}."
+    html, text = create_email_template(
+        title, text_message, files_summary, total_formatted,
+        sender_domain=_sender_domain(smtp_config),
+    )
+    return _build_message(smtp_config, message['to_addr'], "Your files have been downloaded", text, html)
+
+
+_NOTIFICATION_BUILDERS = {
+    'recipient': _build_recipient_notification,
+    'sender': _build_sender_confirmation,
+    'download': _build_download_notification,
+}
 
 
 # -------------------------------------------------------------------------
-# Background notification tasks
+# Notification dispatcher
 #
-# Submitted to `email_executor` instead of being called inline from the
-# request handlers, so a slow/unreachable SMTP server no longer delays the
-# upload/download HTTP response. Each task runs outside the request
-# context, so it must push its own app context to use app.logger/app.config
-# and the DB session, and must call db.session.remove() at the end since
-# the executor's worker threads are reused across many tasks (Flask-
-# SQLAlchemy's scoped session is keyed by thread id).
+# Notifications are queued in the database (see outbox.py) by the request
+# that records their event, so a slow/unreachable SMTP server never delays
+# the upload/download HTTP response. Every worker starts a dispatcher
+# thread (see __init__.py), but only the one that wins the mail lock (see
+# mailer.py) sends; the others just keep retrying the lock. Its sender
+# threads work outside any request, so each pass pushes its own app
+# context and calls db.session.remove() when done. _outbox_wakeup only
+# reaches the senders of its own process: a notification queued in the
+# dispatcher's worker goes out at once, one queued in any other worker
+# waits for the next poll, up to OUTBOX_POLL_SECONDS.
 # -------------------------------------------------------------------------
-def _send_recipient_notification_task(file_id, recipient_email, files_summary, total_size, smtp_config, sender_email):
-    with app.app_context():
-        try:
-            success, error = _send_recipient_notification(
-                recipient_email, file_id, files_summary, total_size, smtp_config, sender_email
-            )
-            record = FileUpload.query.get(file_id)
-            if record:
-                record.notification_status_recipient = 'sent' if success else 'failed'
-                record.notification_error_recipient = error
-                db.session.commit()
-        except Exception:
-            app.logger.exception("Recipient notification task failed for %s", file_id)
-        finally:
-            db.session.remove()
+_outbox_wakeup = threading.Event()
+
+
+def _summarize_recipient_notifications(file_id) -> None:
+    """Transfer-level summary of the recipient notifications, as shown for
+    single-recipient rows, once none of them is pending any more."""
+    rows = (
+        db.session.query(TransferRecipient.notification_status, TransferRecipient.notification_error)
+        .filter(TransferRecipient.file_id == file_id)
+        .order_by(TransferRecipient.position)
+        .with_for_update()
+        .all()
+    )
+    if not rows or any(status == 'pending' for status, _ in rows):
+        return
+    errors = [error for status, error in rows if status == 'failed']
+    db.session.execute(update(FileUpload).where(FileUpload.id == file_id).values(
+        notification_status_recipient='failed' if errors else 'sent',
+        notification_error_recipient=(
+            f"{len(errors)}/{len(rows)} failed: {errors[0]}"[:500] if errors else None
+        ),
+    ))
+
+
+def _record_notification_outcomes(finished) -> None:
+    """Copy what became of each ``(message, success, error)`` to the status
+    columns of its transfer and recipient, and count it. Rows are locked a
+    transfer at a time in id order, and daily_stats last, so two
+    dispatchers finishing notifications of the same transfers never
+    deadlock."""
+    counts = defaultdict(lambda: [0, 0])
+    finished = sorted(finished, key=lambda item: item[0]['file_id'])
+    for file_id, group in itertools.groupby(finished, key=lambda item: item[0]['file_id']):
+        db.session.execute(select(FileUpload.id).where(FileUpload.id == file_id).with_for_update())
+        summarize = False
+        for message, success, error in group:
+            counts[message['payload']['sender_email']][0 if success else 1] += 1
+            status = 'sent' if success else 'failed'
+            recipient = TransferRecipient.id == message['recipient_id']
+            if message['kind'] == 'recipient':
+                db.session.execute(update(TransferRecipient).where(recipient).values(
+                    notification_status=status, notification_error=error,
+                ))
+                summarize = True
+            elif message['kind'] == 'sender':
+                db.session.execute(update(FileUpload).where(FileUpload.id == file_id).values(
+                    notification_status_sender=status, notification_error_sender=error,
+                ))
+            else:
+                if message['recipient_id']:
+                    db.session.execute(update(TransferRecipient).where(recipient).values(
+                        notification_status_download=status, notification_error_download=error,
+                    ))
+                db.session.execute(update(FileUpload).where(FileUpload.id == file_id).values(
+                    notification_status_download=status, notification_error_download=error,
+                ))
+        if summarize:
+            _summarize_recipient_notifications(file_id)
+    for sender_email in sorted(counts):
+        sent, failed = counts[sender_email]
+        stats.bump(sender_email, notifications_sent=sent, notifications_failed=failed)
+
+
+def _dispatch_outbox() -> int:
+    """Send one batch of due notifications over a pooled SMTP session and
+    record what became of them. Returns the number of messages claimed."""
+    limit = app.config['OUTBOX_BATCH_SIZE']
+    if app.config['MAIL_RATE_PER_MINUTE'] > 0:
+        # The sender threads share the account's token bucket, so between
+        # them their batches hold no more than a minute of sending: a slow
+        # send rate cannot outlast the lease on messages waiting their turn.
+        share = app.config['MAIL_RATE_PER_MINUTE'] / app.config['MAIL_CONCURRENCY']
+        limit = min(limit, max(1, int(share)))
+    messages = outbox.claim(limit)
+    if not messages:
+        return 0
+    try:
+        smtp_config = _load_smtp_config()
+    except FileNotFoundError:
+        app.logger.error("SMTP config missing; %d notification(s) not sent", len(messages))
+        results = [(False, 'SMTP not configured', False)] * len(messages)
+    else:
+        results = [None] * len(messages)
+        live = {row.id for row in db.session.query(FileUpload.id).filter(
+            FileUpload.id.in_({message['file_id'] for message in messages})
+        )}
+        built = []
+        for i, message in enumerate(messages):
+            if message['file_id'] not in live:
+                results[i] = (False, 'transfer not found', False)
+                continue
+            try:
+                built.append((i, _NOTIFICATION_BUILDERS[message['kind']](message, smtp_config)))
+            except Exception:
+                app.logger.exception("Failed to prepare notification %d", message['id'])
+                results[i] = (False, 'internal error', False)
+        # No transaction stays open while the SMTP server takes its time.
+        db.session.commit()
+        for (i, _), result in zip(built, send_batch([msg for _, msg in built], smtp_config)):
+            results[i] = result
+        now = datetime.utcnow()
+        for message, (success, _, _) in zip(messages, results):
+            if success:
+                _mail_metrics.record_delivery((now - message['created_at']).total_seconds())
+
+    finished = []
+    try:
+        for message, (success, error, transient) in zip(messages, results):
+            if not success and transient and message['attempts'] < app.config['OUTBOX_MAX_ATTEMPTS']:
+                app.logger.warning(
+                    "Notification %d failed (attempt %d/%d), will retry: %s",
+                    message['id'], message['attempts'], app.config['OUTBOX_MAX_ATTEMPTS'], error,
+                )
+                outbox.postpone(message['id'], message['attempts'], error)
+            else:
+                outbox.finish(message['id'], None if success else error)
+                finished.append((message, success, error))
+        _record_notification_outcomes(finished)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(messages)
 
 
-def _send_sender_confirmation_task(file_id, sender_email, files_list, total_size, smtp_config, recipient_email):
-    with app.app_context():
-        try:
-            success, error = _send_sender_confirmation(
-                sender_email, file_id, files_list, total_size, smtp_config, recipient_email
-            )
-            record = FileUpload.query.get(file_id)
-            if record:
-                record.notification_status_sender = 'sent' if success else 'failed'
-                record.notification_error_sender = error
-                db.session.commit()
-        except Exception:
-            app.logger.exception("Sender confirmation task failed for %s", file_id)
-        finally:
-            db.session.remove()
+def _run_outbox_sender() -> None:
+    while True:
+        _outbox_wakeup.clear()
+        claimed = 0
+        with app.app_context():
+            try:
+                claimed = _dispatch_outbox()
+            except Exception:
+                app.logger.exception("Notification dispatch failed")
+            finally:
+                db.session.remove()
+        if not claimed:
+            _outbox_wakeup.wait(app.config['OUTBOX_POLL_SECONDS'])
 
 
-def _send_download_notification_task(file_id, sender_email, smtp_config):
-    with app.app_context():
-        try:
-            success, error = _send_download_notification(sender_email, file_id, smtp_config)
-            record = FileUpload.query.get(file_id)
-            if record:
-                record.notification_status_download = 'sent' if success else 'failed'
-                record.notification_error_download = error
-                db.session.commit()
-        except Exception:
-            app.logger.exception("Download notification task failed for %s", file_id)
-        finally:
-            db.session.remove()
+_MAIL_LOCK_RETRY = 30  # seconds between attempts to become the mail dispatcher
+
+
+def _run_outbox_dispatcher() -> None:
+    """Wait to become the deployment's mail dispatcher (see mailer.py),
+    then send with MAIL_CONCURRENCY sender threads for the life of the
+    process, refreshing the status snapshot in between."""
+    upload_root = app.config['UPLOAD_FOLDER']
+    lock_fh = mailer.try_lock(upload_root)
+    while lock_fh is None:
+        time.sleep(_MAIL_LOCK_RETRY)
+        lock_fh = mailer.try_lock(upload_root)
+    app.logger.info("Worker %d is now the mail dispatcher", os.getpid())
+    _mail_metrics.start()
+    for number in range(1, app.config['MAIL_CONCURRENCY'] + 1):
+        threading.Thread(target=_run_outbox_sender, daemon=True, name=f'itransfer-mail-{number}').start()
+    while True:
+        _smtp_pool.prune()
+        _mail_metrics.save(upload_root)
+        time.sleep(app.config['OUTBOX_POLL_SECONDS'])
 
 
 # -------------------------------------------------------------------------
@@ -459,6 +659,466 @@ def login():
     return jsonify({'error': 'Invalid credentials'}), 401
 
 
+def _parse_expiration_days(raw) -> int:
+    try:
+        expiration_days = int(raw if raw is not None else 7)
+    except (TypeError, ValueError):
+        expiration_days = 7
+    if expiration_days not in (3, 5, 7, 10):
+        expiration_days = 7
+    return expiration_days
+
+
+def _validate_files_list(files_list) -> str | None:
+    """Return an error message if the client-declared manifest is unusable."""
+    if not files_list or not isinstance(files_list, list):
+        return 'Empty files_list'
+    for entry in files_list:
+        if not isinstance(entry, dict) or not isinstance(entry.get('name'), str):
+            return 'Invalid files_list payload'
+        try:
+            if int(entry.get('size', 0)) < 0:
+                return 'Invalid files_list payload'
+        except (TypeError, ValueError):
+            return 'Invalid files_list payload'
+    return None
+
+
+def _parse_recipients(raw) -> tuple[list, str | None]:
+    """Turn a recipient field -- one address, a comma/semicolon/whitespace
+    separated string, or a JSON list -- into unique addresses in the order
+    given. Returns ``(recipients, error_message_or_None)``."""
+    if isinstance(raw, str):
+        raw = _RECIPIENT_SEPARATORS.split(raw)
+    if not isinstance(raw, list):
+        return [], 'Invalid recipient email address'
+    recipients, seen = [], set()
+    for addr in raw:
+        if not isinstance(addr, str):
+            return [], 'Invalid recipient email address'
+        addr = addr.strip()
+        if not addr:
+            continue
+        if not _valid_email(addr):
+            return [], 'Invalid recipient email address'
+        if addr.lower() not in seen:
+            seen.add(addr.lower())
+            recipients.append(addr)
+    if not recipients:
+        return [], 'Invalid recipient email address'
+    if len(recipients) > app.config['MAX_RECIPIENTS']:
+        return [], 'Too many recipients'
+    return recipients, None
+
+
+def _queue_upload_notifications(record, files) -> None:
+    """Queue the recipient notifications and the sender confirmation of a
+    transfer, in the transaction that records it."""
+    payload = {
+        'sender_email': record.sender_email,
+        'files_summary': _files_summary(files, record.file_count),
+        'total_size': format_size(record.total_size),
+    }
+    record.notification_status_recipient = 'pending'
+    record.notification_status_sender = 'pending'
+    for row in record.recipients:
+        row.notification_status = 'pending'
+        outbox.enqueue(
+            'recipient', record.id, row.email, recipient_id=row.id,
+            expires_at=record.expires_at.isoformat(), **payload,
+        )
+    outbox.enqueue(
+        'sender', record.id, record.sender_email,
+        recipient_email=", ".join(row.email for row in record.recipients), **payload,
+    )
+
+
+def _archive_filename(file_id) -> str:
+    date_str = datetime.utcnow().strftime("%y%m%d%H%M%S")
+    return f"iTransfer_{date_str}_{file_id[:8]}.zip"
+
+
+def _needs_zip(relative_paths) -> bool:
+    return len(relative_paths) > 1 or any('/' in p for p in relative_paths)
+
+
+_TRANSFER_FILE_BATCH = 1000
+
+
+def _record_transfer(file_id, final_filename, file_hash, files, recipients, sender_email,
+                     expiration_days, tracker, compression_stats=None, blob_sources=(), blob_sha256=None):
+    """Commit the FileUpload row, with one TransferRecipient per address in
+    ``recipients`` (all sharing the one stored file) and one TransferFile
+    per entry of ``files`` (``name``, ``size``, ``offset``, ``sha256``, as
+    ``archive.ZipBuilder.members`` lists them), and queue the upload
+    notifications.
+    ``blob_sources`` lists ``(staged path, sha256)`` pairs added to the
+    blob store in the same transaction; the staged files are removed once
+    it has committed (left in place if it fails); ``blob_sha256`` names the one that
+    is the transfer's stored file (lazy archives reference theirs from the
+    manifest instead). ``compression_stats`` is set for zipped transfers
+    only."""
+    total_size = sum(f['size'] for f in files)
+
+    record = FileUpload(
+        id=file_id,
+        filename=final_filename,
+        email=recipients[0],
+        sender_email=sender_email,
+        encrypted_data=file_hash,
+        downloaded=False,
+        expires_at=datetime.utcnow() + timedelta(days=expiration_days),
+    )
+    record.recipients = [
+        TransferRecipient(id=str(uuid.uuid4()), position=position, email=addr)
+        for position, addr in enumerate(recipients)
+    ]
+    if compression_stats is not None:
+        record.compression_input_bytes = compression_stats.input_bytes
+        record.compression_saved_bytes = compression_stats.saved_bytes
+        record.compression_cpu_seconds = compression_stats.cpu_seconds
+    record.blob_sha256 = blob_sha256
+    record.file_count = len(files)
+    record.total_size = total_size
+    if blob_sha256:
+        stored_path = next(path for path, sha256 in blob_sources if sha256 == blob_sha256)
+    else:
+        stored_path = safe_join(app.config['UPLOAD_FOLDER'], final_filename)
+    record.stored_size = blobs.download_size(app.config['UPLOAD_FOLDER'], stored_path)
+    tracker.stage('committing')
+    created = []
+    try:
+        for path, sha256 in blob_sources:
+            blob = blobs.acquire(app.config['UPLOAD_FOLDER'], sha256, path)
+            if blob:
+                created.append(blob)
+        db.session.add(record)
+        db.session.flush()
+        stats.bump(
+            sender_email, transfers=1, links=len(recipients),
+            uploaded_bytes=total_size, stored_bytes=record.stored_size,
+        )
+        # Executemany in slices: a folder of tens of thousands of files is
+        # a few round trips, not one INSERT per file.
+        for start in range(0, len(files), _TRANSFER_FILE_BATCH):
+            db.session.execute(insert(TransferFile), [{
+                'file_id': file_id,
+                'position': position,
+                'name': f['name'],
+                'size': f['size'],
+                'archive_offset': f['offset'],
+                'sha256': f['sha256'],
+            } for position, f in enumerate(files[start:start + _TRANSFER_FILE_BATCH], start)])
+        _queue_upload_notifications(record, files)
+        db.session.commit()
+    except Exception:
+        blobs.abandon(created)
+        db.session.rollback()
+        raise
+    # The transfer is recorded and its blobs are in the store: a staged copy
+    # that cannot be removed is only wasted space, not a failed upload.
+    for path, sha256 in blob_sources:
+        try:
+            blobs.discard_staged(path)
+        except OSError:
+            app.logger.warning("Could not remove staged file %s of transfer %s", path, file_id, exc_info=True)
+
+    _outbox_wakeup.set()
+    return record
+
+
+def _lazy_members(stored_path) -> list:
+    """``files`` for ``_record_transfer`` of the lazy archive at ``stored_path``."""
+    return archive.StoredZip(
+        stored_path, functools.partial(blobs.blob_path, app.config['UPLOAD_FOLDER']),
+    ).members
+
+
+def _part_path(file_id) -> str:
+    """Staging path for a stored file being written (single file or zip)
+    before it moves into the blob store."""
+    temp_root = os.path.join(app.config['UPLOAD_FOLDER'], 'temp')
+    os.makedirs(temp_root, exist_ok=True)
+    return os.path.join(temp_root, f'{file_id}.part')
+
+
+def _remove_partial(path) -> None:
+    """Delete a half-written ``.part`` file or lazy archive directory."""
+    if not path or not os.path.exists(path):
+        return
+    try:
+        if archive.is_lazy(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def _zip_builder(writer):
+    return archive.ZipBuilder(
+        writer,
+        archive_executor,
+        compression.CompressionPolicy.from_config(app.config),
+        max_pending=2 * app.config['ARCHIVE_WORKERS'],
+    )
+
+
+def _reserve_space(file_id, nbytes) -> None:
+    admission.reserve(
+        app.config['UPLOAD_FOLDER'], file_id, nbytes,
+        app.config['UPLOAD_MIN_FREE_BYTES'], app.config['UPLOAD_SESSION_TTL_HOURS'] * 3600,
+    )
+
+
+# Seconds an upload whose body has fully arrived waits for a finalize slot
+# before giving up with 503.
+_FINALIZE_SLOT_WAIT = 60
+
+
+def _finalize_slot(wait: float = 0.0):
+    return admission.finalize_slot(app.config['UPLOAD_FOLDER'], app.config['FINALIZE_MAX_CONCURRENT'], wait)
+
+
+def _admission_refused(e: admission.AdmissionError):
+    return jsonify({'error': str(e)}), e.status, {'Retry-After': str(app.config['ADMISSION_RETRY_AFTER'])}
+
+
+def _finalize_transfer(file_id, file_list, recipients, sender_email, expiration_days, tracker):
+    """Package staged files into their stored form, record the transfer and
+    dispatch notifications. Shared by buffered uploads and chunked upload
+    sessions; ``file_list`` holds the staged files (``relative``, ``size``,
+    ``abs``), in the order they were declared. The caller owns
+    (and removes) the staging directory; ``tracker`` is the transfer's
+    progress.Tracker. Every byte has arrived by now, so packaging waits
+    for a finalize slot rather than throwing the upload away."""
+    upload_root = app.config['UPLOAD_FOLDER']
+
+    if not _needs_zip([f['relative'] for f in file_list]):
+        only = file_list[0]
+        # Hashed while it was saved when the bytes arrived in order;
+        # chunked sessions write out of order and are hashed here.
+        file_hash = only.get('sha256')
+        if not file_hash:
+            with _finalize_slot(wait=_FINALIZE_SLOT_WAIT):
+                tracker.stage('hashing')
+                file_hash = archive.sha256_file(only['abs'])
+        files = [{'name': only['relative'], 'size': only['size'], 'offset': None, 'sha256': file_hash}]
+        return _record_transfer(
+            file_id, safe_stored_filename(only['relative']), file_hash, files,
+            recipients, sender_email, expiration_days, tracker,
+            blob_sources=[(only['abs'], file_hash)], blob_sha256=file_hash,
+        )
+
+    final_filename = _archive_filename(file_id)
+    partial = None
+    try:
+        if app.config['ARCHIVE_MODE'] == 'lazy':
+            partial = safe_join(upload_root, final_filename)
+            with _finalize_slot(wait=_FINALIZE_SLOT_WAIT):
+                tracker.stage('hashing')
+                file_hash = archive.store_lazy(partial, file_list)
+            return _record_transfer(
+                file_id, final_filename, file_hash, _lazy_members(partial),
+                recipients, sender_email, expiration_days, tracker,
+                blob_sources=[(entry['abs'], entry['sha256']) for entry in file_list],
+            )
+
+        partial = _part_path(file_id)
+        with _finalize_slot(wait=_FINALIZE_SLOT_WAIT), open(partial, 'wb') as fh:
+            tracker.stage('zipping')
+            writer = archive.HashingWriter(fh)
+            builder = _zip_builder(writer)
+            for entry in file_list:
+                with open(entry['abs'], 'rb') as src:
+                    builder.add(entry['relative'], src)
+            stats = builder.close()
+        file_hash = writer.hexdigest()
+        return _record_transfer(
+            file_id, final_filename, file_hash, builder.members(),
+            recipients, sender_email, expiration_days, tracker, stats,
+            blob_sources=[(partial, file_hash)], blob_sha256=file_hash,
+        )
+    except Exception:
+        _remove_partial(partial)
+        raise
+
+
+def _copy_stream(src, dst) -> int:
+    written = 0
+    while True:
+        buf = src.read(archive.COPY_BUFSIZE)
+        if not buf:
+            return written
+        dst.write(buf)
+        written += len(buf)
+
+
+def _streaming_upload():
+    """Streaming ingest for /upload: walk the multipart body once and write
+    each file part straight into the final archive or, for a single file,
+    to its final stored path (lazy archive members go to a staging
+    directory and are renamed into place). Werkzeug never spools the parts,
+    so each uploaded byte is written once.
+
+    Form fields must precede the file parts (browsers and ``curl -F`` keep
+    the order they were appended in). A file's relative path is the
+    matching ``paths[]`` value if it was sent before the file, otherwise
+    the matching ``files_list`` entry; either way it goes through
+    ``safe_join`` before it is used.
+    """
+    upload_root = app.config['UPLOAD_FOLDER']
+    file_id = str(uuid.uuid4())
+    # Part names are validated against this root; only lazy archives
+    # actually write members under it.
+    staging_root = os.path.join(upload_root, 'temp', file_id)
+    tracker = progress.Tracker(upload_root, file_id, 'upload', request.content_length)
+    tracker.stage('receiving')
+
+    fields = defaultdict(list)
+    files_list = None
+    file_index = 0
+    stored = []
+    part_path = lazy_path = None
+    out_fh = writer = builder = stats = None
+    lazy = reserved = False
+    success = False
+    try:
+        for part in multipart.iter_parts(
+            tracker.wrap(request.stream), request.content_type, app.config.get('MAX_FORM_MEMORY_SIZE'),
+        ):
+            if not isinstance(part, multipart.FilePart):
+                name, value = part
+                fields[name].append(value)
+                continue
+            if part.name != 'files[]':
+                continue
+            index = file_index
+            file_index += 1
+            if not part.filename:
+                continue
+
+            if files_list is None:
+                # First file: everything needed to validate the request and
+                # pick the output format must have arrived by now.
+                recipients, error = _parse_recipients(','.join(fields['email']))
+                sender_email = (fields['sender_email'][-1] if fields['sender_email'] else '').strip()
+                if error:
+                    return jsonify({'error': error}), 400
+                if not _valid_email(sender_email):
+                    return jsonify({'error': 'Invalid sender email address'}), 400
+                expiration_days = _parse_expiration_days(
+                    fields['expiration_days'][-1] if fields['expiration_days'] else None
+                )
+                try:
+                    files_list = json.loads(fields['files_list'][-1] if fields['files_list'] else '[]')
+                except json.JSONDecodeError:
+                    return jsonify({'error': 'Invalid files_list payload'}), 400
+                error = _validate_files_list(files_list)
+                if error:
+                    return jsonify({'error': error}), 400
+
+                zipped = _needs_zip([sanitize_relative_path(f['name']) for f in files_list])
+                lazy = zipped and app.config['ARCHIVE_MODE'] == 'lazy'
+                _reserve_space(file_id, admission.projected_bytes(
+                    files_list, zipped=zipped and not lazy, staged=lazy,
+                ))
+                reserved = True
+                if zipped:
+                    final_filename = _archive_filename(file_id)
+                    if not lazy:
+                        part_path = _part_path(file_id)
+                        out_fh = open(part_path, 'wb')
+                        writer = archive.HashingWriter(out_fh)
+                        builder = _zip_builder(writer)
+
+            paths = fields['paths[]']
+            if index < len(paths):
+                raw_path = paths[index]
+            elif index < len(files_list):
+                raw_path = files_list[index]['name']
+            else:
+                raw_path = part.filename
+            target_path = safe_join(staging_root, raw_path)
+            relative = os.path.relpath(target_path, staging_root).replace(os.sep, '/')
+
+            if builder is not None:
+                size = builder.add(relative, part)
+            elif lazy:
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                size, sha256, crc32 = archive.save_stream(part, target_path)
+                stored.append({
+                    'relative': relative, 'size': size, 'abs': target_path,
+                    'sha256': sha256, 'crc32': crc32,
+                })
+                continue
+            else:
+                if stored:
+                    return jsonify({'error': 'More files than declared in files_list'}), 400
+                final_filename = safe_stored_filename(relative)
+                part_path = _part_path(file_id)
+                out_fh = open(part_path, 'wb')
+                writer = archive.HashingWriter(out_fh)
+                size = _copy_stream(part, writer)
+            stored.append({'relative': relative, 'size': size})
+
+        if files_list is None:
+            return jsonify({'error': 'No files provided'}), 400
+
+        if lazy:
+            lazy_path = safe_join(upload_root, final_filename)
+            file_hash = archive.store_lazy(lazy_path, stored)
+            _record_transfer(
+                file_id, final_filename, file_hash, _lazy_members(lazy_path),
+                recipients, sender_email, expiration_days, tracker,
+                blob_sources=[(entry['abs'], entry['sha256']) for entry in stored],
+            )
+        else:
+            if builder is not None:
+                # Members were deflated as their bytes arrived, at the pace
+                # of the client; flushing the blocks still in flight and
+                # writing the central directory is the packaging step.
+                with _finalize_slot(wait=_FINALIZE_SLOT_WAIT):
+                    tracker.stage('zipping')
+                    stats = builder.close()
+            out_fh.close()
+            file_hash = writer.hexdigest()
+            if builder is not None:
+                files = builder.members()
+            else:
+                files = [{'name': stored[0]['relative'], 'size': stored[0]['size'],
+                          'offset': None, 'sha256': file_hash}]
+            _record_transfer(
+                file_id, final_filename, file_hash, files,
+                recipients, sender_email, expiration_days, tracker, stats,
+                blob_sources=[(part_path, file_hash)], blob_sha256=file_hash,
+            )
+        success = True
+        return jsonify({'success': True, 'file_id': file_id, 'message': 'Upload OK'}), 200
+
+    except UnsafePathError:
+        app.logger.warning("Unsafe path in upload request")
+        return jsonify({'error': 'Invalid file path'}), 400
+    except admission.AdmissionError as e:
+        return _admission_refused(e)
+    except HTTPException:
+        raise
+    except Exception:
+        app.logger.exception("Upload failed")
+        return jsonify({'error': 'Upload failed'}), 500
+    finally:
+        tracker.finish()
+        if reserved:
+            admission.release(upload_root, file_id)
+        if out_fh and not out_fh.closed:
+            out_fh.close()
+        if not success:
+            _remove_partial(part_path)
+            _remove_partial(lazy_path)
+        if lazy:
+            shutil.rmtree(staging_root, ignore_errors=True)
+
+
 @app.route('/upload', methods=['POST', 'OPTIONS'])
 @require_auth
 def upload_file():
@@ -468,40 +1128,47 @@ def upload_file():
     if not _rate_limit(_client_key()):
         return jsonify({'error': 'Too many requests'}), 429
 
+    if app.config['UPLOAD_STREAMING_INGEST']:
+        return _streaming_upload()
+
     upload_root = app.config['UPLOAD_FOLDER']
+    file_id = str(uuid.uuid4())
+    tracker = progress.Tracker(upload_root, file_id, 'upload', request.content_length)
     temp_dir = None
-    zip_path = None
     try:
+        # Staged copy plus archive; the multipart framing stands in for
+        # the archive's own overhead. Checked before the body is read.
+        _reserve_space(file_id, 2 * (request.content_length or 0))
+        # Whether the files will be packaged is only known once the form
+        # has been read, so a busy host refuses before that either way.
+        admission.check_slot(upload_root, app.config['FINALIZE_MAX_CONCURRENT'])
+        # Werkzeug spools the whole body on first access to request.files,
+        # so the byte count only moves once it has all arrived.
+        tracker.stage('receiving')
         if 'files[]' not in request.files:
             return jsonify({'error': 'No files provided'}), 400
 
+        tracker.set_received(request.content_length or 0)
         files = request.files.getlist('files[]')
         paths = request.form.getlist('paths[]')
-        email = (request.form.get('email') or '').strip()
+        recipients, error = _parse_recipients(','.join(request.form.getlist('email')))
         sender_email = (request.form.get('sender_email') or '').strip()
 
-        if not _valid_email(email):
-            return jsonify({'error': 'Invalid recipient email address'}), 400
+        if error:
+            return jsonify({'error': error}), 400
         if not _valid_email(sender_email):
             return jsonify({'error': 'Invalid sender email address'}), 400
 
-        try:
-            expiration_days = int(request.form.get('expiration_days', '7'))
-        except ValueError:
-            expiration_days = 7
-        if expiration_days not in (3, 5, 7, 10):
-            expiration_days = 7
+        expiration_days = _parse_expiration_days(request.form.get('expiration_days'))
 
         try:
             files_list = json.loads(request.form.get('files_list', '[]'))
         except json.JSONDecodeError:
             return jsonify({'error': 'Invalid files_list payload'}), 400
-        if not files_list:
-            return jsonify({'error': 'Empty files_list'}), 400
+        error = _validate_files_list(files_list)
+        if error:
+            return jsonify({'error': error}), 400
 
-        total_size = sum(int(f.get('size', 0)) for f in files_list)
-
-        file_id = str(uuid.uuid4())
         temp_dir = os.path.join(upload_root, 'temp', file_id)
         os.makedirs(temp_dir, exist_ok=True)
 
@@ -515,117 +1182,397 @@ def upload_file():
                 app.logger.warning("Rejected unsafe upload path")
                 return jsonify({'error': 'Invalid file path'}), 400
             os.makedirs(os.path.dirname(target_path), exist_ok=True)
-            uploaded_file.save(target_path)
+            size, sha256, crc32 = archive.save_stream(uploaded_file.stream, target_path)
             file_list.append({
                 'relative': os.path.relpath(target_path, temp_dir).replace(os.sep, '/'),
-                'size': os.path.getsize(target_path),
+                'size': size,
                 'abs': target_path,
+                'sha256': sha256,
+                'crc32': crc32,
             })
 
         if not file_list:
             return jsonify({'error': 'No valid files uploaded'}), 400
 
-        needs_zip = len(file_list) > 1 or any('/' in f['relative'] for f in file_list)
-
-        if needs_zip:
-            date_str = datetime.utcnow().strftime("%y%m%d%H%M%S")
-            final_filename = f"iTransfer_{date_str}_{file_id[:8]}.zip"
-            zip_path = safe_join(upload_root, final_filename)
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                for entry in file_list:
-                    zf.write(entry['abs'], entry['relative'])
-            final_path = zip_path
-        else:
-            only = file_list[0]
-            final_filename = safe_stored_filename(only['relative'])
-            final_path = safe_join(upload_root, final_filename)
-            shutil.move(only['abs'], final_path)
-
-        with open(final_path, 'rb') as fh:
-            file_hash = hashlib.sha256(fh.read()).hexdigest()
-
-        original_files = [{'name': f['name'], 'size': int(f['size'])} for f in files_list]
-
-        record = FileUpload(
-            id=file_id,
-            filename=final_filename,
-            email=email,
-            sender_email=sender_email,
-            encrypted_data=file_hash,
-            downloaded=False,
-            expires_at=datetime.utcnow() + timedelta(days=expiration_days),
+        _finalize_transfer(
+            file_id, file_list, recipients, sender_email, expiration_days, tracker,
         )
-        record.set_files_list(original_files)
-        db.session.add(record)
-        db.session.commit()
-
-        files_summary = "".join(f"- {f['name']} ({format_size(f['size'])})\n" for f in original_files)
-        total_formatted = format_size(total_size)
-
-        try:
-            smtp_config = _load_smtp_config()
-            record.notification_status_recipient = 'pending'
-            record.notification_status_sender = 'pending'
-            db.session.commit()
-            email_executor.submit(
-                _send_recipient_notification_task, file_id, email, files_summary,
-                total_formatted, smtp_config, sender_email,
-            )
-            email_executor.submit(
-                _send_sender_confirmation_task, file_id, sender_email, original_files,
-                total_formatted, smtp_config, email,
-            )
-        except FileNotFoundError:
-            app.logger.error("SMTP config missing; notifications not dispatched for %s", file_id)
-            record.notification_status_recipient = 'failed'
-            record.notification_error_recipient = 'SMTP not configured'
-            record.notification_status_sender = 'failed'
-            record.notification_error_sender = 'SMTP not configured'
-            db.session.commit()
-        except Exception:
-            app.logger.exception("Notification dispatch failed for %s", file_id)
-
         return jsonify({'success': True, 'file_id': file_id, 'message': 'Upload OK'}), 200
 
     except UnsafePathError:
         app.logger.warning("Unsafe path in upload request")
         return jsonify({'error': 'Invalid file path'}), 400
+    except admission.AdmissionError as e:
+        return _admission_refused(e)
     except Exception:
         app.logger.exception("Upload failed")
-        if zip_path and os.path.exists(zip_path):
-            try:
-                os.remove(zip_path)
-            except OSError:
-                pass
         return jsonify({'error': 'Upload failed'}), 500
     finally:
+        tracker.finish()
+        admission.release(upload_root, file_id)
         if temp_dir and os.path.exists(temp_dir):
             shutil.rmtree(temp_dir, ignore_errors=True)
 
 
+# -------------------------------------------------------------------------
+# Resumable chunked uploads
+#
+# create session -> PUT each chunk (any order, any worker, retried freely)
+# -> GET to see what the server already has -> POST complete. All state is
+# on disk (see uploads.py), so a client whose connection dropped at 48 GB
+# asks for the received ranges and only re-sends what is missing, even
+# across a backend restart.
+# -------------------------------------------------------------------------
+def _session_response(state):
+    files = []
+    for index, entry in enumerate(state['files']):
+        files.append({
+            'index': index,
+            'name': entry['name'],
+            'size': entry['size'],
+            'received': uploads.received_byte_ranges(state, index),
+            'complete': uploads.missing_chunks(state, index) == 0,
+        })
+    return {
+        'file_id': state['file_id'],
+        'chunk_size': state['chunk_size'],
+        'files': files,
+        'complete': uploads.is_complete(state),
+    }
+
+
+@app.route('/upload/sessions', methods=['POST', 'OPTIONS'])
+@require_auth
+def create_upload_session():
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+
+    if not _rate_limit(_client_key()):
+        return jsonify({'error': 'Too many requests'}), 429
+
+    upload_root = app.config['UPLOAD_FOLDER']
+    file_id = None
+    try:
+        data = request.get_json(silent=True) or {}
+        recipients, error = _parse_recipients(data.get('email') or '')
+        sender_email = (data.get('sender_email') or '').strip()
+        if error:
+            return jsonify({'error': error}), 400
+        if not _valid_email(sender_email):
+            return jsonify({'error': 'Invalid sender email address'}), 400
+
+        files_list = data.get('files_list')
+        error = _validate_files_list(files_list)
+        if error:
+            return jsonify({'error': error}), 400
+        files = [{'name': f['name'], 'size': int(f.get('size', 0))} for f in files_list]
+        if sum(f['size'] for f in files) > app.config['MAX_CONTENT_LENGTH']:
+            return jsonify({'error': 'Transfer too large'}), 413
+
+        file_id = str(uuid.uuid4())
+        # Held until the session completes, is deleted or expires.
+        zipped = _needs_zip([sanitize_relative_path(f['name']) for f in files])
+        _reserve_space(file_id, admission.projected_bytes(
+            files, zipped=zipped and app.config['ARCHIVE_MODE'] != 'lazy', staged=True,
+        ))
+        meta = {
+            'recipients': recipients,
+            'sender_email': sender_email,
+            'expiration_days': _parse_expiration_days(data.get('expiration_days')),
+        }
+        state = uploads.create_session(
+            upload_root, file_id, meta, files, app.config['UPLOAD_CHUNK_SIZE'],
+        )
+        progress.Tracker(
+            upload_root, file_id, 'session', sum(f['size'] for f in files),
+        ).stage('receiving')
+        return jsonify(_session_response(state)), 201
+    except UnsafePathError:
+        app.logger.warning("Rejected unsafe path in upload session")
+        if file_id:
+            uploads.discard_session(upload_root, file_id)
+            admission.release(upload_root, file_id)
+        return jsonify({'error': 'Invalid file path'}), 400
+    except admission.AdmissionError as e:
+        return _admission_refused(e)
+    except Exception:
+        app.logger.exception("Could not create upload session")
+        if file_id:
+            uploads.discard_session(upload_root, file_id)
+            admission.release(upload_root, file_id)
+        return jsonify({'error': 'Upload failed'}), 500
+
+
+@app.route('/upload/sessions/<file_id>', methods=['GET', 'DELETE', 'OPTIONS'])
+@require_auth
+def upload_session(file_id):
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+    upload_root = app.config['UPLOAD_FOLDER']
+    try:
+        state = uploads.load_session(upload_root, file_id)
+        if state is None:
+            return jsonify({'error': 'Not found'}), 404
+        if request.method == 'DELETE':
+            uploads.discard_session(upload_root, file_id)
+            progress.discard(upload_root, file_id)
+            admission.release(upload_root, file_id)
+            return jsonify({'message': 'Deleted'}), 200
+        return jsonify(_session_response(state)), 200
+    except uploads.UploadSessionError:
+        return jsonify({'error': 'Not found'}), 404
+    except Exception:
+        app.logger.exception("upload session lookup failed")
+        return jsonify({'error': 'Internal error'}), 500
+
+
+@app.route(
+    '/upload/sessions/<file_id>/files/<int:file_index>/chunks/<int:chunk_index>',
+    methods=['PUT', 'OPTIONS'],
+)
+@require_auth
+def upload_chunk(file_id, file_index, chunk_index):
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+    upload_root = app.config['UPLOAD_FOLDER']
+    try:
+        state = uploads.load_session(upload_root, file_id)
+        if state is None:
+            return jsonify({'error': 'Not found'}), 404
+        offset = request.args.get('offset')
+        if offset is not None and offset != str(chunk_index * state['chunk_size']):
+            return jsonify({'error': 'Chunk offset does not match chunk index'}), 400
+        state = uploads.write_chunk(upload_root, file_id, file_index, chunk_index, request.stream)
+        progress.Tracker.load(upload_root, file_id, 'session').set_received(uploads.received_bytes(state))
+        admission.touch(upload_root, file_id)
+        return jsonify({
+            'file_index': file_index,
+            'chunk_index': chunk_index,
+            'offset': chunk_index * state['chunk_size'],
+            'received': uploads.received_byte_ranges(state, file_index),
+        }), 200
+    except FileNotFoundError:
+        return jsonify({'error': 'Not found'}), 404
+    except uploads.UploadSessionError as e:
+        return jsonify({'error': str(e)}), 400
+    except UnsafePathError:
+        return jsonify({'error': 'Invalid file path'}), 400
+    except Exception:
+        app.logger.exception("Chunk upload failed")
+        return jsonify({'error': 'Upload failed'}), 500
+
+
+@app.route('/upload/sessions/<file_id>/complete', methods=['POST', 'OPTIONS'])
+@require_auth
+def complete_upload_session(file_id):
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+    upload_root = app.config['UPLOAD_FOLDER']
+    try:
+        state = uploads.load_session(upload_root, file_id)
+        if state is None:
+            # A retried /complete whose first response was lost: the
+            # session is gone because it already succeeded.
+            if FileUpload.query.get(file_id):
+                return jsonify({'success': True, 'file_id': file_id, 'message': 'Upload OK'}), 200
+            return jsonify({'error': 'Not found'}), 404
+        if not uploads.is_complete(state):
+            return jsonify({'error': 'Missing chunks', **_session_response(state)}), 409
+        state = uploads.begin_finalize(upload_root, file_id)
+    except FileNotFoundError:
+        return jsonify({'error': 'Not found'}), 404
+    except uploads.UploadSessionError as e:
+        return jsonify({'error': str(e)}), 409
+
+    tracker = progress.Tracker.load(upload_root, file_id, 'session')
+    tracker.set_received(uploads.received_bytes(state))
+    try:
+        _finalize_transfer(
+            file_id, uploads.staged_files(upload_root, state),
+            # Sessions created before multi-recipient support only have 'email'.
+            state.get('recipients') or [state['email']],
+            state['sender_email'], state['expiration_days'], tracker,
+        )
+    except UnsafePathError:
+        app.logger.warning("Unsafe path in upload session %s", file_id)
+        uploads.discard_session(upload_root, file_id)
+        admission.release(upload_root, file_id)
+        return jsonify({'error': 'Invalid file path'}), 400
+    except admission.AdmissionError as e:
+        uploads.abort_finalize(upload_root, file_id)
+        return _admission_refused(e)
+    except Exception:
+        app.logger.exception("Finalising upload session %s failed", file_id)
+        db.session.rollback()
+        uploads.abort_finalize(upload_root, file_id)
+        return jsonify({'error': 'Upload failed'}), 500
+    finally:
+        tracker.finish()
+
+    uploads.discard_session(upload_root, file_id)
+    admission.release(upload_root, file_id)
+    return jsonify({'success': True, 'file_id': file_id, 'message': 'Upload OK'}), 200
+
+
+def _resolve_download_link(link_id):
+    """Map a download link id to ``(record, recipient)``. The transfer's own
+    id (legacy links, the sender's confirmation) gives ``recipient`` None;
+    a TransferRecipient id gives that recipient and the transfer it shares."""
+    record = FileUpload.query.get(link_id)
+    if record:
+        return record, None
+    recipient = TransferRecipient.query.get(link_id)
+    if recipient:
+        return recipient.transfer, recipient
+    return None, None
+
+
+# Files per page of /transfer/<id> and /transfer/<id>/members. The first
+# page of files is cached with the rest of the link's details.
+_FILES_PAGE_SIZE = 1000
+_FILES_MAX_PAGE_SIZE = 5000
+
+
+def _transfer_files(file_id, offset, limit) -> list:
+    """``{name, size}`` of the transfer's files from position ``offset`` on,
+    at most ``limit`` of them."""
+    rows = (
+        db.session.query(TransferFile.name, TransferFile.size)
+        .filter(TransferFile.file_id == file_id, TransferFile.position >= offset)
+        .order_by(TransferFile.position)
+        .limit(limit)
+        .all()
+    )
+    if rows:
+        return [{'name': row.name, 'size': row.size} for row in rows]
+    # Not moved out of files_list yet (see _move_files_lists in migrations.py).
+    legacy = db.session.query(FileUpload.files_list).filter(FileUpload.id == file_id).scalar()
+    return json.loads(legacy)[offset:offset + limit] if legacy else []
+
+
+def _transfer_totals(record) -> tuple[int, int]:
+    """``(file_count, total_size)`` of a transfer."""
+    if record.file_count is not None:
+        return record.file_count, record.total_size
+    files = record.get_files_list()  # not backfilled yet
+    return len(files), sum(int(f.get('size', 0)) for f in files)
+
+
+def _page_args() -> tuple[int, int]:
+    """``(offset, limit)`` from the query string. Raises ValueError."""
+    offset = int(request.args.get('offset') or 0)
+    limit = int(request.args.get('limit') or _FILES_PAGE_SIZE)
+    if offset < 0 or limit < 1:
+        raise ValueError("offset and limit must be positive")
+    return offset, min(limit, _FILES_MAX_PAGE_SIZE)
+
+
+def _transfer_info(link_id) -> dict | None:
+    """What the public endpoints need to know about a download link, from
+    ``transfer_cache`` or else the database and the stored file. None for
+    an unknown link. ``missing`` flags a transfer whose stored file is
+    gone; such entries are not cached. ``expires_at`` is never cached: it
+    is read from the row on every call, so a link expired, shortened or
+    deleted through any worker stops at once. The caller checks it."""
+    info = transfer_cache.get(link_id)
+    if info is not None:
+        expires_at = db.session.execute(
+            select(FileUpload.expires_at).where(FileUpload.id == info['file_id'])
+        ).scalar()
+        if expires_at is None:
+            # Deleted through another worker since this one cached the link.
+            _forget_transfer(info['file_id'])
+            return None
+        return {**info, 'expires_at': expires_at}
+    record, recipient = _resolve_download_link(link_id)
+    if not record:
+        return None
+
+    stored_name = safe_stored_filename(record.filename)
+    file_path = blobs.stored_path(app.config['UPLOAD_FOLDER'], record)
+    files = _transfer_files(record.id, 0, _FILES_PAGE_SIZE)
+    file_count, total_size = _transfer_totals(record)
+    info = {
+        'link_id': link_id,
+        'file_id': record.id,
+        'recipient_id': recipient.id if recipient else None,
+        'downloaded': bool((recipient or record).downloaded),
+        'sender_email': record.sender_email,
+        'created_at': record.created_at,
+        'etag': record.encrypted_data or None,
+        'download_name': stored_name,
+        'files': files,
+        'file_count': file_count,
+        'total_size': total_size,
+        'path': file_path,
+        'zip_view': None,
+        'size': None,
+        'missing': False,
+    }
+    try:
+        if archive.is_lazy(file_path):
+            info['zip_view'] = archive.StoredZip(
+                file_path, functools.partial(blobs.blob_path, app.config['UPLOAD_FOLDER']),
+            )
+            info['size'] = info['zip_view'].size
+        else:
+            info['size'] = os.path.getsize(file_path)
+    except FileNotFoundError:
+        info['missing'] = True
+        return {**info, 'expires_at': record.expires_at}
+    info['archive'] = info['zip_view'] is not None or file_count > 1 or _needs_zip(
+        [sanitize_relative_path(f['name']) for f in files]
+    )
+    if not files:
+        info['files'] = [{'name': stored_name, 'size': info['size']}]
+        info['file_count'], info['total_size'] = 1, info['size']
+    transfer_cache.put(link_id, info)
+    return {**info, 'expires_at': record.expires_at}
+
+
+def _forget_transfer(file_id) -> None:
+    """Drop every cached link of a transfer that was just deleted."""
+    transfer_cache.discard_if(lambda info: info['file_id'] == file_id)
+
+
 @app.route('/transfer/<file_id>', methods=['GET'])
 def get_transfer_details(file_id):
+    """A download link's details, with its files a page at a time
+    (``offset``/``limit``; ``next_offset`` is null on the last page)."""
     try:
-        record = FileUpload.query.get(file_id)
-        if not record:
+        try:
+            offset, limit = _page_args()
+        except ValueError:
+            return jsonify({'error': 'Invalid offset or limit'}), 400
+        info = _transfer_info(file_id)
+        if not info:
             return jsonify({'error': 'Not found'}), 404
-        if datetime.utcnow() > record.expires_at:
+        remaining = (info['expires_at'] - datetime.utcnow()).total_seconds()
+        if remaining < 0:
             return jsonify({'error': 'Link expired'}), 410
-
-        stored_name = safe_stored_filename(record.filename)
-        file_path = safe_join(app.config['UPLOAD_FOLDER'], stored_name)
-        if not os.path.exists(file_path):
+        if info['missing']:
             return jsonify({'error': 'File missing on server'}), 404
 
-        files_list = record.get_files_list()
-        if not files_list:
-            files_list = [{'name': stored_name, 'size': os.path.getsize(file_path)}]
-
-        return jsonify({
-            'files': files_list,
-            'expires_at': record.expires_at.isoformat(),
-            'sender_email': record.sender_email,
-        }), 200
+        if offset == 0:
+            files = info['files'][:limit]
+        else:
+            files = _transfer_files(info['file_id'], offset, limit)
+        next_offset = offset + len(files)
+        response = jsonify({
+            'files': files,
+            'file_count': info['file_count'],
+            'total_size': info['total_size'],
+            'next_offset': next_offset if next_offset < info['file_count'] else None,
+            'expires_at': info['expires_at'].isoformat(),
+            'sender_email': info['sender_email'],
+        })
+        # Only deletion and early expiry change this document, so a browser
+        # or proxy may reuse it for as long as a worker would reuse its
+        # cached copy; /download checks both on every request.
+        response.add_etag()
+        response.cache_control.public = True
+        response.cache_control.max_age = int(min(app.config['TRANSFER_CACHE_TTL'], remaining))
+        return response.make_conditional(request)
     except UnsafePathError:
         return jsonify({'error': 'Not found'}), 404
     except Exception:
@@ -633,85 +1580,524 @@ def get_transfer_details(file_id):
         return jsonify({'error': 'Internal error'}), 500
 
 
+def _if_range_matches(etag, last_modified) -> bool:
+    """A Range is only honoured when If-Range, if sent, still names this
+    representation: by strong ETag, or by its exact Last-Modified date."""
+    raw = (request.headers.get('If-Range') or '').strip()
+    if not raw:
+        return True
+    if raw.startswith(('"', 'W/')):
+        return etag is not None and raw == f'"{etag}"'
+    since = parse_date(raw)
+    return (
+        since is not None and last_modified is not None
+        and since == last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    )
+
+
+def _offload_headers(file_path) -> dict | None:
+    """Headers handing ``file_path`` over to the fronting web server
+    (DOWNLOAD_OFFLOAD), or None to serve it from this worker."""
+    mode = app.config.get('DOWNLOAD_OFFLOAD')
+    if mode not in ('x-accel', 'x-sendfile'):
+        return None
+    root = os.path.realpath(app.config['UPLOAD_FOLDER'])
+    real_path = os.path.realpath(file_path)
+    if os.path.commonpath([root, real_path]) != root:
+        return None
+    if mode == 'x-sendfile':
+        return {'X-Sendfile': real_path}
+    relative = os.path.relpath(real_path, root).replace(os.sep, '/')
+    return {'X-Accel-Redirect': app.config['DOWNLOAD_ACCEL_PREFIX'] + quote(relative)}
+
+
+def _download_response(info):
+    """Serve a stored transfer with RFC 7233 byte ranges (single, multiple,
+    suffix) for single files and zipped transfers alike. Stored content
+    never changes, so the transfer's SHA-256 is a strong ETag and every
+    conditional header is answered from the record alone. Returns the
+    response and the ``[start, stop)`` ranges of the content it carries
+    (the web server's to send, when offloaded); None when it carries none
+    (304, 412, 416).
+
+    With DOWNLOAD_OFFLOAD set, a stored file is handed to the web server
+    once every check has passed; it applies the Range itself, which is
+    only left to it when there is no If-Range to judge by our ETag."""
+    etag = info['etag']
+    last_modified = info['created_at']
+    if etag and request.if_match and not request.if_match.contains(etag):
+        return Response(status=412), None
+    if etag and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response, None
+
+    file_path, download_name, size = info['path'], info['download_name'], info['size']
+    lazy = info['zip_view'] is not None
+    if lazy:
+        read_range, mimetype = info['zip_view'].iter_range, 'application/zip'
+    else:
+        read_range = functools.partial(ranges.iter_file, file_path)
+        mimetype = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+
+    byte_ranges = None
+    requested = ranges.parse(request.headers.get('Range'))
+    if requested is not None and _if_range_matches(etag, last_modified):
+        byte_ranges = ranges.resolve(requested, size)
+        if not byte_ranges:
+            response = Response(status=416)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response, None
+        if len(byte_ranges) > ranges.MAX_RANGES:
+            byte_ranges = None
+
+    offload = None
+    if not lazy and (
+        'Range' not in request.headers
+        or byte_ranges is not None and 'If-Range' not in request.headers
+    ):
+        offload = _offload_headers(file_path)
+
+    if offload:
+        response = Response(mimetype=mimetype)
+        response.headers.update(offload)
+    elif byte_ranges is None:
+        if lazy:
+            response = Response(read_range(0, size), mimetype=mimetype, direct_passthrough=True)
+            response.content_length = size
+        else:
+            response = send_file(file_path, mimetype=mimetype, conditional=False, etag=False)
+    elif len(byte_ranges) == 1:
+        start, stop = byte_ranges[0]
+        if lazy or stop != size:
+            body = read_range(start, stop)
+        else:
+            # A resumed download runs to the end of the file, so the
+            # server's file wrapper (sendfile under Gunicorn) can take the
+            # handle as it is; it has no notion of where to stop otherwise.
+            fh = open(file_path, 'rb')
+            fh.seek(start)
+            body = wrap_file(request.environ, fh)
+        response = Response(body, status=206, mimetype=mimetype, direct_passthrough=True)
+        response.content_length = stop - start
+        response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+    else:
+        content_type, length, body = ranges.multipart_byteranges(byte_ranges, size, mimetype, read_range)
+        response = Response(body, status=206, content_type=content_type, direct_passthrough=True)
+        response.content_length = length
+
+    response.headers['Accept-Ranges'] = 'bytes'
+    if etag:
+        response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    return response, [(0, size)] if byte_ranges is None else byte_ranges
+
+
+def _record_first_download(info) -> None:
+    """Mark the link downloaded and notify the sender, once per link. The
+    flag is flipped by a conditional UPDATE, so of several concurrent
+    fetches (parallel segments, a retry landing on another worker) exactly
+    one notifies. A link this worker already knows as downloaded costs no
+    query at all."""
+    if info['downloaded']:
+        return
+    file_id, recipient_id = info['file_id'], info['recipient_id']
+    if recipient_id:
+        claim = update(TransferRecipient).where(
+            TransferRecipient.id == recipient_id, TransferRecipient.downloaded.isnot(True),
+        ).values(downloaded=True, downloaded_at=datetime.utcnow())
+    else:
+        claim = update(FileUpload).where(
+            FileUpload.id == file_id, FileUpload.downloaded.isnot(True),
+        ).values(downloaded=True)
+    claimed = db.session.execute(claim).rowcount == 1
+    # Either way the flag is set now; the transfer's own link reports it
+    # too once any recipient has downloaded.
+    transfer_cache.discard(info['link_id'])
+    transfer_cache.discard(file_id)
+    if not claimed:
+        db.session.rollback()
+        return
+    stats.bump(info['sender_email'], links_downloaded=1)
+
+    tracked = [(FileUpload, file_id)]
+    if recipient_id:
+        tracked.append((TransferRecipient, recipient_id))
+        db.session.execute(update(FileUpload).where(FileUpload.id == file_id).values(downloaded=True))
+
+    def mark(**values):
+        for model, row_id in tracked:
+            db.session.execute(update(model).where(model.id == row_id).values(**values))
+
+    try:
+        mark(notification_status_download='pending')
+        outbox.enqueue(
+            'download', file_id, info['sender_email'], recipient_id=recipient_id,
+            sender_email=info['sender_email'], downloaded_at=datetime.utcnow().isoformat(),
+        )
+        db.session.commit()
+    except Exception:
+        # The download itself went through; the next one claims the link again.
+        db.session.rollback()
+        app.logger.exception("Failed to record the first download of %s", info['link_id'])
+        return
+    _outbox_wakeup.set()
+
+
+def _count_download(info, nbytes, from_start) -> None:
+    """Add a download request to the daily rollup. Statistics must never
+    cost the recipient their download, so failures are only logged."""
+    try:
+        stats.bump(info['sender_email'], downloads=from_start, downloaded_bytes=nbytes)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        app.logger.exception("Could not count download of %s", info['file_id'])
+
+
 @app.route('/download/<file_id>', methods=['GET'])
 def download_file(file_id):
     try:
-        record = FileUpload.query.get(file_id)
-        if not record:
+        info = _transfer_info(file_id)
+        if not info:
             return jsonify({'error': 'Not found'}), 404
-        if datetime.utcnow() > record.expires_at:
+        if datetime.utcnow() > info['expires_at']:
             return jsonify({'error': 'Link expired'}), 410
-
-        stored_name = safe_stored_filename(record.filename)
-        file_path = safe_join(app.config['UPLOAD_FOLDER'], stored_name)
-        if not os.path.exists(file_path):
+        if info['missing']:
             return jsonify({'error': 'File missing on server'}), 404
 
-        if not record.downloaded:
-            record.downloaded = True
-            try:
-                smtp_config = _load_smtp_config()
-                record.notification_status_download = 'pending'
-                db.session.commit()
-                email_executor.submit(
-                    _send_download_notification_task, file_id, record.sender_email, smtp_config,
-                )
-            except FileNotFoundError:
-                app.logger.error("SMTP config missing; download notification not dispatched for %s", file_id)
-                record.notification_status_download = 'failed'
-                record.notification_error_download = 'SMTP not configured'
-                db.session.commit()
-            except Exception:
-                app.logger.exception("Failed to dispatch download notification for %s", file_id)
-                db.session.commit()
-
-        return send_from_directory(
-            app.config['UPLOAD_FOLDER'],
-            stored_name,
-            as_attachment=True,
-            download_name=stored_name,
-        )
+        response, served = _download_response(info)
+        # HEAD requests and conditional hits count for nothing; resumed and
+        # partial fetches count their bytes but never as a (new) download.
+        if request.method == 'GET' and served:
+            from_start = served[0][0] == 0
+            _count_download(info, sum(stop - start for start, stop in served), from_start)
+            if from_start:
+                _record_first_download(info)
+        return response
     except UnsafePathError:
         return jsonify({'error': 'Not found'}), 404
+    except FileNotFoundError:
+        # Deleted through another worker since this one cached the link.
+        transfer_cache.discard(file_id)
+        return jsonify({'error': 'File missing on server'}), 404
     except Exception:
         app.logger.exception("Download failed")
         return jsonify({'error': 'Download failed'}), 500
 
 
+# Member listings of stored archives, keyed by the archive's SHA-256: stored
+# content never changes, so the central directory is read once per worker.
+_member_cache = LRUCache(64)
+
+
+def _archive_members(info) -> list | None:
+    """Members of a zipped or lazy transfer, or None for a single file."""
+    if not info['archive']:
+        return None
+    members = _member_cache.get(info['etag'])
+    if members is None:
+        members = archive.list_members(
+            info['path'], functools.partial(blobs.blob_path, app.config['UPLOAD_FOLDER']),
+        )
+        _member_cache.put(info['etag'], members)
+    return members
+
+
+@app.route('/transfer/<file_id>/members', methods=['GET'])
+def list_transfer_members(file_id):
+    """Members of a zipped transfer, paged like the files of /transfer."""
+    try:
+        try:
+            offset, limit = _page_args()
+        except ValueError:
+            return jsonify({'error': 'Invalid offset or limit'}), 400
+        info = _transfer_info(file_id)
+        if not info:
+            return jsonify({'error': 'Not found'}), 404
+        if datetime.utcnow() > info['expires_at']:
+            return jsonify({'error': 'Link expired'}), 410
+        if info['missing']:
+            return jsonify({'error': 'File missing on server'}), 404
+        members = _archive_members(info)
+        if members is None:
+            return jsonify({'error': 'Transfer is not an archive'}), 400
+
+        next_offset = offset + limit
+        return jsonify({
+            'members': [{
+                'index': index,
+                'name': member['name'],
+                'size': member['size'],
+                'compressed_size': member['compressed_size'],
+            } for index, member in enumerate(members[offset:next_offset], offset)],
+            'member_count': len(members),
+            'next_offset': next_offset if next_offset < len(members) else None,
+        }), 200
+    except UnsafePathError:
+        return jsonify({'error': 'Not found'}), 404
+    except Exception:
+        app.logger.exception("member listing failed")
+        return jsonify({'error': 'Internal error'}), 500
+
+
+@app.route('/download/<file_id>/members/<int:index>', methods=['GET'])
+def download_member(file_id, index):
+    """One file out of a zipped transfer, read from its own offset in the
+    stored archive (or its own blob, for lazy transfers)."""
+    try:
+        info = _transfer_info(file_id)
+        if not info:
+            return jsonify({'error': 'Not found'}), 404
+        if datetime.utcnow() > info['expires_at']:
+            return jsonify({'error': 'Link expired'}), 410
+        if info['missing']:
+            return jsonify({'error': 'File missing on server'}), 404
+        members = _archive_members(info)
+        if members is None:
+            return jsonify({'error': 'Transfer is not an archive'}), 400
+        if not 0 <= index < len(members):
+            return jsonify({'error': 'Not found'}), 404
+
+        member = members[index]
+        download_name = member['name'].rsplit('/', 1)[-1]
+        mimetype = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+        offload = _offload_headers(member['path']) if 'path' in member else None
+        if offload:
+            response = Response(mimetype=mimetype)
+            response.headers.update(offload)
+            response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        elif 'path' in member:
+            response = send_file(member['path'], mimetype=mimetype, as_attachment=True,
+                                 download_name=download_name)
+        else:
+            # Raises (answered with a 500 below) before any header is sent
+            # if the member cannot be read at all.
+            chunks = archive.iter_member(info['path'], member)
+            response = Response(chunks, mimetype=mimetype, direct_passthrough=True)
+            response.content_length = member['size']
+            response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+
+        # A single member is a partial fetch: its bytes count, but it is
+        # neither a download of the transfer nor news for the sender.
+        if request.method == 'GET':
+            _count_download(info, member['size'], False)
+        return response
+    except UnsafePathError:
+        return jsonify({'error': 'Not found'}), 404
+    except Exception:
+        app.logger.exception("Member download failed")
+        return jsonify({'error': 'Download failed'}), 500
+
+
 # -------------------------------------------------------------------------
 # Admin routes
 # -------------------------------------------------------------------------
+_TRANSFERS_PAGE_SIZE = 50
+_TRANSFERS_MAX_PAGE_SIZE = 200
+
+
+def _encode_transfers_cursor(record) -> str:
+    raw = json.dumps([record.created_at.isoformat(), record.id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def _decode_transfers_cursor(token: str) -> tuple[datetime, str]:
+    """Raises ValueError for a cursor this server did not hand out."""
+    try:
+        created_at, file_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        return datetime.fromisoformat(created_at), str(file_id)
+    except (TypeError, ValueError, UnicodeError, json.JSONDecodeError) as e:
+        raise ValueError(token) from e
+
+
+def _bool_arg(args, name) -> bool | None:
+    raw = (args.get(name) or '').strip().lower()
+    if not raw:
+        return None
+    if raw in ('true', '1', 'yes'):
+        return True
+    if raw in ('false', '0', 'no'):
+        return False
+    raise ValueError(name)
+
+
+def _date_arg(args, name, end_of_day=False) -> datetime | None:
+    """An ISO date or datetime. A bare date used as an upper bound covers
+    that whole day."""
+    raw = (args.get(name) or '').strip()
+    if not raw:
+        return None
+    try:
+        value = datetime.fromisoformat(raw)
+    except ValueError as e:
+        raise ValueError(name) from e
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    if end_of_day and len(raw) == 10:
+        value += timedelta(days=1)
+    return value
+
+
+def _transfer_filters(args) -> list:
+    """SQL conditions for the /api/transfers query string. Raises
+    ValueError on a malformed value."""
+    now = datetime.utcnow()
+    clauses = []
+    expired = _bool_arg(args, 'expired')
+    if expired is not None:
+        clauses.append(FileUpload.expires_at < now if expired else FileUpload.expires_at >= now)
+    downloaded = _bool_arg(args, 'downloaded')
+    if downloaded is not None:
+        clauses.append(FileUpload.downloaded.is_(True) if downloaded else FileUpload.downloaded.isnot(True))
+    if _bool_arg(args, 'notification_failed'):
+        clauses.append(or_(
+            FileUpload.notification_status_recipient == 'failed',
+            FileUpload.notification_status_sender == 'failed',
+            FileUpload.notification_status_download == 'failed',
+            FileUpload.recipients.any(or_(
+                TransferRecipient.notification_status == 'failed',
+                TransferRecipient.notification_status_download == 'failed',
+            )),
+        ))
+    sender = (args.get('sender') or '').strip()
+    if sender:
+        clauses.append(FileUpload.sender_email == sender)
+    recipient = (args.get('recipient') or '').strip()
+    if recipient:
+        # IN rather than EXISTS: both sides of the OR can then use their
+        # email index instead of testing every transfer.
+        clauses.append(or_(
+            FileUpload.email == recipient,
+            FileUpload.id.in_(select(TransferRecipient.file_id).where(TransferRecipient.email == recipient)),
+        ))
+    created_from = _date_arg(args, 'created_from')
+    if created_from:
+        clauses.append(FileUpload.created_at >= created_from)
+    created_to = _date_arg(args, 'created_to', end_of_day=True)
+    if created_to:
+        clauses.append(FileUpload.created_at < created_to)
+    return clauses
+
+
+def _transfer_summary(r) -> dict:
+    file_count, total_size = _transfer_totals(r)
+    return {
+        'id': r.id,
+        'filename': r.filename,
+        'sender_email': r.sender_email,
+        'recipient_email': ", ".join(row.email for row in r.recipients) or r.email,
+        'recipients': [{
+            'id': row.id,
+            'email': row.email,
+            'downloaded': row.downloaded,
+            'downloaded_at': row.downloaded_at.isoformat() if row.downloaded_at else None,
+            'notifications': {
+                'recipient': {'status': row.notification_status, 'error': row.notification_error},
+                'download': {'status': row.notification_status_download, 'error': row.notification_error_download},
+            },
+        } for row in r.recipients],
+        'created_at': r.created_at.isoformat() if r.created_at else None,
+        'expires_at': r.expires_at.isoformat(),
+        'downloaded': r.downloaded,
+        'file_count': file_count,
+        'total_size': total_size,
+        'expired': datetime.utcnow() > r.expires_at,
+        'integrity': {
+            'status': r.integrity_status,
+            'error': r.integrity_error,
+            'checked_at': r.integrity_checked_at.isoformat() if r.integrity_checked_at else None,
+        },
+        'notifications': {
+            'recipient': {'status': r.notification_status_recipient, 'error': r.notification_error_recipient},
+            'sender': {'status': r.notification_status_sender, 'error': r.notification_error_sender},
+            'download': {'status': r.notification_status_download, 'error': r.notification_error_download},
+        },
+    }
+
+
 @app.route('/api/transfers', methods=['GET', 'OPTIONS'])
 @require_auth
 def list_transfers():
+    """One page of transfers, newest first, keyset-paginated on
+    (created_at, id): pass the returned ``next_cursor`` as ``cursor`` to
+    get the next page. ``total`` (the number of matching transfers) is
+    only counted for the first page."""
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+    try:
+        try:
+            limit = int(request.args.get('limit') or _TRANSFERS_PAGE_SIZE)
+            clauses = _transfer_filters(request.args)
+            cursor = request.args.get('cursor')
+            after = _decode_transfers_cursor(cursor) if cursor else None
+        except ValueError:
+            return jsonify({'error': 'Invalid filter, limit or cursor'}), 400
+        limit = max(1, min(limit, _TRANSFERS_MAX_PAGE_SIZE))
+
+        created = FileUpload.created_at
+        if db.engine.dialect.name == 'sqlite':
+            # SQLite keeps CURRENT_TIMESTAMP defaults as text without the
+            # fractional seconds a bound datetime carries; compare both
+            # normalised or a page boundary never matches its own row.
+            # Migration 8 indexes that expression.
+            created = db.func.datetime(FileUpload.created_at)
+
+        query = FileUpload.query.filter(*clauses)
+        total = None
+        if after is None:
+            total = query.with_entities(db.func.count(FileUpload.id)).order_by(None).scalar()
+        else:
+            created_at, file_id = after
+            if db.engine.dialect.name == 'sqlite':
+                created_at = db.func.datetime(created_at)
+            query = query.filter(or_(
+                created < created_at,
+                and_(created == created_at, FileUpload.id < file_id),
+            ))
+        records = (
+            query
+            .options(selectinload(FileUpload.recipients), defer(FileUpload.files_list))
+            .order_by(created.desc(), FileUpload.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+        next_cursor = _encode_transfers_cursor(records[limit - 1]) if len(records) > limit else None
+        return jsonify({
+            'transfers': [_transfer_summary(r) for r in records[:limit]],
+            'next_cursor': next_cursor,
+            'total': total,
+        }), 200
+    except Exception:
+        app.logger.exception("list_transfers failed")
+        return jsonify({'error': 'Internal error'}), 500
+
+
+@app.route('/api/transfers/active', methods=['GET', 'OPTIONS'])
+@require_auth
+def active_transfers():
+    """Uploads still being received or finalised, across all workers."""
     if request.method == 'OPTIONS':
         return jsonify({'message': 'ok'}), 200
     try:
-        records = FileUpload.query.order_by(FileUpload.created_at.desc()).all()
         result = []
-        for r in records:
-            files_list = r.get_files_list()
-            total_size = sum(f.get('size', 0) for f in files_list)
+        for snapshot in progress.active(app.config['UPLOAD_FOLDER']):
             result.append({
-                'id': r.id,
-                'filename': r.filename,
-                'sender_email': r.sender_email,
-                'recipient_email': r.email,
-                'created_at': r.created_at.isoformat() if r.created_at else None,
-                'expires_at': r.expires_at.isoformat(),
-                'downloaded': r.downloaded,
-                'file_count': len(files_list),
-                'total_size': total_size,
-                'expired': datetime.utcnow() > r.expires_at,
-                'notifications': {
-                    'recipient': {'status': r.notification_status_recipient, 'error': r.notification_error_recipient},
-                    'sender': {'status': r.notification_status_sender, 'error': r.notification_error_sender},
-                    'download': {'status': r.notification_status_download, 'error': r.notification_error_download},
-                },
+                'file_id': snapshot['file_id'],
+                'kind': snapshot['kind'],
+                'worker_pid': snapshot['pid'],
+                'started_at': datetime.utcfromtimestamp(snapshot['started_at']).isoformat(),
+                'stage': snapshot['stage'],
+                'stage_seconds': {name: round(sec, 3) for name, sec in snapshot['stages'].items()},
+                'bytes_received': snapshot['bytes_received'],
+                'expected_bytes': snapshot['expected_bytes'],
+                'mb_per_second': round(snapshot['bytes_per_second'] / (1024 * 1024), 2),
+                'idle_seconds': round(snapshot['idle_seconds'], 1),
             })
         return jsonify(result), 200
     except Exception:
-        app.logger.exception("list_transfers failed")
+        app.logger.exception("active_transfers failed")
         return jsonify({'error': 'Internal error'}), 500
 
 
@@ -724,21 +2110,452 @@ def delete_transfer(file_id):
         record = FileUpload.query.get(file_id)
         if not record:
             return jsonify({'error': 'Not found'}), 404
+        doomed = []
         try:
-            stored_name = safe_stored_filename(record.filename)
-            file_path = safe_join(app.config['UPLOAD_FOLDER'], stored_name)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        except (UnsafePathError, OSError):
+            doomed = blobs.release_transfer(app.config['UPLOAD_FOLDER'], record)
+        except UnsafePathError:
             app.logger.exception("Could not delete file for transfer %s", file_id)
-        db.session.delete(record)
-        db.session.commit()
+        try:
+            db.session.execute(delete(TransferFile).where(TransferFile.file_id == record.id))
+            db.session.delete(record)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            blobs.restore(doomed)
+            raise
+        blobs.purge(doomed)
+        _forget_transfer(file_id)
         return jsonify({'message': 'Deleted'}), 200
     except Exception:
         app.logger.exception("delete_transfer failed")
         return jsonify({'error': 'Internal error'}), 500
 
 
+# -------------------------------------------------------------------------
+# Bulk delete / expire
+#
+# Selected transfers are handled _BULK_BATCH at a time, each batch in one
+# transaction of set-based statements, on job_executor. Files released by a
+# committed batch are unlinked on purge_executor while the next batch runs.
+# -------------------------------------------------------------------------
+_BULK_BATCH = 200
+_BULK_MAX_IDS = 100000
+_BULK_FILTERS = {
+    'sender', 'recipient', 'downloaded', 'expired', 'notification_failed',
+    'created_from', 'created_to', 'older_than_days',
+}
+
+
+def _bulk_selection(body) -> tuple:
+    """``(ids, clauses)`` for a bulk request: the sorted, distinct ids it
+    lists, or None and the SQL conditions of its filter. Raises ValueError
+    on anything malformed, including a filter that would match every
+    transfer."""
+    ids = body.get('ids')
+    raw_filter = body.get('filter')
+    if (ids is None) == (raw_filter is None):
+        raise ValueError('ids or filter')
+    if ids is not None:
+        if (not isinstance(ids, list) or not ids or len(ids) > _BULK_MAX_IDS
+                or not all(isinstance(file_id, str) for file_id in ids)):
+            raise ValueError('ids')
+        return sorted(set(ids)), []
+
+    if not isinstance(raw_filter, dict) or set(raw_filter) - _BULK_FILTERS:
+        raise ValueError('filter')
+    # Same string forms as the /api/transfers query string.
+    args = {
+        name: 'true' if value is True else 'false' if value is False else str(value)
+        for name, value in raw_filter.items() if value is not None
+    }
+    clauses = _transfer_filters(args)
+    older_than = (args.get('older_than_days') or '').strip()
+    if older_than:
+        days = int(older_than)
+        if days < 0:
+            raise ValueError('older_than_days')
+        clauses.append(FileUpload.created_at < datetime.utcnow() - timedelta(days=days))
+    if not clauses:
+        raise ValueError('filter')
+    return None, clauses
+
+
+def _bulk_batches(ids, clauses):
+    """Yield ``(examined, rows)`` per batch: how many ids (or matches) were
+    looked at, and the (id, filename, blob_sha256) rows that exist, locked
+    until the batch commits."""
+    columns = (FileUpload.id, FileUpload.filename, FileUpload.blob_sha256)
+    if ids is not None:
+        for start in range(0, len(ids), _BULK_BATCH):
+            chunk = ids[start:start + _BULK_BATCH]
+            rows = db.session.query(*columns).filter(FileUpload.id.in_(chunk)).with_for_update().all()
+            yield len(chunk), rows
+        return
+    cursor = ''
+    while True:
+        rows = (
+            db.session.query(*columns)
+            .filter(*clauses, FileUpload.id > cursor)
+            .order_by(FileUpload.id)
+            .limit(_BULK_BATCH)
+            .with_for_update()
+            .all()
+        )
+        if not rows:
+            return
+        cursor = rows[-1].id
+        yield len(rows), rows
+
+
+def _bulk_delete(rows) -> tuple:
+    """Delete one batch of transfers in a single transaction. Returns the
+    number deleted and the paths to purge now that it has committed."""
+    upload_root = app.config['UPLOAD_FOLDER']
+    file_ids = [row.id for row in rows]
+    doomed = []
+    try:
+        for row in rows:
+            try:
+                doomed.extend(blobs.release_transfer(upload_root, row))
+            except UnsafePathError:
+                app.logger.warning("Refusing to delete %s (outside upload folder)", row.id)
+        no_sync = {'synchronize_session': False}
+        db.session.execute(
+            delete(TransferFile).where(TransferFile.file_id.in_(file_ids)), execution_options=no_sync,
+        )
+        db.session.execute(
+            delete(TransferRecipient).where(TransferRecipient.file_id.in_(file_ids)),
+            execution_options=no_sync,
+        )
+        deleted = db.session.execute(
+            delete(FileUpload).where(FileUpload.id.in_(file_ids)), execution_options=no_sync,
+        ).rowcount
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        blobs.restore(doomed)
+        raise
+    return deleted, doomed
+
+
+def _bulk_expire(rows) -> int:
+    """Expire one batch of transfers now. Their links stop working at once
+    on every worker, since expiry is never cached (see _transfer_info);
+    the files go with the next cleanup run. Returns the number expired."""
+    now = datetime.utcnow()
+    try:
+        expired = db.session.execute(
+            update(FileUpload)
+            .where(FileUpload.id.in_([row.id for row in rows]), FileUpload.expires_at > now)
+            .values(expires_at=now),
+            execution_options={'synchronize_session': False},
+        ).rowcount
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return expired
+
+
+def _run_bulk_job(job, action, ids, clauses) -> None:
+    # Same app context / session rules as the notification dispatcher above.
+    with app.app_context():
+        purges = []
+        try:
+            job.start()
+            for examined, rows in _bulk_batches(ids, clauses):
+                if not rows:
+                    db.session.rollback()
+                    job.advance(examined, 0)
+                    continue
+                try:
+                    if action == 'delete':
+                        affected, doomed = _bulk_delete(rows)
+                        purges.append(purge_executor.submit(blobs.purge, doomed))
+                    else:
+                        affected = _bulk_expire(rows)
+                except Exception:
+                    app.logger.exception("Bulk %s job %s: batch failed", action, job.job_id)
+                    job.advance(examined, 0, failed=len(rows))
+                    continue
+                file_ids = {row.id for row in rows}
+                transfer_cache.discard_if(lambda info: info['file_id'] in file_ids)
+                job.advance(examined, affected)
+            for future in purges:
+                try:
+                    future.result()
+                except OSError:
+                    app.logger.exception("Bulk %s job %s: could not remove files", action, job.job_id)
+            job.finish()
+            app.logger.info(
+                "Bulk %s job %s finished: %d affected, %d failed",
+                action, job.job_id, job.state['affected'], job.state['failed'],
+            )
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("Bulk %s job %s failed", action, job.job_id)
+            job.finish(error='Internal error')
+        finally:
+            db.session.remove()
+
+
+def _job_summary(state) -> dict:
+    summary = dict(state)
+    summary.pop('pid', None)
+    for name in ('created_at', 'updated_at', 'finished_at'):
+        if summary[name] is not None:
+            summary[name] = datetime.utcfromtimestamp(summary[name]).isoformat()
+    # A running job whose snapshot stops moving lost its worker.
+    summary['idle_seconds'] = (
+        round(max(0.0, time.time() - state['updated_at']), 1) if state['status'] == 'running' else None
+    )
+    return summary
+
+
+@app.route('/api/transfers/bulk', methods=['POST', 'OPTIONS'])
+@require_auth
+def bulk_transfers():
+    """Delete or expire many transfers: ``{"action": "delete" | "expire"}``
+    with either ``"ids": [...]`` or ``"filter": {...}`` (the /api/transfers
+    filters, plus ``older_than_days``). Answers 202 with a job to poll at
+    /api/transfers/bulk/<job_id>."""
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+    try:
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict) or body.get('action') not in ('delete', 'expire'):
+            return jsonify({'error': 'action must be "delete" or "expire"'}), 400
+        try:
+            ids, clauses = _bulk_selection(body)
+        except ValueError:
+            return jsonify({'error': 'Invalid ids or filter'}), 400
+        action = body['action']
+        if ids is not None:
+            total = len(ids)
+        else:
+            total = db.session.query(db.func.count(FileUpload.id)).filter(*clauses).scalar()
+        job = jobs.Job(app.config['UPLOAD_FOLDER'], action, total)
+        job_executor.submit(_run_bulk_job, job, action, ids, clauses)
+        app.logger.info("Queued bulk %s job %s for %d transfer(s)", action, job.job_id, total)
+        return jsonify(_job_summary(job.state)), 202
+    except Exception:
+        app.logger.exception("bulk_transfers failed")
+        return jsonify({'error': 'Internal error'}), 500
+
+
+@app.route('/api/transfers/bulk/<job_id>', methods=['GET', 'OPTIONS'])
+@require_auth
+def bulk_job_status(job_id):
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+    try:
+        state = jobs.load(app.config['UPLOAD_FOLDER'], job_id)
+        if state is None:
+            return jsonify({'error': 'Not found'}), 404
+        return jsonify(_job_summary(state)), 200
+    except Exception:
+        app.logger.exception("bulk_job_status failed")
+        return jsonify({'error': 'Internal error'}), 500
+
+
+@app.route('/api/stats/storage', methods=['GET', 'OPTIONS'])
+@require_auth
+def storage_stats():
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+    try:
+        usage = blobs.usage()
+        transfers, uploaded_bytes, download_bytes = db.session.query(
+            db.func.count(FileUpload.id),
+            db.func.coalesce(db.func.sum(FileUpload.total_size), 0),
+            db.func.coalesce(db.func.sum(FileUpload.stored_size), 0),
+        ).one()
+        usage.update({
+            'transfers': transfers,
+            'uploaded_bytes': int(uploaded_bytes),
+            'download_bytes': int(download_bytes),
+        })
+        return jsonify(usage), 200
+    except Exception:
+        app.logger.exception("storage_stats failed")
+        return jsonify({'error': 'Internal error'}), 500
+
+
+@app.route('/api/stats/compression', methods=['GET', 'OPTIONS'])
+@require_auth
+def compression_stats():
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+    try:
+        archives, input_bytes, saved_bytes, cpu_seconds = db.session.query(
+            db.func.count(FileUpload.id),
+            db.func.coalesce(db.func.sum(FileUpload.compression_input_bytes), 0),
+            db.func.coalesce(db.func.sum(FileUpload.compression_saved_bytes), 0),
+            db.func.coalesce(db.func.sum(FileUpload.compression_cpu_seconds), 0.0),
+        ).filter(FileUpload.compression_input_bytes.isnot(None)).one()
+        input_bytes, saved_bytes = int(input_bytes), int(saved_bytes)
+        return jsonify({
+            'archives': archives,
+            'input_bytes': input_bytes,
+            'saved_bytes': saved_bytes,
+            'saved_ratio': saved_bytes / input_bytes if input_bytes else 0.0,
+            'cpu_seconds': round(float(cpu_seconds), 3),
+        }), 200
+    except Exception:
+        app.logger.exception("compression_stats failed")
+        return jsonify({'error': 'Internal error'}), 500
+
+
+@app.route('/api/stats/integrity', methods=['GET', 'OPTIONS'])
+@require_auth
+def integrity_stats():
+    """Progress of the integrity scrubber and the transfers it flagged."""
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+    try:
+        state = scrub.load_state(app.config['UPLOAD_FOLDER'])
+        flagged = dict(db.session.query(
+            FileUpload.integrity_status, db.func.count(FileUpload.id),
+        ).filter(
+            FileUpload.integrity_status.in_((scrub.CORRUPT, scrub.MISSING)),
+        ).group_by(FileUpload.integrity_status).all())
+
+        def timestamp(value):
+            return datetime.utcfromtimestamp(value).isoformat() if value else None
+
+        current = None
+        if state.get('cursor') is not None:
+            current = {
+                'started_at': timestamp(state['started_at']),
+                'updated_at': timestamp(state['updated_at']),
+                'checked': state['checked'],
+                'total': state['total'],
+                'bytes': state['bytes'],
+                'corrupt': state['corrupt'],
+                'missing': state['missing'],
+                'mb_per_second': round(state['bytes_per_second'] / (1024 * 1024), 2),
+            }
+        last = state.get('last_pass')
+        next_pass = None
+        if current is None and state.get('completed_at'):
+            next_pass = timestamp(state['completed_at'] + app.config['SCRUB_INTERVAL_HOURS'] * 3600)
+        return jsonify({
+            'enabled': app.config['SCRUB_ENABLED'],
+            'current_pass': current,
+            'last_pass': {
+                'started_at': timestamp(last['started_at']),
+                'completed_at': timestamp(last['completed_at']),
+                'checked': last['checked'],
+                'bytes': last['bytes'],
+                'corrupt': last['corrupt'],
+                'missing': last['missing'],
+            } if last else None,
+            'next_pass_at': next_pass,
+            'flagged': {
+                'corrupt': flagged.get(scrub.CORRUPT, 0),
+                'missing': flagged.get(scrub.MISSING, 0),
+            },
+        }), 200
+    except Exception:
+        app.logger.exception("integrity_stats failed")
+        return jsonify({'error': 'Internal error'}), 500
+
+
+@app.route('/api/stats/mail', methods=['GET', 'OPTIONS'])
+@require_auth
+def mail_stats():
+    """Notifications waiting in the outbox, and what the mail dispatcher
+    reports about its recent sends."""
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+    try:
+        queue = outbox.depth()
+        status = mailer.load_status(app.config['UPLOAD_FOLDER'])
+
+        def timestamp(value):
+            return datetime.utcfromtimestamp(value).isoformat() if value else None
+
+        # The dispatcher refreshes its snapshot every OUTBOX_POLL_SECONDS;
+        # a much older one was left by a dispatcher that is gone.
+        stale_after = max(60, 3 * app.config['OUTBOX_POLL_SECONDS'])
+        dispatcher = None
+        if status.get('since') and time.time() - status['updated_at'] < stale_after:
+            dispatcher = {
+                'pid': status['pid'],
+                'since': timestamp(status['since']),
+                'updated_at': timestamp(status['updated_at']),
+                'concurrency': status['concurrency'],
+                'rate_per_minute': status['rate_per_minute'],
+                'sent': status['sent'],
+                'failed': status['failed'],
+                'send_seconds': status['send_seconds'],
+                'queued_seconds': status['queued_seconds'],
+            }
+        return jsonify({
+            'queue': {
+                'pending': queue['pending'],
+                'due': queue['due'],
+                'oldest_due_at': queue['oldest_due_at'].isoformat() if queue['oldest_due_at'] else None,
+            },
+            'dispatcher': dispatcher,
+        }), 200
+    except Exception:
+        app.logger.exception("mail_stats failed")
+        return jsonify({'error': 'Internal error'}), 500
+
+
+# /api/stats/overview documents by window length; admins refreshing the
+# dashboard share one computation per worker per STATS_CACHE_TTL.
+_overview_cache = LRUCache(16, ttl=app.config['STATS_CACHE_TTL'])
+_OVERVIEW_MAX_DAYS = 366
+
+
+def _ratio(part, whole) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+
+@app.route('/api/stats/overview', methods=['GET', 'OPTIONS'])
+@require_auth
+def overview_stats():
+    """Storage in use and, over the last ``days`` UTC days (default 30),
+    daily upload/download traffic, download and notification failure
+    rates, and the top senders. Read from the daily rollup (stats.py)."""
+    if request.method == 'OPTIONS':
+        return jsonify({'message': 'ok'}), 200
+    try:
+        days = int(request.args.get('days') or 30)
+    except ValueError:
+        return jsonify({'error': 'Invalid days'}), 400
+    days = max(1, min(days, _OVERVIEW_MAX_DAYS))
+    try:
+        overview = _overview_cache.get(days)
+        if overview is None:
+            until = datetime.utcnow().date()
+            series = stats.daily(until - timedelta(days=days - 1), until)
+            totals = {name: sum(day[name] for day in series) for name in stats.COUNTERS}
+            notifications = totals['notifications_sent'] + totals['notifications_failed']
+            totals['download_ratio'] = _ratio(totals['links_downloaded'], totals['links'])
+            totals['notification_failure_rate'] = _ratio(totals['notifications_failed'], notifications)
+            disk = shutil.disk_usage(app.config['UPLOAD_FOLDER'])
+            overview = {
+                'days': series,
+                'totals': totals,
+                'top_senders': stats.top_senders(until - timedelta(days=days - 1)),
+                'storage': dict(
+                    blobs.usage(), disk_total_bytes=disk.total, disk_free_bytes=disk.free,
+                ),
+                'generated_at': datetime.utcnow().isoformat(),
+            }
+            _overview_cache.put(days, overview)
+        response = jsonify(overview)
+        response.cache_control.private = True
+        response.cache_control.max_age = app.config['STATS_CACHE_TTL']
+        return response
+    except Exception:
+        app.logger.exception("overview_stats failed")
+        return jsonify({'error': 'Internal error'}), 500
+
+
 @app.route('/api/save-smtp-settings', methods=['POST', 'OPTIONS'])
 @require_auth
 def save_smtp_settings():
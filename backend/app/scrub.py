@@ -0,0 +1,187 @@
+"""
+Integrity scrubbing of stored transfers.
+
+``FileUpload.encrypted_data`` pins the SHA-256 of every stored file (of
+the manifest for lazy archives, whose members are pinned by the manifest
+in turn). The scrubber re-reads stored content in the background and
+compares, so bit-rot on the uploads volume is found by an admin rather
+than by a recipient opening a corrupt archive.
+
+A pass walks the transfers in id order. Its cursor and counters live in
+``UPLOAD_FOLDER/scrub/state.json``, so a pass interrupted by a restart
+resumes where it stopped instead of starting over. One process scrubs at
+a time: the ``scrub.lock`` file is flock()ed without blocking by
+whichever worker gets it first. Reads are paced by ``Throttle`` to a byte
+and an operation budget, which keeps the scrubber from competing with
+live downloads for the disk.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import time
+
+from . import archive, blobs
+from .snapshots import write_snapshot
+
+_SCRUB_DIR = 'scrub'
+_STATE_FILE = 'state.json'
+_LOCK_FILE = 'scrub.lock'
+
+OK = 'ok'
+CORRUPT = 'corrupt'
+MISSING = 'missing'
+
+
+class Throttle:
+    """Paces reads so they average at most ``bytes_per_second`` and
+    ``ops_per_second`` (0 lifts either limit). Credit for time spent
+    elsewhere -- hashing, the database, a file that was skipped -- is
+    capped at one second, so a stall is never followed by a burst."""
+
+    def __init__(self, bytes_per_second: float, ops_per_second: float):
+        self.bytes_per_second = bytes_per_second
+        self.ops_per_second = ops_per_second
+        self.bytes = 0
+        self.ops = 0
+        self._origin = time.monotonic()
+        self._window_bytes = 0
+        self._window_ops = 0
+
+    def consume(self, nbytes: int, ops: int = 1) -> None:
+        """Account for ``ops`` I/O operations moving ``nbytes``, sleeping
+        as long as that puts us ahead of budget."""
+        self.bytes += nbytes
+        self.ops += ops
+        self._window_bytes += nbytes
+        self._window_ops += ops
+        due = max(
+            self._window_bytes / self.bytes_per_second if self.bytes_per_second > 0 else 0.0,
+            self._window_ops / self.ops_per_second if self.ops_per_second > 0 else 0.0,
+        )
+        lag = time.monotonic() - (self._origin + due)
+        if lag < 0:
+            time.sleep(-lag)
+        elif lag > 1.0:
+            self._origin = time.monotonic()
+            self._window_bytes = self._window_ops = 0
+
+
+def hash_file(path: str, throttle: Throttle) -> str:
+    """SHA-256 of ``path``, read at the pace ``throttle`` allows."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        throttle.consume(0)
+        while True:
+            buf = fh.read(archive.COPY_BUFSIZE)
+            throttle.consume(len(buf))
+            if not buf:
+                break
+            sha256.update(buf)
+    return sha256.hexdigest()
+
+
+def _check(path: str, expected: str, throttle: Throttle, verified: set) -> tuple[str, str | None]:
+    """``(status, error)`` of the file at ``path`` against its expected
+    digest. Digests already verified in this pass (blobs shared by several
+    transfers) are not read again."""
+    if expected in verified:
+        return OK, None
+    try:
+        actual = hash_file(path, throttle)
+    except FileNotFoundError:
+        return MISSING, f"{os.path.basename(path)} is missing"
+    if actual != expected:
+        return CORRUPT, f"{os.path.basename(path)} hashes to {actual}, expected {expected}"
+    verified.add(expected)
+    return OK, None
+
+
+def verify(upload_root: str, record, throttle: Throttle, verified: set) -> tuple[str, str | None]:
+    """Re-hash what is stored for ``record`` (anything with the
+    ``filename``, ``blob_sha256`` and ``encrypted_data`` columns). Returns
+    ``(status, error)`` with status OK, CORRUPT or MISSING. Raises
+    UnsafePathError for a record whose filename escapes the upload folder."""
+    stored_path = blobs.stored_path(upload_root, record)
+    if not os.path.exists(stored_path):
+        return MISSING, "Stored file is missing"
+    if not archive.is_lazy(stored_path):
+        return _check(stored_path, record.encrypted_data, throttle, verified)
+
+    manifest_path = os.path.join(stored_path, archive.MANIFEST_NAME)
+    status, error = _check(manifest_path, record.encrypted_data, throttle, verified)
+    if status != OK:
+        return status, error
+    manifest = archive.read_manifest(stored_path)
+    members_root = os.path.join(stored_path, archive.MEMBERS_DIR)
+    for member in manifest['members']:
+        if not member['size']:
+            continue
+        if manifest.get('blobs'):
+            path = blobs.blob_path(upload_root, member['sha256'])
+        else:
+            path = os.path.join(members_root, *member['name'].split('/'))
+        status, error = _check(path, member['sha256'], throttle, verified)
+        if status != OK:
+            return status, f"{member['name']}: {error}"
+    return OK, None
+
+
+def try_lock(upload_root: str):
+    """Become the one scrubbing process. Returns the handle to pass to
+    ``unlock``, or None when another process holds it."""
+    directory = os.path.join(upload_root, _SCRUB_DIR)
+    os.makedirs(directory, exist_ok=True)
+    fh = open(os.path.join(directory, _LOCK_FILE), 'a+')
+    try:
+        fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        fh.close()
+        return None
+    return fh
+
+
+def unlock(fh) -> None:
+    if fh is None or fh.closed:
+        return
+    fcntl.flock(fh, fcntl.LOCK_UN)
+    fh.close()
+
+
+def new_pass(previous: dict, total: int) -> dict:
+    """State of a pass starting now over ``total`` transfers. The outcome
+    of the previous pass is kept for reporting."""
+    return {
+        'cursor': '',
+        'started_at': time.time(),
+        'updated_at': time.time(),
+        'total': total,
+        'checked': 0,
+        'bytes': 0,
+        'corrupt': 0,
+        'missing': 0,
+        'bytes_per_second': 0.0,
+        'completed_at': None,
+        'last_pass': previous.get('last_pass'),
+    }
+
+
+def finish_pass(state: dict) -> dict:
+    now = time.time()
+    summary = {key: state[key] for key in ('started_at', 'checked', 'bytes', 'corrupt', 'missing')}
+    summary['completed_at'] = now
+    return {'cursor': None, 'completed_at': now, 'last_pass': summary}
+
+
+def load_state(upload_root: str) -> dict:
+    try:
+        with open(os.path.join(upload_root, _SCRUB_DIR, _STATE_FILE), 'r', encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {'cursor': None, 'completed_at': None, 'last_pass': None}
+
+
+def save_state(upload_root: str, state: dict) -> None:
+    """Replace the persisted state atomically; a state that cannot be
+    written only costs re-reading some files after a restart."""
+    write_snapshot(os.path.join(upload_root, _SCRUB_DIR, _STATE_FILE), state)
@@ -0,0 +1,146 @@
+"""
+Pool of authenticated SMTP sessions.
+
+Opening a session costs a TCP connect, a TLS handshake and a login. Done
+for every message, that is several round trips per email, and bursts trip
+the connection-rate limits many providers enforce. The pool keeps
+sessions open between batches and hands them out again:
+
+* a session coming out of the pool is probed with NOOP first, and replaced
+  if the server no longer answers;
+* a session left unused for ``idle_timeout`` seconds is closed rather than
+  reused (servers drop idle clients on their own schedule anyway);
+* after ``max_messages`` messages a session is replaced by a fresh one,
+  staying under the per-connection limits of most relays;
+* a session the server dropped while it sat idle is reopened
+  transparently, and the message it failed retried once on the new one;
+* sessions are tied to the SMTP configuration they were opened with, so
+  editing smtp_config.json retires them all.
+
+Failures are raised unchanged for the caller to classify. A session whose
+use raised anything is closed instead of returning to the pool.
+"""
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+
+class _Session:
+    def __init__(self, connect, smtp_config: dict, max_messages: int):
+        self._connect = connect
+        self.smtp_config = smtp_config
+        self._max_messages = max_messages
+        self.server = connect(smtp_config)
+        self.sent = 0
+        self.broken = False
+        self.released_at = 0.0
+
+    def send(self, msg) -> None:
+        if self.sent >= self._max_messages:
+            self._reopen()
+        try:
+            self.server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._reopen()
+            self.server.send_message(msg)
+        except smtplib.SMTPResponseException as e:
+            # 421: the server is closing the connection.
+            if e.smtp_code == 421:
+                self.broken = True
+            raise
+        self.sent += 1
+
+    def alive(self) -> bool:
+        try:
+            return self.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def close(self) -> None:
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            try:
+                self.server.close()
+            except OSError:
+                pass
+
+    def _reopen(self) -> None:
+        # The old server stays in place until the new one is connected: if
+        # connecting fails, the caller gets the connect error (for it to
+        # classify) and close() still has something to close.
+        self.close()
+        self.broken = True
+        self.server = self._connect(self.smtp_config)
+        self.sent = 0
+        self.broken = False
+
+
+class SMTPPool:
+    """Idle SMTP sessions opened by ``connect(smtp_config)``, at most
+    ``size`` of them."""
+
+    def __init__(self, connect, size: int = 2, idle_timeout: float = 60.0, max_messages: int = 100):
+        self._connect = connect
+        self._size = size
+        self._idle_timeout = idle_timeout
+        self._max_messages = max_messages
+        self._lock = threading.Lock()
+        self._idle = []
+        self._smtp_config = None
+
+    @contextmanager
+    def session(self, smtp_config: dict):
+        """A session for ``smtp_config``: ``send(msg)`` as many messages as
+        needed. It goes back to the pool when the block exits normally."""
+        session = self._acquire(smtp_config)
+        try:
+            yield session
+        except BaseException:
+            session.close()
+            raise
+        self._release(session)
+
+    def prune(self) -> None:
+        """Close the sessions idle for longer than ``idle_timeout``."""
+        with self._lock:
+            expired = self._take_expired()
+        for session in expired:
+            session.close()
+
+    def _take_expired(self) -> list:
+        cutoff = time.monotonic() - self._idle_timeout
+        expired = [s for s in self._idle if s.released_at < cutoff]
+        self._idle = [s for s in self._idle if s.released_at >= cutoff]
+        return expired
+
+    def _acquire(self, smtp_config: dict) -> _Session:
+        with self._lock:
+            if smtp_config != self._smtp_config:
+                retired, self._idle = self._idle, []
+                self._smtp_config = smtp_config
+            else:
+                retired = self._take_expired()
+            candidate = self._idle.pop() if self._idle else None
+        for session in retired:
+            session.close()
+        # Probe outside the lock: NOOP is a round trip.
+        if candidate is not None:
+            if candidate.alive():
+                return candidate
+            candidate.close()
+        return _Session(self._connect, smtp_config, self._max_messages)
+
+    def _release(self, session: _Session) -> None:
+        with self._lock:
+            keep = (
+                not session.broken
+                and session.smtp_config == self._smtp_config
+                and len(self._idle) < self._size
+            )
+            if keep:
+                session.released_at = time.monotonic()
+                self._idle.append(session)
+        if not keep:
+            session.close()
@@ -0,0 +1,48 @@
+"""
+JSON snapshots shared between Gunicorn workers.
+
+Upload progress, bulk jobs, the mail dispatcher's status and the scrubber's
+cursor are each kept as a small JSON file under ``UPLOAD_FOLDER``, written
+by one thread and read by whichever worker serves the request asking for
+it. A snapshot is replaced atomically (write to a per-thread temporary
+name, then rename), so a reader never sees half of one. A snapshot that
+cannot be written is skipped: these are observability and resumption
+aids, never a reason to fail the work they describe.
+"""
+import json
+import os
+import threading
+import time
+
+
+def write_snapshot(path: str, state: dict) -> None:
+    """Replace the snapshot at ``path`` with ``state``, creating its
+    directory if needed. Errors writing it are ignored."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(state, fh)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def expire_snapshots(directory: str, max_age_seconds: float) -> int:
+    """Remove the files in ``directory`` not modified for
+    ``max_age_seconds``. Returns the number removed."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
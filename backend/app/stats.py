@@ -0,0 +1,106 @@
+"""
+Daily rollup of transfer activity.
+
+Transfers are deleted when they expire, so ``file_upload`` cannot answer
+"how much was sent last month", and summing it would cost a scan of every
+live transfer anyway. Instead each event adds to a counter row keyed by
+UTC day and sender: a recorded upload, a download request, the first
+download of a link, a notification attempt. Reading N days costs
+O(N x active senders) rows, however many transfers there were.
+
+Increments are upserts executed in the caller's ``db.session``
+transaction, so they commit (or roll back) together with the event they
+count and concurrent workers never lose an update.
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import update
+
+from . import db
+from .models import DailyStats
+
+COUNTERS = (
+    'transfers', 'links', 'uploaded_bytes', 'stored_bytes',
+    'downloads', 'downloaded_bytes', 'links_downloaded',
+    'notifications_sent', 'notifications_failed',
+)
+
+
+def bump(sender_email: str, day: date | None = None, **counts) -> None:
+    """Add ``counts`` (keyword per counter) to the row of ``sender_email``
+    for ``day`` (today, UTC, by default). Must be followed by a commit."""
+    counts = {name: int(value) for name, value in counts.items() if value}
+    if not counts:
+        return
+    unknown = set(counts) - set(COUNTERS)
+    if unknown:
+        raise ValueError(f"Unknown counters: {', '.join(sorted(unknown))}")
+    day = day or datetime.utcnow().date()
+    values = dict.fromkeys(COUNTERS, 0)
+    values.update(counts, day=day, sender_email=sender_email)
+
+    dialect = db.engine.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(DailyStats).values(**values)
+        stmt = stmt.on_duplicate_key_update(
+            **{name: getattr(DailyStats, name) + stmt.inserted[name] for name in counts}
+        )
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(DailyStats).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyStats.day, DailyStats.sender_email],
+            set_={name: getattr(DailyStats, name) + stmt.excluded[name] for name in counts},
+        )
+    else:
+        updated = db.session.execute(
+            update(DailyStats)
+            .where(DailyStats.day == day, DailyStats.sender_email == sender_email)
+            .values(**{name: getattr(DailyStats, name) + value for name, value in counts.items()})
+        ).rowcount
+        if updated:
+            return
+        stmt = DailyStats.__table__.insert().values(**values)
+    db.session.execute(stmt)
+
+
+def daily(since: date, until: date) -> list:
+    """One dict per day from ``since`` to ``until`` inclusive, every counter
+    summed over senders (zeros for days without activity)."""
+    rows = db.session.query(
+        DailyStats.day, *(db.func.sum(getattr(DailyStats, name)) for name in COUNTERS),
+    ).filter(
+        DailyStats.day >= since, DailyStats.day <= until,
+    ).group_by(DailyStats.day).all()
+    by_day = {row[0]: row[1:] for row in rows}
+    days = []
+    day = since
+    while day <= until:
+        sums = by_day.get(day) or (0,) * len(COUNTERS)
+        entry = {name: int(value or 0) for name, value in zip(COUNTERS, sums)}
+        entry['day'] = day.isoformat()
+        days.append(entry)
+        day += timedelta(days=1)
+    return days
+
+
+def top_senders(since: date, limit: int = 10) -> list:
+    """Senders with the most bytes uploaded since ``since``."""
+    uploaded = db.func.sum(DailyStats.uploaded_bytes)
+    rows = db.session.query(
+        DailyStats.sender_email, db.func.sum(DailyStats.transfers), uploaded,
+        db.func.sum(DailyStats.downloaded_bytes),
+    ).filter(
+        DailyStats.day >= since,
+    ).group_by(DailyStats.sender_email).order_by(uploaded.desc()).limit(limit).all()
+    return [{
+        'sender_email': sender,
+        'transfers': int(transfers or 0),
+        'uploaded_bytes': int(uploaded_bytes or 0),
+        'downloaded_bytes': int(downloaded_bytes or 0),
+    } for sender, transfers, uploaded_bytes, downloaded_bytes in rows]
+
+
+def is_empty() -> bool:
+    return db.session.query(DailyStats.day).first() is None
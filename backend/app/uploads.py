@@ -0,0 +1,290 @@
+"""
+Resumable chunked upload sessions.
+
+A session lives entirely on disk under ``UPLOAD_FOLDER/temp/<file_id>`` so it
+survives dropped connections, worker recycling and container restarts:
+
+* ``session.json`` -- metadata supplied at creation plus, per file, the
+  ranges of chunk indices received so far.
+* ``session.lock`` -- flock()ed around every read-modify-write of
+  ``session.json``: consecutive chunks of one session routinely land on
+  different Gunicorn worker processes.
+* ``data/<path>`` -- the files themselves, written in place at
+  ``chunk_index * chunk_size``.
+
+Nothing here touches the database. The FileUpload row is only created when
+the session is finalised, through the same packaging/notification path as a
+single-request upload (see ``_finalize_transfer`` in routes.py).
+"""
+import fcntl
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+
+from .paths import safe_join
+
+_STATE_FILE = 'session.json'
+_LOCK_FILE = 'session.lock'
+_DATA_DIR = 'data'
+_COPY_BUFSIZE = 1024 * 1024
+# A finalise that has been running this long is assumed to belong to a
+# worker that died mid-way, and may be retried.
+_FINALIZE_STALE_SECONDS = 3600
+
+
+class UploadSessionError(ValueError):
+    """Raised when a chunk or finalise request does not match the session state."""
+
+
+def session_dir(upload_root: str, file_id: str) -> str:
+    """Return the staging directory for ``file_id``. Only canonical UUIDs are
+    accepted, so the id can never smuggle path components."""
+    try:
+        canonical = str(uuid.UUID(file_id))
+    except (ValueError, TypeError, AttributeError):
+        raise UploadSessionError("Invalid session id")
+    if canonical != file_id:
+        raise UploadSessionError("Invalid session id")
+    return os.path.join(upload_root, 'temp', canonical)
+
+
+def data_dir(directory: str) -> str:
+    return os.path.join(directory, _DATA_DIR)
+
+
+@contextmanager
+def _locked(directory: str):
+    with open(os.path.join(directory, _LOCK_FILE), 'a+') as lock_fh:
+        fcntl.flock(lock_fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_fh, fcntl.LOCK_UN)
+
+
+def _read_state(directory: str) -> dict | None:
+    try:
+        with open(os.path.join(directory, _STATE_FILE), 'r', encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+def _write_state(directory: str, state: dict) -> None:
+    # Write-then-rename so a crash mid-write never leaves a truncated file.
+    tmp_path = os.path.join(directory, _STATE_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(state, fh)
+    os.replace(tmp_path, os.path.join(directory, _STATE_FILE))
+
+
+def _chunk_count(size: int, chunk_size: int) -> int:
+    return (size + chunk_size - 1) // chunk_size
+
+
+def _add_to_ranges(ranges: list, index: int) -> list:
+    """Insert ``index`` into a sorted list of inclusive [start, end] ranges,
+    merging neighbours. Keeps session.json small for 50 GB transfers."""
+    merged = []
+    for start, end in sorted(ranges + [[index, index]]):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def create_session(upload_root: str, file_id: str, meta: dict, files: list, chunk_size: int) -> dict:
+    """Create the on-disk session. ``files`` is a list of ``{'name', 'size'}``
+    dicts whose names are validated (and sparse data files pre-created) here;
+    raises UnsafePathError on any name that cannot be made safe."""
+    directory = session_dir(upload_root, file_id)
+    root = data_dir(directory)
+    os.makedirs(root, exist_ok=True)
+
+    entries = []
+    for entry in files:
+        target = safe_join(root, entry['name'])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as fh:
+            fh.truncate(entry['size'])
+        entries.append({
+            'name': entry['name'],
+            'relative': os.path.relpath(target, root).replace(os.sep, '/'),
+            'size': entry['size'],
+            'received': [],
+        })
+
+    state = dict(meta, file_id=file_id, chunk_size=chunk_size,
+                 created_at=time.time(), files=entries)
+    with _locked(directory):
+        _write_state(directory, state)
+    return state
+
+
+def load_session(upload_root: str, file_id: str) -> dict | None:
+    directory = session_dir(upload_root, file_id)
+    if not os.path.isdir(directory):
+        return None
+    with _locked(directory):
+        return _read_state(directory)
+
+
+def write_chunk(upload_root: str, file_id: str, file_index: int, chunk_index: int, stream) -> dict:
+    """Copy one chunk from ``stream`` into place and record it as received.
+    The chunk body must be exactly the expected length (``chunk_size``, or
+    the remainder for the last chunk); anything else is rejected without
+    being recorded so the client simply re-sends it. Re-sending an already
+    received chunk is harmless. Returns the updated session state."""
+    directory = session_dir(upload_root, file_id)
+    state = load_session(upload_root, file_id)
+    if state is None:
+        raise FileNotFoundError(file_id)
+    if not 0 <= file_index < len(state['files']):
+        raise UploadSessionError("Unknown file index")
+    entry = state['files'][file_index]
+    chunk_size = state['chunk_size']
+    if not 0 <= chunk_index < _chunk_count(entry['size'], chunk_size):
+        raise UploadSessionError("Chunk index out of range")
+
+    offset = chunk_index * chunk_size
+    expected = min(chunk_size, entry['size'] - offset)
+    target = safe_join(data_dir(directory), entry['relative'])
+
+    written = 0
+    with open(target, 'r+b') as fh:
+        fh.seek(offset)
+        while written <= expected:
+            buf = stream.read(min(_COPY_BUFSIZE, expected + 1 - written))
+            if not buf:
+                break
+            if written + len(buf) > expected:
+                raise UploadSessionError("Chunk larger than expected")
+            fh.write(buf)
+            written += len(buf)
+    if written != expected:
+        raise UploadSessionError("Chunk shorter than expected")
+
+    with _locked(directory):
+        state = _read_state(directory)
+        if state is None:
+            raise FileNotFoundError(file_id)
+        entry = state['files'][file_index]
+        entry['received'] = _add_to_ranges(entry['received'], chunk_index)
+        _write_state(directory, state)
+    return state
+
+
+def received_byte_ranges(state: dict, file_index: int) -> list:
+    """Received data of one file as half-open ``[start, end)`` byte ranges."""
+    entry = state['files'][file_index]
+    chunk_size = state['chunk_size']
+    return [
+        [start * chunk_size, min((end + 1) * chunk_size, entry['size'])]
+        for start, end in entry['received']
+    ]
+
+
+def received_bytes(state: dict) -> int:
+    """Total bytes received so far across every file of the session."""
+    return sum(
+        end - start
+        for file_index in range(len(state['files']))
+        for start, end in received_byte_ranges(state, file_index)
+    )
+
+
+def missing_chunks(state: dict, file_index: int) -> int:
+    entry = state['files'][file_index]
+    have = sum(end - start + 1 for start, end in entry['received'])
+    return _chunk_count(entry['size'], state['chunk_size']) - have
+
+
+def is_complete(state: dict) -> bool:
+    return all(missing_chunks(state, i) == 0 for i in range(len(state['files'])))
+
+
+def begin_finalize(upload_root: str, file_id: str) -> dict:
+    """Mark the session as finalising so a retried or duplicated /complete
+    call cannot package the same files twice. Returns the session state."""
+    directory = session_dir(upload_root, file_id)
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(file_id)
+    with _locked(directory):
+        state = _read_state(directory)
+        if state is None:
+            raise FileNotFoundError(file_id)
+        started = state.get('finalizing_at')
+        if started and time.time() - started < _FINALIZE_STALE_SECONDS:
+            raise UploadSessionError("Session is already being finalised")
+        if not is_complete(state):
+            raise UploadSessionError("Session is missing chunks")
+        state['finalizing_at'] = time.time()
+        _write_state(directory, state)
+    return state
+
+
+def abort_finalize(upload_root: str, file_id: str) -> None:
+    """Clear the finalising flag after a failed finalise so it can be retried."""
+    directory = session_dir(upload_root, file_id)
+    if not os.path.isdir(directory):
+        return
+    with _locked(directory):
+        state = _read_state(directory)
+        if state is not None:
+            state.pop('finalizing_at', None)
+            _write_state(directory, state)
+
+
+def staged_files(upload_root: str, state: dict) -> list:
+    """File entries in the shape ``_finalize_transfer`` expects."""
+    root = data_dir(session_dir(upload_root, state['file_id']))
+    return [
+        {
+            'relative': entry['relative'],
+            'size': entry['size'],
+            'abs': safe_join(root, entry['relative']),
+        }
+        for entry in state['files']
+    ]
+
+
+def discard_session(upload_root: str, file_id: str) -> None:
+    shutil.rmtree(session_dir(upload_root, file_id), ignore_errors=True)
+
+
+def expire_stale_sessions(upload_root: str, max_age_seconds: float) -> int:
+    """Remove staging entries untouched for ``max_age_seconds``. Covers
+    abandoned chunked sessions as well as temp dirs and ``.part`` files left
+    behind by a single-request upload whose worker was killed mid-request.
+    Returns the number of entries removed."""
+    temp_root = os.path.join(upload_root, 'temp')
+    if not os.path.isdir(temp_root):
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for name in os.listdir(temp_root):
+        directory = os.path.join(temp_root, name)
+        if not os.path.isdir(directory):
+            try:
+                if os.path.getmtime(directory) < cutoff:
+                    os.remove(directory)
+                    removed += 1
+            except OSError:
+                pass
+            continue
+        try:
+            state_path = os.path.join(directory, _STATE_FILE)
+            last_touched = max(
+                os.path.getmtime(directory),
+                os.path.getmtime(state_path) if os.path.exists(state_path) else 0,
+            )
+        except OSError:
+            continue
+        if last_touched < cutoff:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    return removed
@@ -0,0 +1,26 @@
+"""
+Environment shared by the benchmarks. The app is initialised at import
+(see app/__init__.py), so each benchmark imports this module first: it
+points the app at a throwaway upload folder, data folder and SQLite
+database (unless DATABASE_URL is already set, to measure against MariaDB),
+keeps the background scrubber off, and makes ``app`` importable.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = tempfile.mkdtemp(prefix='itransfer-bench-')
+atexit.register(shutil.rmtree, ROOT, ignore_errors=True)
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(ROOT, 'app.db'))
+os.environ.update(
+    UPLOAD_FOLDER=os.path.join(ROOT, 'uploads'),
+    DATA_FOLDER=os.path.join(ROOT, 'data'),
+    ADMIN_USERNAME='admin',
+    ADMIN_PASSWORD='secret',
+    FORCE_HTTPS='false',
+    SCRUB_ENABLED='false',
+    UPLOAD_MIN_FREE_BYTES='0',
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
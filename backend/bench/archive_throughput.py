@@ -0,0 +1,107 @@
+"""
+Packaging throughput: archive.ZipBuilder against a serial zipfile.
+
+Builds the same folder three ways, as 1, 100 and 10,000 files of
+compressible text totalling --total-mb:
+
+* serial:   zipfile.ZipFile(..., ZIP_DEFLATED).write() per member, the
+            packaging step before the parallel builder;
+* builder:  ZipBuilder on a one-thread pool;
+* parallel: ZipBuilder on an ARCHIVE_WORKERS-thread pool, as the app runs.
+
+All three write through HashingWriter, as uploads do. Each builder archive is
+checked with zipfile (names and CRCs) before its time is reported. The
+speed-up tracks the number of cores, so run it on the deployment hardware.
+
+    python bench/archive_throughput.py [--total-mb 128] [--workers N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import _env
+from app import app, archive, compression
+
+_WORDS = [
+    ''.join(random.Random(seed).choice('abcdefghijklmnopqrstuvwxyz') for _ in range(seed % 9 + 2))
+    for seed in range(2000)
+]
+
+
+def _make_folder(root: str, count: int, total: int) -> list:
+    rng = random.Random(count)
+    size = total // count
+    text = ' '.join(rng.choice(_WORDS) for _ in range(size // 4)).encode()
+    files = []
+    for index in range(count):
+        name = f'folder/{index // 1000:02d}/file-{index:05d}.txt'
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        offset = rng.randrange(len(text) // 2)
+        with open(path, 'wb') as fh:
+            fh.write((text[offset:] + text)[:size])
+        files.append((name, path))
+    return files
+
+
+def _serial(files, out_path: str) -> None:
+    with open(out_path, 'wb') as fh, zipfile.ZipFile(
+        archive.HashingWriter(fh), 'w', zipfile.ZIP_DEFLATED,
+        compresslevel=app.config['ZIP_COMPRESSION_LEVEL'], allowZip64=True,
+    ) as zf:
+        for name, path in files:
+            zf.write(path, name)
+
+
+def _builder(files, out_path: str, executor, workers: int) -> None:
+    with open(out_path, 'wb') as fh:
+        builder = archive.ZipBuilder(
+            archive.HashingWriter(fh), executor,
+            compression.CompressionPolicy.from_config(app.config), max_pending=2 * workers,
+        )
+        for name, path in files:
+            with open(path, 'rb') as src:
+                builder.add(name, src)
+        builder.close()
+
+
+def _check(files, out_path: str) -> None:
+    with zipfile.ZipFile(out_path) as zf:
+        assert zf.namelist() == [name for name, _ in files]
+        assert zf.testzip() is None
+
+
+def _timed(build) -> float:
+    started = time.perf_counter()
+    build()
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--total-mb', type=int, default=128)
+    parser.add_argument('--workers', type=int, default=app.config['ARCHIVE_WORKERS'])
+    args = parser.parse_args()
+    total = args.total_mb * 1024 * 1024
+
+    print(f'{os.cpu_count()} CPU(s), {args.workers} builder thread(s), {args.total_mb} MB per folder')
+    print(f"{'files':>6} {'serial':>9} {'builder':>9} {'parallel':>9} {'speed-up':>9}")
+    with ThreadPoolExecutor(1) as single, ThreadPoolExecutor(args.workers) as pool:
+        for count in (1, 100, 10000):
+            files = _make_folder(os.path.join(_env.ROOT, f'in-{count}'), count, total)
+            out_path = os.path.join(_env.ROOT, f'out-{count}.zip')
+            serial = _timed(lambda: _serial(files, out_path))
+            one = _timed(lambda: _builder(files, out_path, single, 1))
+            _check(files, out_path)
+            parallel = _timed(lambda: _builder(files, out_path, pool, args.workers))
+            _check(files, out_path)
+            print(f'{count:>6} {serial:>8.2f}s {one:>8.2f}s {parallel:>8.2f}s {serial / parallel:>8.2f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Slow downloads against the Gunicorn worker model.
+
+Seeds one --size-mb transfer, then for each worker model starts Gunicorn
+with gunicorn.conf.py on a free port and:
+
+* opens --slow-clients downloads of it that read --client-kbps each, with
+  a small receive buffer, like recipients on poor links;
+* meanwhile polls /transfer/<id> (what the download page asks first) every
+  --probe-interval seconds for --duration seconds, each probe timing out
+  after --probe-timeout.
+
+It reports how many slow downloads had started receiving by the end and
+the probe latencies. The models are sync (GUNICORN_WORKER_CLASS=sync, one
+connection per worker process, as the backend ran before) and gthread
+with --threads per worker; both use --workers processes.
+
+    python bench/concurrency.py [--workers 2] [--threads 32] [--slow-clients 16]
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import _env
+
+_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_CHUNK = 1024 * 1024
+
+
+def _seed(size_mb: int, root: str) -> None:
+    # Into the parent's folders, not the throwaway ones of this process.
+    os.environ.update(
+        UPLOAD_FOLDER=os.path.join(root, 'uploads'),
+        DATA_FOLDER=os.path.join(root, 'data'),
+        ITRANSFER_MIGRATE_ONLY='1',
+    )
+    import io
+    from app import app, routes
+
+    routes._rate_limit = lambda *args, **kwargs: True
+    client = app.test_client()
+    token = client.post('/login', json={'username': 'admin', 'password': 'secret'}).get_json()['token']
+    content = os.urandom(_CHUNK) * size_mb
+    response = client.post('/upload', headers={'Authorization': f'Bearer {token}'}, data={
+        'email': 'recipient@example.com',
+        'sender_email': 'sender@example.com',
+        'files_list': json.dumps([{'name': 'data.bin', 'size': len(content)}]),
+        'paths[]': ['data.bin'],
+        'files[]': [(io.BytesIO(content), 'data.bin')],
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_json()
+    print(json.dumps({'file_id': response.get_json()['file_id']}))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get(port: int, path: str, timeout: float) -> int:
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def _start_server(port: int, worker_class: str, workers: int, threads: int, file_id: str):
+    env = dict(
+        os.environ, GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_WORKERS=str(workers), GUNICORN_THREADS=str(threads),
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'app:app'],
+        cwd=_BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if _get(port, f'/transfer/{file_id}', 2) == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError('Gunicorn did not come up')
+
+
+def _stop_server(server) -> None:
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def _slow_download(port: int, file_id: str, rate: float, stop: threading.Event, started: list) -> None:
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 * 1024)
+    try:
+        sock.connect(('127.0.0.1', port))
+        sock.sendall(f'GET /download/{file_id} HTTP/1.1\r\nHost: bench\r\n\r\n'.encode())
+        sock.settimeout(0.5)
+        first = True
+        while not stop.is_set():
+            try:
+                data = sock.recv(4096)
+            except socket.timeout:
+                continue
+            if not data:
+                return
+            if first:
+                started.append(True)
+                first = False
+            stop.wait(len(data) / rate)
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+
+def _run(args, worker_class: str, threads: int, file_id: str) -> dict:
+    port = _free_port()
+    server = _start_server(port, worker_class, args.workers, threads, file_id)
+    stop = threading.Event()
+    started = []
+    clients = [
+        threading.Thread(target=_slow_download, args=(port, file_id, args.client_kbps * 1024, stop, started))
+        for _ in range(args.slow_clients)
+    ]
+    try:
+        for thread in clients:
+            thread.start()
+        time.sleep(1)
+        latencies, timeouts = [], 0
+        deadline = time.monotonic() + args.duration
+        while time.monotonic() < deadline:
+            began = time.perf_counter()
+            try:
+                assert _get(port, f'/transfer/{file_id}', args.probe_timeout) == 200
+                latencies.append(time.perf_counter() - began)
+            except OSError:
+                timeouts += 1
+            time.sleep(args.probe_interval)
+        # Before the clients hang up: a sync worker they free would start
+        # the next queued download at once.
+        downloading = len(started)
+    finally:
+        stop.set()
+        for thread in clients:
+            thread.join()
+        _stop_server(server)
+    return {'started': downloading, 'latencies': latencies, 'timeouts': timeouts}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--slow-clients', type=int, default=16)
+    parser.add_argument('--client-kbps', type=float, default=256)
+    parser.add_argument('--size-mb', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--probe-interval', type=float, default=0.2)
+    parser.add_argument('--probe-timeout', type=float, default=2)
+    parser.add_argument('--seed', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.seed:
+        _seed(args.size_mb, args.seed)
+        return 0
+
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--seed', _env.ROOT, '--size-mb', str(args.size_mb)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    file_id = json.loads(output.strip().splitlines()[-1])['file_id']
+
+    print(f'{args.slow_clients} slow downloads at {args.client_kbps:.0f} KB/s, {args.workers} workers')
+    print(f"{'model':>12} {'downloading':>12} {'probe p50':>10} {'probe p95':>10} {'timeouts':>9}")
+    for worker_class, threads in (('sync', 1), ('gthread', args.threads)):
+        result = _run(args, worker_class, threads, file_id)
+        latencies = sorted(result['latencies'])
+        if latencies:
+            p50 = f'{statistics.median(latencies) * 1000:.1f}ms'
+            p95 = f'{latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f}ms'
+        else:
+            p50 = p95 = '-'
+        probes = len(latencies) + result['timeouts']
+        label = worker_class if worker_class == 'sync' else f'gthread x{threads}'
+        print(f"{label:>12} {result['started']:>6}/{args.slow_clients:<5} {p50:>10} {p95:>10} "
+              f"{result['timeouts']:>4}/{probes:<4}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Admin listing and expiry cleanup against a large file_upload table.
+
+Seeds --rows transfers (one recipient each, --expired-pct of them past
+their expiry), then times GET /api/transfers (first page with its total,
+a later page through the cursor, the sender, recipient and expired
+filters) and one _cleanup_expired_files() pass, twice from the same
+seeded database:
+
+* indexed:   the schema as migrated;
+* unindexed: without the listing and cleanup indexes (migration 3:
+             created_at/id, expires_at, sender_email, email, recipient
+             email; migration 8: the SQLite created_at expression), as
+             before they were added.
+
+Listing times are medians over --repeat requests; the cleanup runs once
+(it deletes the expired rows) on a fresh copy of the database.
+
+    python bench/list_transfers.py [--rows 100000] [--expired-pct 1] [--repeat 5]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import _env
+
+# Keep the cleanup scheduler from running on its own at import.
+os.environ['ITRANSFER_MIGRATE_ONLY'] = '1'
+
+from sqlalchemy import insert, text  # noqa: E402
+
+from app import _cleanup_expired_files, app, db, routes  # noqa: E402
+from app.models import FileUpload, TransferRecipient  # noqa: E402
+
+_DB = os.path.join(_env.ROOT, 'app.db')
+_SEEDED = os.path.join(_env.ROOT, 'seeded.db')
+_SENDERS = 200
+_RECIPIENTS = 5000
+# What migrations 3 and 8 added; transfer_recipient.file_id came with its
+# table.
+_LISTING_INDEXES = (
+    *(index.name for index in FileUpload.__table__.indexes),
+    'ix_transfer_recipient_email',
+    'ix_file_upload_created_at_sqlite',
+)
+
+
+def _seed(rows: int, expired_pct: float) -> None:
+    now = datetime.utcnow()
+    expired_every = int(100 / expired_pct) if expired_pct else 0
+    for start in range(0, rows, 5000):
+        uploads, recipients = [], []
+        for n in range(start, min(start + 5000, rows)):
+            file_id = str(uuid.uuid4())
+            created = now - timedelta(minutes=rows - n)
+            expired = expired_every and n % expired_every == 0
+            uploads.append({
+                'id': file_id,
+                'filename': f'{file_id}.zip',
+                'email': f'recipient{n % _RECIPIENTS}@example.com',
+                'sender_email': f'sender{n % _SENDERS}@example.com',
+                'encrypted_data': 'x',
+                'downloaded': n % 3 == 0,
+                'created_at': created,
+                'expires_at': now - timedelta(days=1) if expired else now + timedelta(days=7),
+                'file_count': 3,
+                'total_size': 3 * 1024 * 1024,
+                'stored_size': 3 * 1024 * 1024,
+            })
+            recipients.append({
+                'id': str(uuid.uuid4()),
+                'file_id': file_id,
+                'position': 0,
+                'email': f'recipient{n % _RECIPIENTS}@example.com',
+            })
+        db.session.execute(insert(FileUpload), uploads)
+        db.session.execute(insert(TransferRecipient), recipients)
+        db.session.commit()
+
+
+def _restore(indexed: bool) -> None:
+    db.session.remove()
+    db.engine.dispose()
+    shutil.copyfile(_SEEDED, _DB)
+    if not indexed:
+        with db.engine.begin() as conn:
+            for name in _LISTING_INDEXES:
+                conn.execute(text(f'DROP INDEX {name}'))
+
+
+def _median_ms(client, headers, url: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        times.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.get_json()
+    return statistics.median(times) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--expired-pct', type=float, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite:///' + _env.ROOT):
+        sys.exit('list_transfers.py copies its database between runs: SQLite only')
+
+    routes._rate_limit = lambda *a, **kw: True
+    client = app.test_client()
+    token = client.post('/login', json={'username': 'admin', 'password': 'secret'}).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    with app.app_context():
+        started = time.perf_counter()
+        _seed(args.rows, args.expired_pct)
+        print(f'seeded {args.rows} transfers in {time.perf_counter() - started:.1f}s')
+        db.session.remove()
+        db.engine.dispose()
+        shutil.copyfile(_DB, _SEEDED)
+
+        results = {}
+        for variant in ('unindexed', 'indexed'):
+            _restore(variant == 'indexed')
+            cursor = client.get('/api/transfers?limit=50', headers=headers).get_json()['next_cursor']
+            timings = {
+                'first page': _median_ms(client, headers, '/api/transfers?limit=50', args.repeat),
+                'next page': _median_ms(client, headers, f'/api/transfers?limit=50&cursor={cursor}', args.repeat),
+                'sender filter': _median_ms(client, headers, '/api/transfers?sender=sender7@example.com', args.repeat),
+                'recipient filter': _median_ms(
+                    client, headers, '/api/transfers?recipient=recipient7@example.com', args.repeat,
+                ),
+                'expired filter': _median_ms(client, headers, '/api/transfers?expired=true', args.repeat),
+            }
+            remaining = FileUpload.query.count()
+            started = time.perf_counter()
+            _cleanup_expired_files()
+            timings['cleanup'] = (time.perf_counter() - started) * 1000
+            assert FileUpload.query.filter(FileUpload.expires_at < datetime.utcnow()).count() == 0
+            print(f'{variant}: cleanup removed {remaining - FileUpload.query.count()} expired transfers')
+            results[variant] = timings
+
+    print(f"{'':>18} {'unindexed':>11} {'indexed':>11}")
+    for name in results['indexed']:
+        print(f"{name:>18} {results['unindexed'][name]:>9.1f}ms {results['indexed'][name]:>9.1f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
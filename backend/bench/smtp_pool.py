@@ -0,0 +1,147 @@
+"""
+Notification throughput: pooled SMTP sessions against one per message.
+
+Sends --messages emails to a local aiosmtpd stub that speaks STARTTLS and
+AUTH like a relay, twice:
+
+* unpooled: send_email_with_smtp() per message (connect, STARTTLS, login,
+            send, QUIT), as notifications went out before the pool;
+* pooled:   send_batch() over batches of --batch messages, as the mail
+            dispatcher sends them, reusing the pooled session.
+
+--rtt-ms delays every server reply to stand in for the round trip to a
+real relay; on loopback only the TLS handshake and login cost show.
+Needs aiosmtpd (pip install aiosmtpd) and the openssl command line, for
+the stub's throwaway certificate.
+
+    python bench/smtp_pool.py [--messages 200] [--batch 20] [--rtt-ms 0 20]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import ssl
+import subprocess
+import sys
+import time
+from email.message import EmailMessage
+
+import _env
+
+try:
+    from aiosmtpd.controller import Controller
+    from aiosmtpd.smtp import SMTP, AuthResult
+except ImportError:
+    sys.exit('smtp_pool.py needs aiosmtpd: pip install aiosmtpd')
+# aiosmtpd logs a deprecation warning of its own on every AUTH.
+logging.getLogger('mail.log').setLevel(logging.ERROR)
+
+os.environ['ITRANSFER_MIGRATE_ONLY'] = '1'  # no dispatcher competing for the stub
+
+from app import routes  # noqa: E402
+
+_USER, _PASSWORD = 'bench', 'secret'
+
+
+class _Sink:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return '250 OK'
+
+
+class _SlowSMTP(SMTP):
+    """Replies after ``rtt`` seconds, as if the client were that far away."""
+
+    rtt = 0.0
+
+    async def push(self, status):
+        if self.rtt:
+            await asyncio.sleep(self.rtt)
+        await super().push(status)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class _Relay(Controller):
+    def __init__(self, handler, tls_context, rtt):
+        super().__init__(handler, hostname='127.0.0.1', port=_free_port())
+        self._tls_context = tls_context
+        self._rtt = rtt
+
+    def factory(self):
+        server = _SlowSMTP(
+            self.handler, tls_context=self._tls_context, require_starttls=True,
+            authenticator=lambda server, session, envelope, mechanism, auth_data: AuthResult(
+                success=auth_data.login == _USER.encode() and auth_data.password == _PASSWORD.encode(),
+            ),
+        )
+        server.rtt = self._rtt
+        return server
+
+
+def _tls_context() -> ssl.SSLContext:
+    cert, key = os.path.join(_env.ROOT, 'cert.pem'), os.path.join(_env.ROOT, 'key.pem')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-subj', '/CN=localhost', '-keyout', key, '-out', cert,
+    ], check=True, capture_output=True)
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def _message(n: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg['From'] = 'sender@example.com'
+    msg['To'] = f'recipient{n}@example.com'
+    msg['Subject'] = f'Transfer {n}'
+    msg.set_content('A file has been shared with you.\n' * 20)
+    return msg
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=20)
+    parser.add_argument('--rtt-ms', type=float, nargs='+', default=[0, 20])
+    args = parser.parse_args()
+
+    tls_context = _tls_context()
+    messages = [_message(n) for n in range(args.messages)]
+    print(f"{'rtt':>6} {'unpooled':>12} {'pooled':>12} {'speed-up':>9}")
+    for rtt_ms in args.rtt_ms:
+        sink = _Sink()
+        relay = _Relay(sink, tls_context, rtt_ms / 1000)
+        relay.start()
+        try:
+            smtp_config = {
+                'smtp_server': relay.hostname, 'smtp_port': relay.port,
+                'smtp_user': _USER, 'smtp_password': _PASSWORD,
+            }
+            started = time.perf_counter()
+            for msg in messages:
+                routes.send_email_with_smtp(msg, smtp_config)
+            unpooled = args.messages / (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for start in range(0, args.messages, args.batch):
+                results = routes.send_batch(messages[start:start + args.batch], smtp_config)
+                assert all(ok for ok, _, _ in results), results
+            pooled = args.messages / (time.perf_counter() - started)
+        finally:
+            relay.stop()
+        assert sink.received == 2 * args.messages, sink.received
+        print(f'{rtt_ms:>4.0f}ms {unpooled:>8.1f} msg/s {pooled:>8.1f} msg/s {pooled / unpooled:>8.1f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
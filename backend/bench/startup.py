@@ -0,0 +1,96 @@
+"""
+Worker start-up cost of the schema check.
+
+Against one throwaway database:
+
+1. migrate.py on a fresh database, as gunicorn.conf.py runs it once before
+   forking (a process of its own, wall time);
+2. importing the app with the schema current, as every worker does (a
+   fresh process each time, median wall time);
+3. in one process, the check a worker now makes (``ensure_current``)
+   against the introspection every worker used to run at each start
+   (``create_all`` plus the column and index checks), median over
+   --repeat calls.
+
+With DATABASE_URL set, it measures that database instead (it must be
+empty). The advisory lock the old start-up took on MySQL is not modelled.
+
+    python bench/startup.py [--repeat 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import _env
+
+_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _child_checks(repeat: int) -> None:
+    os.environ['ITRANSFER_MIGRATE_ONLY'] = '1'
+    from app import app, migrations
+
+    def median_ms(check) -> float:
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            check()
+            times.append(time.perf_counter() - started)
+        return statistics.median(times) * 1000
+
+    def introspect() -> None:
+        migrations._create_tables()
+        migrations._add_file_upload_columns()
+        migrations._create_indexes()
+
+    with app.app_context():
+        print(json.dumps({
+            'version_check_ms': median_ms(migrations.ensure_current),
+            'introspection_ms': median_ms(introspect),
+        }))
+
+
+def _wall(args: list) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *args], check=True, capture_output=True, cwd=_BACKEND)
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child_checks(args.repeat)
+        return 0
+
+    # The children inherit DATABASE_URL (see _env), so they all share this
+    # run's database.
+    print(f"database: {os.environ['DATABASE_URL']}")
+    print(f'fresh migrate (migrate.py): {_wall(["migrate.py"]) * 1000:.0f}ms')
+
+    imports = [
+        _wall(['-c', 'import os; os.environ["ITRANSFER_MIGRATE_ONLY"] = "1"; import app'])
+        for _ in range(args.repeat)
+    ]
+    baseline = [_wall(['-c', 'import flask_sqlalchemy']) for _ in range(args.repeat)]
+    print(f'worker import, schema current: {statistics.median(imports) * 1000:.0f}ms '
+          f'(interpreter and Flask/SQLAlchemy imports alone: {statistics.median(baseline) * 1000:.0f}ms)')
+
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', '--repeat', str(args.repeat)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    checks = json.loads(output.strip().splitlines()[-1])
+    print(f"per-start schema check: {checks['version_check_ms']:.2f}ms "
+          f"(old per-start introspection: {checks['introspection_ms']:.2f}ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Peak memory of /upload as the transfer grows.
+
+Each size is uploaded in a fresh process, through the Flask test client,
+from a file on disk, once as a single file and once as a two-file folder
+(zipped). The child reports how far its peak RSS rose during the upload.
+Stored transfers are hashed while they are written, so that rise must not
+depend on the transfer size: the benchmark fails if it spreads by more
+than --tolerance-mb across sizes.
+
+    python bench/upload_rss.py [--sizes-mb 64 256 1024] [--tolerance-mb 32]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+
+_CHUNK = 1024 * 1024
+
+
+def _write_input(path: str, size: int) -> None:
+    with open(path, 'wb') as fh:
+        for _ in range(size // _CHUNK):
+            fh.write(os.urandom(_CHUNK))
+
+
+def _child(size_mb: int, layout: str) -> None:
+    import _env
+    from app import app, routes
+
+    routes._rate_limit = lambda *args, **kwargs: True
+    client = app.test_client()
+    token = client.post('/login', json={'username': 'admin', 'password': 'secret'}).get_json()['token']
+
+    if layout == 'single':
+        names = ['data.bin']
+    else:
+        names = ['folder/a.bin', 'folder/b.bin']
+    size = size_mb * _CHUNK // len(names)
+    inputs = []
+    for index in range(len(names)):
+        path = os.path.join(_env.ROOT, f'input-{index}')
+        _write_input(path, size)
+        inputs.append(path)
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    handles = [open(path, 'rb') for path in inputs]
+    response = client.post('/upload', headers={'Authorization': f'Bearer {token}'}, data={
+        'email': 'recipient@example.com',
+        'sender_email': 'sender@example.com',
+        'files_list': json.dumps([{'name': name, 'size': size} for name in names]),
+        'paths[]': names,
+        'files[]': [(fh, name.rsplit('/', 1)[-1]) for fh, name in zip(handles, names)],
+    }, content_type='multipart/form-data')
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    assert response.status_code == 200, response.get_json()
+    print(json.dumps({'rise_kb': after - before}))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes-mb', type=int, nargs='+', default=[64, 256, 1024])
+    parser.add_argument('--tolerance-mb', type=float, default=32)
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(int(args.child[0]), args.child[1])
+        return 0
+
+    failed = False
+    for layout in ('single', 'zipped'):
+        rises = []
+        for size_mb in args.sizes_mb:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', str(size_mb), layout],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            rise_mb = json.loads(output.strip().splitlines()[-1])['rise_kb'] / 1024
+            rises.append(rise_mb)
+            print(f'{layout:>6} {size_mb:>6} MB upload: peak RSS +{rise_mb:.1f} MB')
+        spread = max(rises) - min(rises)
+        verdict = 'ok' if spread <= args.tolerance_mb else 'FAIL'
+        print(f'{layout:>6} spread across sizes: {spread:.1f} MB ({verdict})')
+        failed |= spread > args.tolerance_mb
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
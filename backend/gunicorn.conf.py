@@ -0,0 +1,53 @@
+"""
+Gunicorn settings for the backend container.
+
+Transfers are long and I/O bound: a single upload or download can keep a
+connection open for hours at the client's pace. Sync workers give each
+connection a whole process, which caps the instance at ``workers``
+concurrent transfers. The default here is the threaded worker (gthread):
+every process serves up to ``threads`` connections at once. The
+application's shared state is already thread-safe:
+
+* Flask-SQLAlchemy scopes sessions to the request's app context, and each
+  view returns its connection to the pool before the body is streamed.
+* Rate-limit buckets and the archive member cache sit behind locks.
+* ``archive_executor`` and the bulk job pools are ordinary thread pools;
+  notifications are queued in the database and sent by the sender threads
+  of a single worker, the one holding the mail dispatcher lock.
+* Disk reservations and finalize slots use flock() on a fresh open file
+  each time, so two threads of the same process exclude each other.
+
+A gthread worker also heartbeats from its main loop, so ``timeout`` no
+longer kills a worker in the middle of a slow transfer.
+
+gevent is deliberately not offered: its monkey-patching would turn the
+flock()-based admission ledger and the CPU-bound deflate pool into calls
+that block every connection of the process.
+
+``preload_app`` must stay off: the app starts its cleanup scheduler and
+thread pools at import, and threads do not survive the fork. Schema
+migrations run once in the arbiter's ``on_starting`` hook instead, in a
+child process (migrate.py) so the arbiter holds no database connection its
+workers would inherit; each worker then only checks the schema version.
+"""
+import os
+import subprocess
+import sys
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '4'))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '128'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    # A failed migration stops Gunicorn here rather than starting workers
+    # against a half-migrated schema.
+    migrate = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrate.py')
+    subprocess.run([sys.executable, migrate], check=True)
@@ -8,10 +8,96 @@ CREATE TABLE IF NOT EXISTS file_upload (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     expires_at TIMESTAMP NOT NULL,
     files_list TEXT, -- Stocke la liste des fichiers en JSON
+    file_count INT DEFAULT NULL,
+    total_size BIGINT DEFAULT NULL,
+    stored_size BIGINT DEFAULT NULL,
     notification_status_recipient VARCHAR(16) DEFAULT NULL,
     notification_error_recipient VARCHAR(500) DEFAULT NULL,
     notification_status_sender VARCHAR(16) DEFAULT NULL,
     notification_error_sender VARCHAR(500) DEFAULT NULL,
     notification_status_download VARCHAR(16) DEFAULT NULL,
-    notification_error_download VARCHAR(500) DEFAULT NULL
+    notification_error_download VARCHAR(500) DEFAULT NULL,
+    compression_input_bytes BIGINT DEFAULT NULL,
+    compression_saved_bytes BIGINT DEFAULT NULL,
+    compression_cpu_seconds DOUBLE DEFAULT NULL,
+    blob_sha256 VARCHAR(64) DEFAULT NULL,
+    integrity_status VARCHAR(16) DEFAULT NULL,
+    integrity_error VARCHAR(500) DEFAULT NULL,
+    integrity_checked_at TIMESTAMP NULL DEFAULT NULL,
+    INDEX ix_file_upload_created_at_id (created_at, id),
+    INDEX ix_file_upload_expires_at (expires_at),
+    INDEX ix_file_upload_sender_email (sender_email),
+    INDEX ix_file_upload_email (email)
+);
+
+CREATE TABLE IF NOT EXISTS transfer_recipient (
+    id VARCHAR(36) PRIMARY KEY,
+    file_id VARCHAR(36) NOT NULL,
+    position INT NOT NULL DEFAULT 0,
+    email VARCHAR(256) NOT NULL,
+    downloaded BOOLEAN DEFAULT FALSE,
+    downloaded_at TIMESTAMP NULL DEFAULT NULL,
+    notification_status VARCHAR(16) DEFAULT NULL,
+    notification_error VARCHAR(500) DEFAULT NULL,
+    notification_status_download VARCHAR(16) DEFAULT NULL,
+    notification_error_download VARCHAR(500) DEFAULT NULL,
+    INDEX ix_transfer_recipient_file_id (file_id),
+    INDEX ix_transfer_recipient_email (email),
+    FOREIGN KEY (file_id) REFERENCES file_upload(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS transfer_file (
+    file_id VARCHAR(36) NOT NULL,
+    position INT NOT NULL,
+    name TEXT NOT NULL,
+    size BIGINT NOT NULL,
+    archive_offset BIGINT DEFAULT NULL,
+    sha256 VARCHAR(64) DEFAULT NULL,
+    PRIMARY KEY (file_id, position),
+    FOREIGN KEY (file_id) REFERENCES file_upload(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS blob (
+    sha256 VARCHAR(64) PRIMARY KEY,
+    size BIGINT NOT NULL,
+    refcount INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS daily_stats (
+    day DATE NOT NULL,
+    sender_email VARCHAR(256) NOT NULL,
+    transfers INT NOT NULL DEFAULT 0,
+    links INT NOT NULL DEFAULT 0,
+    uploaded_bytes BIGINT NOT NULL DEFAULT 0,
+    stored_bytes BIGINT NOT NULL DEFAULT 0,
+    downloads INT NOT NULL DEFAULT 0,
+    downloaded_bytes BIGINT NOT NULL DEFAULT 0,
+    links_downloaded INT NOT NULL DEFAULT 0,
+    notifications_sent INT NOT NULL DEFAULT 0,
+    notifications_failed INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, sender_email)
+);
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(16) NOT NULL,
+    file_id VARCHAR(36) NOT NULL,
+    recipient_id VARCHAR(36) DEFAULT NULL,
+    to_addr VARCHAR(256) NOT NULL,
+    payload TEXT NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    available_at DATETIME NOT NULL,
+    last_error VARCHAR(500) DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at DATETIME DEFAULT NULL,
+    INDEX ix_email_outbox_status_available_at (status, available_at)
+);
+
+-- Filled by the migration runner (app/migrations.py) on first start.
+CREATE TABLE IF NOT EXISTS schema_migration (
+    version INT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
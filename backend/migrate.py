@@ -0,0 +1,15 @@
+"""Bring the database schema up to date, then exit.
+
+gunicorn.conf.py runs this once before forking the workers, so they start
+against a current schema and only check its version. It imports the app
+like a worker would, minus the cleanup scheduler and the scrubber.
+"""
+import os
+
+os.environ['ITRANSFER_MIGRATE_ONLY'] = '1'
+
+from app import app, migrations  # noqa: E402  (importing the app migrates)
+
+if __name__ == '__main__':
+    with app.app_context():
+        app.logger.info("Database schema at version %d", migrations.current_version())
@@ -0,0 +1,73 @@
+"""
+Shared fixtures. The app is initialised at import (see app/__init__.py),
+so the environment it reads is set up here, before anything imports it:
+a throwaway upload folder, data folder and SQLite database. The background
+threads (cleanup scheduler, mail dispatcher) stay off, as migrate.py keeps
+them: tests drive that work themselves, and a dispatcher of its own would
+claim the outbox rows under test.
+"""
+import atexit
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+_ROOT = tempfile.mkdtemp(prefix='itransfer-tests-')
+atexit.register(shutil.rmtree, _ROOT, ignore_errors=True)
+os.environ.update(
+    UPLOAD_FOLDER=os.path.join(_ROOT, 'uploads'),
+    DATA_FOLDER=os.path.join(_ROOT, 'data'),
+    DATABASE_URL='sqlite:///' + os.path.join(_ROOT, 'app.db'),
+    ADMIN_USERNAME='admin',
+    ADMIN_PASSWORD='secret',
+    FORCE_HTTPS='false',
+    SCRUB_ENABLED='false',
+    ITRANSFER_MIGRATE_ONLY='1',
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from app import app as flask_app  # noqa: E402
+from app import routes  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(routes, '_rate_limit', lambda *args, **kwargs: True)
+    return flask_app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    response = client.post('/login', json={'username': 'admin', 'password': 'secret'})
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+@pytest.fixture
+def post_upload(client, auth_headers):
+    """POST ``files`` (a list of (relative path, bytes)) to /upload and
+    return the response."""
+    def _post(files, sender_email='sender@example.com'):
+        data = {
+            'email': 'recipient@example.com',
+            'sender_email': sender_email,
+            'expiration_days': '7',
+            'files_list': json.dumps([{'name': name, 'size': len(content)} for name, content in files]),
+            'paths[]': [name for name, _ in files],
+            'files[]': [(io.BytesIO(content), name.split('/')[-1]) for name, content in files],
+        }
+        return client.post('/upload', data=data, headers=auth_headers, content_type='multipart/form-data')
+    return _post
+
+
+@pytest.fixture
+def upload(post_upload):
+    """Upload ``files`` and return the new transfer's id."""
+    def _upload(files, **kwargs):
+        response = post_upload(files, **kwargs)
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()['file_id']
+    return _upload
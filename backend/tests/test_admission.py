@@ -0,0 +1,53 @@
+import threading
+
+from app import admission, app, archive, routes
+
+ZIPPED = [('docs/a.txt', b'a' * 5000), ('docs/b.txt', b'b' * 3000)]
+
+
+def _take_every_slot():
+    return [
+        admission.acquire_slot(app.config['UPLOAD_FOLDER'], app.config['FINALIZE_MAX_CONCURRENT'])
+        for _ in range(app.config['FINALIZE_MAX_CONCURRENT'])
+    ]
+
+
+def test_streamed_upload_waits_for_a_slot_only_to_package(upload):
+    slots = _take_every_slot()
+    # The body is received while every slot is taken; packaging proceeds
+    # once one is freed.
+    timer = threading.Timer(0.3, admission.release_slot, [slots.pop()])
+    timer.start()
+    try:
+        assert upload(ZIPPED)
+    finally:
+        timer.join()
+        for fh in slots:
+            admission.release_slot(fh)
+
+
+def test_streamed_upload_gives_up_when_no_slot_frees(post_upload, monkeypatch):
+    monkeypatch.setattr(routes, '_FINALIZE_SLOT_WAIT', 0.2)
+    slots = _take_every_slot()
+    try:
+        response = post_upload(ZIPPED)
+    finally:
+        for fh in slots:
+            admission.release_slot(fh)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(app.config['ADMISSION_RETRY_AFTER'])
+
+
+def test_buffered_upload_is_refused_before_its_body_is_read(post_upload, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_STREAMING_INGEST', False)
+    saved = []
+    monkeypatch.setattr(archive, 'save_stream', lambda *args: saved.append(args))
+    slots = _take_every_slot()
+    try:
+        response = post_upload(ZIPPED)
+    finally:
+        for fh in slots:
+            admission.release_slot(fh)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(app.config['ADMISSION_RETRY_AFTER'])
+    assert saved == []
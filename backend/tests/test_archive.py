@@ -0,0 +1,115 @@
+import hashlib
+import io
+import os
+import struct
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import archive, compression
+
+TEXT = b''.join(b'line %d of a compressible member\n' % n for n in range(40000))
+MEMBERS = [
+    ('docs/notes.txt', TEXT),
+    ('media/noise.bin', os.urandom(300000)),
+    ('docs/empty.txt', b''),
+    ('docs/short.txt', b'just a few bytes\n'),
+]
+
+
+class _Trickle(io.RawIOBase):
+    """A stream that hands out at most ``step`` bytes per read, like a
+    multipart part arriving over the network."""
+
+    def __init__(self, data, step=7000):
+        self._data = memoryview(data)
+        self._step = step
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        size = self._step if size < 0 else min(size, self._step)
+        chunk, self._data = bytes(self._data[:size]), self._data[size:]
+        return chunk
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+def _build(executor, members, **kwargs):
+    """Write ``members`` with ZipBuilder; returns (archive bytes, sha256,
+    members())."""
+    out = io.BytesIO()
+    writer = archive.HashingWriter(out)
+    builder = archive.ZipBuilder(
+        writer, executor, compression.CompressionPolicy(6, 7.5, ''),
+        # Several blocks per large member: each is deflated on its own,
+        # primed with the previous block's tail.
+        block_size=2 * compression.SAMPLE_SIZE, **kwargs,
+    )
+    for name, content in members:
+        assert builder.add(name, _Trickle(content)) == len(content)
+    builder.close()
+    return out.getvalue(), writer.hexdigest(), builder.members()
+
+
+def _assert_round_trip(data, members, listed):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        infos = zf.infolist()
+        assert [info.filename for info in infos] == [name for name, _ in members]
+        for info, (name, content), entry in zip(infos, members, listed):
+            assert zf.read(info) == content
+            assert info.CRC == zlib.crc32(content)
+            assert info.file_size == entry['size'] == len(content)
+            assert info.header_offset == entry['offset']
+            assert entry['sha256'] == hashlib.sha256(content).hexdigest()
+        return infos
+
+
+def test_mixed_members_round_trip(executor):
+    data, sha256, listed = _build(executor, MEMBERS, max_pending=2)
+    assert sha256 == hashlib.sha256(data).hexdigest()
+    infos = _assert_round_trip(data, MEMBERS, listed)
+    assert [info.compress_type for info in infos] == [
+        zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_DEFLATED,
+    ]
+    assert infos[0].compress_size < len(TEXT) // 4
+    assert len(data) <= archive.max_archive_size((name, len(content)) for name, content in MEMBERS)
+
+
+def test_members_are_read_back_one_at_a_time(executor, tmp_path):
+    data, _, _ = _build(executor, MEMBERS)
+    path = tmp_path / 'transfer.zip'
+    path.write_bytes(data)
+    listed = archive.list_members(str(path), locate_blob=None)
+    for member, (_, content) in zip(listed, MEMBERS):
+        assert b''.join(archive.iter_member(str(path), member)) == content
+
+
+def test_zip64_fields_past_the_limits(executor, monkeypatch):
+    monkeypatch.setattr(archive, '_ZIP64_LIMIT', 1000)
+    monkeypatch.setattr(archive, '_ZIP64_COUNT_LIMIT', 3)
+    data, _, listed = _build(executor, MEMBERS)
+    infos = _assert_round_trip(data, MEMBERS, listed)
+    # Sizes and offsets past the limit moved to the ZIP64 extra field...
+    assert infos[1].extra[:2] == struct.pack('<H', 0x0001)
+    assert infos[1].compress_size == len(MEMBERS[1][1])
+    # ... and the end of central directory record points at a ZIP64 one.
+    entries, total, _, cd_offset = struct.unpack('<HHII', data[-archive._END.size:][8:20])
+    assert (entries, total, cd_offset) == (0xFFFF, 0xFFFF, 0xFFFFFFFF)
+    assert data[-archive._END.size - archive._ZIP64_LOCATOR.size:][:4] == b'PK\x06\x07'
+
+
+def test_non_ascii_names(executor):
+    members = [('dossier/été/résumé.txt', TEXT[:5000]), ('写真/猫.bin', os.urandom(70000))]
+    data, _, listed = _build(executor, members)
+    infos = _assert_round_trip(data, members, listed)
+    assert all(info.flag_bits & 0x800 for info in infos)
+    assert [entry['name'] for entry in listed] == [name for name, _ in members]
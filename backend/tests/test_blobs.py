@@ -0,0 +1,110 @@
+import errno
+import hashlib
+import os
+import shutil
+
+import pytest
+
+from app import app, blobs, db, uploads
+from app.models import Blob, FileUpload, OutboxMessage
+
+
+def _session(client, auth_headers, content):
+    response = client.post('/upload/sessions', headers=auth_headers, json={
+        'email': 'recipient@example.com',
+        'sender_email': 'sender@example.com',
+        'files_list': [{'name': 'report.bin', 'size': len(content)}],
+    })
+    assert response.status_code == 201
+    file_id = response.get_json()['file_id']
+    response = client.put(f'/upload/sessions/{file_id}/files/0/chunks/0', headers=auth_headers, data=content)
+    assert response.status_code == 200
+    return file_id
+
+
+@pytest.mark.parametrize('duplicate', [False, True], ids=['new-blob', 'existing-blob'])
+def test_failed_commit_leaves_store_and_session_untouched(client, auth_headers, upload, monkeypatch, duplicate):
+    content = os.urandom(5000)
+    sha256 = hashlib.sha256(content).hexdigest()
+    upload_root = app.config['UPLOAD_FOLDER']
+    if duplicate:
+        upload([('first.bin', content)])
+    with app.app_context():
+        refcount = db.session.get(Blob, sha256).refcount if duplicate else None
+    blob_present = os.path.exists(blobs.blob_path(upload_root, sha256))
+
+    file_id = _session(client, auth_headers, content)
+    real_commit = db.session.commit
+
+    def failing_commit():
+        raise RuntimeError('commit failed')
+
+    monkeypatch.setattr(db.session, 'commit', failing_commit)
+    response = client.post(f'/upload/sessions/{file_id}/complete', headers=auth_headers)
+    assert response.status_code == 500
+    monkeypatch.setattr(db.session, 'commit', real_commit)
+
+    assert os.path.exists(blobs.blob_path(upload_root, sha256)) == blob_present
+    with app.app_context():
+        row = db.session.get(Blob, sha256)
+        assert (row.refcount if row else None) == refcount
+        state = uploads.load_session(upload_root, file_id)
+        staged = uploads.staged_files(upload_root, state)
+    assert os.path.exists(staged[0]['abs'])
+
+    # The session can be completed once the database is back.
+    response = client.post(f'/upload/sessions/{file_id}/complete', headers=auth_headers)
+    assert response.status_code == 200
+    assert client.get(f'/download/{file_id}').data == content
+
+
+def _counts():
+    with app.app_context():
+        return db.session.query(FileUpload).count(), db.session.query(OutboxMessage).count()
+
+
+def test_store_that_cannot_take_the_blob_records_nothing(post_upload, upload, monkeypatch):
+    content = os.urandom(5000)
+    sha256 = hashlib.sha256(content).hexdigest()
+    path = blobs.blob_path(app.config['UPLOAD_FOLDER'], sha256)
+    before = _counts()
+
+    def disk_full(*args, **kwargs):
+        raise OSError(errno.ENOSPC, 'No space left on device')
+
+    monkeypatch.setattr(os, 'link', disk_full)
+    monkeypatch.setattr(shutil, 'copyfile', disk_full)
+    response = post_upload([('report.bin', content)])
+    assert response.status_code == 500
+    monkeypatch.undo()
+
+    # No transfer, link or notification was committed without its blob.
+    assert _counts() == before
+    assert not os.path.exists(path)
+    with app.app_context():
+        assert db.session.get(Blob, sha256) is None
+
+    upload([('report.bin', content)])
+    assert os.path.exists(path)
+
+
+def test_blob_is_stored_before_the_commit_and_kept_if_staged_file_stays(client, upload, monkeypatch):
+    content = os.urandom(5000)
+    path = blobs.blob_path(app.config['UPLOAD_FOLDER'], hashlib.sha256(content).hexdigest())
+    real_commit = db.session.commit
+    stored_at_commit = []
+
+    def commit():
+        stored_at_commit.append(os.path.exists(path))
+        real_commit()
+
+    def cannot_remove(staged_path):
+        raise OSError(errno.EACCES, 'Permission denied')
+
+    monkeypatch.setattr(db.session, 'commit', commit)
+    monkeypatch.setattr(blobs, 'discard_staged', cannot_remove)
+    file_id = upload([('report.bin', content)])
+    monkeypatch.undo()
+
+    assert stored_at_commit and all(stored_at_commit)
+    assert client.get(f'/download/{file_id}').data == content
@@ -0,0 +1,63 @@
+import os
+import time
+
+from app import app, blobs, db
+from app.models import Blob, FileUpload, TransferFile
+
+
+def _run_job(client, auth_headers, body):
+    response = client.post('/api/transfers/bulk', headers=auth_headers, json=body)
+    assert response.status_code == 202, response.get_json()
+    job_id = response.get_json()['job_id']
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        state = client.get(f'/api/transfers/bulk/{job_id}', headers=auth_headers).get_json()
+        if state['status'] in ('done', 'failed'):
+            return state
+        time.sleep(0.05)
+    raise AssertionError(f'bulk job {job_id} did not finish')
+
+
+def _blob_sha256(file_id):
+    with app.app_context():
+        sha256 = db.session.get(FileUpload, file_id).blob_sha256
+        db.session.remove()
+    return sha256
+
+
+def test_bulk_delete_by_filter_removes_rows_and_blobs(client, auth_headers, upload):
+    doomed = [
+        upload([('one.bin', os.urandom(3000))], sender_email='bulk-delete@example.com'),
+        upload([('two/a.bin', os.urandom(3000)), ('two/b.bin', os.urandom(2000))],
+               sender_email='bulk-delete@example.com'),
+    ]
+    kept = upload([('kept.bin', os.urandom(3000))], sender_email='bulk-keep@example.com')
+    hashes = [_blob_sha256(file_id) for file_id in doomed]
+
+    state = _run_job(client, auth_headers, {'action': 'delete', 'filter': {'sender': 'bulk-delete@example.com'}})
+    assert state['status'] == 'done'
+    assert (state['total'], state['processed'], state['affected'], state['failed']) == (2, 2, 2, 0)
+
+    upload_root = app.config['UPLOAD_FOLDER']
+    with app.app_context():
+        for file_id in doomed:
+            assert db.session.get(FileUpload, file_id) is None
+            assert TransferFile.query.filter_by(file_id=file_id).count() == 0
+        for sha256 in hashes:
+            assert db.session.get(Blob, sha256) is None
+            assert not os.path.exists(blobs.blob_path(upload_root, sha256))
+        assert db.session.get(FileUpload, kept) is not None
+        db.session.remove()
+    assert client.get(f'/download/{doomed[0]}').status_code == 404
+    assert client.get(f'/download/{kept}').status_code == 200
+
+
+def test_bulk_expire_by_filter_stops_the_links(client, auth_headers, upload):
+    file_id = upload([('soon.bin', os.urandom(3000))], sender_email='bulk-expire@example.com')
+    assert client.get(f'/download/{file_id}').status_code == 200
+
+    state = _run_job(client, auth_headers, {'action': 'expire', 'filter': {'sender': 'bulk-expire@example.com'}})
+    assert state['status'] == 'done'
+    assert state['affected'] == 1
+    assert client.get(f'/download/{file_id}').status_code == 410
+    assert client.get(f'/transfer/{file_id}').status_code == 410
@@ -0,0 +1,21 @@
+from datetime import datetime, timedelta
+
+from app import _cleanup_expired_files, app, db
+from app.models import FileUpload, TransferFile
+
+
+def test_cleanup_removes_expired_transfers_only(client, upload):
+    expired = [upload([(f'old-{n}.txt', b'old')]) for n in range(3)]
+    kept = upload([('folder/a.txt', b'a'), ('folder/b.txt', b'b')])
+    with app.app_context():
+        for file_id in expired:
+            db.session.get(FileUpload, file_id).expires_at = datetime.utcnow() - timedelta(days=1)
+        db.session.commit()
+
+        _cleanup_expired_files()
+
+        assert all(db.session.get(FileUpload, file_id) is None for file_id in expired)
+        assert TransferFile.query.filter(TransferFile.file_id.in_(expired)).count() == 0
+        assert db.session.get(FileUpload, kept) is not None
+    assert client.get(f'/download/{expired[0]}').status_code in (404, 410)
+    assert client.get(f'/download/{kept}').status_code == 200
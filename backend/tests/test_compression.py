@@ -0,0 +1,43 @@
+import os
+import zipfile
+
+import pytest
+
+from app import compression
+
+TEXT = b'the quick brown fox jumps over the lazy dog\n' * 1500
+PNG = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR' + bytes(65536)
+
+pytestmark = pytest.mark.skipif(compression.magic is None, reason='libmagic is not installed')
+
+
+def test_listed_binary_type_is_stored_whatever_its_name():
+    policy = compression.CompressionPolicy(6, 7.5, 'image/png')
+    assert policy.choose('upload.bin', PNG) == (zipfile.ZIP_STORED, None)
+    assert policy.choose('notes.bin', TEXT) == (zipfile.ZIP_DEFLATED, 6)
+
+
+def test_listed_text_type_is_still_detected():
+    policy = compression.CompressionPolicy(6, 7.5, 'image/png,text/plain')
+    assert policy.choose('notes.bin', TEXT) == (zipfile.ZIP_STORED, None)
+
+
+def test_random_bytes_are_stored():
+    policy = compression.CompressionPolicy(6, 7.5, '')
+    assert policy.choose('blob.bin', os.urandom(65536)) == (zipfile.ZIP_STORED, None)
+
+
+def test_member_shorter_than_the_sample_is_deflated_unclassified():
+    policy = compression.CompressionPolicy(6, 7.5, '.jpg,image/png')
+    assert policy.choose('tiny.bin', PNG[:4096]) == (zipfile.ZIP_DEFLATED, 6)
+    assert policy.choose('tiny.bin', os.urandom(4096)) == (zipfile.ZIP_DEFLATED, 6)
+    assert policy.choose('tiny.jpg', os.urandom(4096)) == (zipfile.ZIP_STORED, None)
+
+
+def test_policy_is_built_once_per_setting():
+    config = {'ZIP_COMPRESSION_LEVEL': 6, 'ZIP_STORE_ENTROPY_THRESHOLD': 7.5, 'ZIP_STORE_TYPES': 'image/png'}
+    policy = compression.CompressionPolicy.from_config(config)
+    assert compression.CompressionPolicy.from_config(dict(config)) is policy
+    changed = compression.CompressionPolicy.from_config(dict(config, ZIP_STORE_TYPES='image/png,text/plain'))
+    assert changed is not policy
+    assert changed.choose('notes.bin', TEXT) == (zipfile.ZIP_STORED, None)
@@ -0,0 +1,71 @@
+from app import app, db, routes, transfer_cache
+from app.models import DailyStats, OutboxMessage
+
+CONTENT = bytes(range(256)) * 40
+
+
+def _downloaded_bytes():
+    with app.app_context():
+        total = db.session.query(db.func.coalesce(db.func.sum(DailyStats.downloaded_bytes), 0)).scalar()
+        db.session.remove()
+    return total
+
+
+def test_overlapping_ranges_count_the_bytes_served(client, upload):
+    file_id = upload([('data.bin', CONTENT)])
+    before = _downloaded_bytes()
+    response = client.get(f'/download/{file_id}', headers={'Range': 'bytes=50-149,0-99'})
+    assert response.status_code == 206
+    assert response.data == CONTENT[:150]
+    assert _downloaded_bytes() == before + 150
+
+
+def test_offloaded_range_counts_the_range(client, upload, monkeypatch):
+    monkeypatch.setitem(app.config, 'DOWNLOAD_OFFLOAD', 'x-accel')
+    file_id = upload([('data.bin', CONTENT)])
+    before = _downloaded_bytes()
+    response = client.get(f'/download/{file_id}', headers={'Range': 'bytes=100-199'})
+    assert 'X-Accel-Redirect' in response.headers
+    assert _downloaded_bytes() == before + 100
+
+
+def test_offloaded_download_counts_the_whole_file(client, upload, monkeypatch):
+    monkeypatch.setitem(app.config, 'DOWNLOAD_OFFLOAD', 'x-accel')
+    file_id = upload([('data.bin', CONTENT)])
+    before = _downloaded_bytes()
+    response = client.get(f'/download/{file_id}')
+    assert 'X-Accel-Redirect' in response.headers
+    assert _downloaded_bytes() == before + len(CONTENT)
+
+
+def _download_events(file_id):
+    """Download notifications queued for ``file_id``, and links counted as
+    downloaded in the rollup."""
+    with app.app_context():
+        notified = OutboxMessage.query.filter_by(file_id=file_id, kind='download').count()
+        links = db.session.query(db.func.coalesce(db.func.sum(DailyStats.links_downloaded), 0)).scalar()
+        db.session.remove()
+    return notified, links
+
+
+def test_ranged_and_resumed_gets_record_the_download_once(client, upload):
+    file_id = upload([('data.bin', CONTENT)])
+    with app.app_context():
+        # What another worker cached before the first download: not downloaded.
+        stale = routes._transfer_info(file_id)
+        db.session.remove()
+    _, links_before = _download_events(file_id)
+
+    first = client.get(f'/download/{file_id}')
+    assert first.status_code == 200
+    assert _download_events(file_id) == (1, links_before + 1)
+
+    etag = first.headers['ETag']
+    for headers in ({'Range': 'bytes=0-99'}, {'Range': 'bytes=0-99', 'If-Range': etag}, {'Range': 'bytes=4000-'}):
+        assert client.get(f'/download/{file_id}', headers=headers).status_code == 206
+        # The same request served from the stale entry: the conditional
+        # UPDATE finds the link already claimed.
+        transfer_cache.put(file_id, {key: value for key, value in stale.items() if key != 'expires_at'})
+        assert client.get(f'/download/{file_id}', headers=headers).status_code == 206
+    assert client.get(f'/download/{file_id}').status_code == 200
+    assert _download_events(file_id) == (1, links_before + 1)
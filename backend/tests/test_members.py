@@ -0,0 +1,81 @@
+import os
+import struct
+import zipfile
+
+import pytest
+
+from app import app, blobs, db
+from app.models import DailyStats, FileUpload, OutboxMessage
+
+FILES = [('docs/a.txt', b'a' * 5000), ('docs/b.txt', b'b' * 3000)]
+
+
+def _downloads(file_id):
+    with app.app_context():
+        record = db.session.get(FileUpload, file_id)
+        notified = OutboxMessage.query.filter_by(file_id=file_id, kind='download').count()
+        downloads, downloaded_bytes = db.session.query(
+            db.func.coalesce(db.func.sum(DailyStats.downloads), 0),
+            db.func.coalesce(db.func.sum(DailyStats.downloaded_bytes), 0),
+        ).one()
+        db.session.remove()
+    return bool(record.downloaded), notified, downloads, downloaded_bytes
+
+
+def test_member_fetch_counts_as_partial(client, upload):
+    file_id = upload(FILES)
+    _, _, downloads_before, bytes_before = _downloads(file_id)
+
+    response = client.get(f'/download/{file_id}/members/1')
+    assert response.status_code == 200
+    assert response.data == FILES[1][1]
+
+    downloaded, notified, downloads, downloaded_bytes = _downloads(file_id)
+    assert not downloaded
+    assert notified == 0
+    assert downloads == downloads_before
+    assert downloaded_bytes == bytes_before + len(FILES[1][1])
+
+
+def test_whole_transfer_download_is_recorded(client, upload):
+    file_id = upload(FILES)
+    assert client.get(f'/download/{file_id}').status_code == 200
+    downloaded, notified, _, _ = _downloads(file_id)
+    assert downloaded
+    assert notified == 1
+
+
+def _damage_member(path, index, damage):
+    """Give member ``index`` of the zip at ``path`` an unsupported
+    compression method (in the central directory, which the listing reads)
+    or a broken local header signature."""
+    with zipfile.ZipFile(path) as zf:
+        start_dir = zf.start_dir
+        local_offset = zf.infolist()[index].header_offset
+    with open(path, 'r+b') as fh:
+        if damage == 'bad-local-header':
+            fh.seek(local_offset)
+            fh.write(b'XXXX')
+            return
+        entry = start_dir
+        for _ in range(index + 1):
+            fh.seek(entry)
+            header = fh.read(46)
+            name_len, extra_len, comment_len = struct.unpack('<HHH', header[28:34])
+            method_at = entry + 10
+            entry += 46 + name_len + extra_len + comment_len
+        fh.seek(method_at)
+        fh.write(struct.pack('<H', zipfile.ZIP_BZIP2))
+
+
+@pytest.mark.parametrize('damage', ['unsupported-method', 'bad-local-header'])
+def test_unreadable_member_is_refused_before_the_response_starts(client, upload, damage):
+    # Content of its own: the archive is damaged in the (shared) blob store.
+    file_id = upload([(name, content + os.urandom(16)) for name, content in FILES])
+    with app.app_context():
+        sha256 = db.session.get(FileUpload, file_id).blob_sha256
+    _damage_member(blobs.blob_path(app.config['UPLOAD_FOLDER'], sha256), 1, damage)
+
+    response = client.get(f'/download/{file_id}/members/1')
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'Download failed'}
@@ -0,0 +1,148 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+from app import app, db, outbox, routes
+from app.models import FileUpload, OutboxMessage
+
+SMTP_CONFIG = {
+    'smtp_server': 'smtp.example.com', 'smtp_port': 587, 'smtp_user': 'u', 'smtp_password': 'p',
+    'smtp_sender_email': 'noreply@example.com',
+}
+
+
+def _claimed_limit(monkeypatch, rate, concurrency):
+    limits = []
+    monkeypatch.setattr(outbox, 'claim', lambda limit: limits.append(limit) or [])
+    monkeypatch.setitem(app.config, 'MAIL_RATE_PER_MINUTE', rate)
+    monkeypatch.setitem(app.config, 'MAIL_CONCURRENCY', concurrency)
+    with app.app_context():
+        routes._dispatch_outbox()
+    return limits[0]
+
+
+def test_batches_are_not_capped_without_a_send_rate(monkeypatch):
+    assert _claimed_limit(monkeypatch, 0, 4) == app.config['OUTBOX_BATCH_SIZE']
+
+
+def test_sender_threads_share_a_minute_of_sending(monkeypatch):
+    # 8 threads at 40/min: 5 each, 40 in flight at most -- one minute.
+    assert _claimed_limit(monkeypatch, 40, 8) == 5
+    assert _claimed_limit(monkeypatch, 3, 8) == 1
+
+
+@pytest.fixture
+def empty_outbox():
+    """Start from an outbox holding nothing due: earlier tests queue
+    notifications that nobody sends."""
+    with app.app_context():
+        db.session.execute(delete(OutboxMessage))
+        db.session.commit()
+        db.session.remove()
+
+
+def _queue(count):
+    with app.app_context():
+        for n in range(count):
+            outbox.enqueue('sender', f'transfer-{n}', 'sender@example.com', sender_email='sender@example.com')
+        db.session.commit()
+        ids = [row.id for row in OutboxMessage.query.order_by(OutboxMessage.id)]
+        db.session.remove()
+    return ids
+
+
+def _claim(limit=10):
+    with app.app_context():
+        try:
+            return [message['id'] for message in outbox.claim(limit)]
+        finally:
+            db.session.remove()
+
+
+def _message(message_id):
+    with app.app_context():
+        row = db.session.get(OutboxMessage, message_id)
+        db.session.expunge(row)
+        db.session.remove()
+    return row
+
+
+def test_sqlite_claim_never_hands_a_row_to_two_dispatchers(empty_outbox, monkeypatch):
+    assert app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite:')
+    ids = _queue(3)
+    rival = []
+    execute = db.session.execute
+
+    def racing_execute(statement, *args, **kwargs):
+        # This dispatcher has picked its candidates; before it leases the
+        # first one, another dispatcher claims and commits them all.
+        if getattr(statement, 'is_dml', False) and not rival:
+            rival.append(None)
+            thread = threading.Thread(target=lambda: rival.extend(_claim()))
+            thread.start()
+            thread.join()
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db.session, 'execute', racing_execute)
+    mine = _claim()
+    assert rival[1:] == ids
+    assert mine == []
+    assert all(_message(message_id).attempts == 1 for message_id in ids)
+
+
+def test_an_expired_lease_is_claimed_again(empty_outbox):
+    [message_id] = _queue(1)
+    assert _claim() == [message_id]
+    # Leased: no other sender sees it while the first one holds it.
+    assert _claim() == []
+    with app.app_context():
+        # The first sender died mid-send and its lease ran out.
+        db.session.execute(update(OutboxMessage).where(OutboxMessage.id == message_id).values(
+            available_at=datetime.utcnow() - timedelta(seconds=1),
+        ))
+        db.session.commit()
+        db.session.remove()
+    assert _claim() == [message_id]
+    assert _message(message_id).attempts == 2
+
+
+def test_smtp_failures_back_off_until_the_last_attempt(empty_outbox, upload, monkeypatch):
+    monkeypatch.setitem(app.config, 'OUTBOX_MAX_ATTEMPTS', 3)
+    monkeypatch.setattr(routes, '_load_smtp_config', lambda: SMTP_CONFIG)
+    monkeypatch.setattr(routes, 'send_batch', lambda messages, smtp_config: [
+        (False, '451 try again later', True) for _ in messages
+    ])
+    file_id = upload([('report.txt', b'quarterly numbers')])
+    with app.app_context():
+        message_id = OutboxMessage.query.filter_by(file_id=file_id, kind='recipient').one().id
+        db.session.remove()
+
+    for attempt, delay in ((1, 60), (2, 120)):
+        with app.app_context():
+            assert routes._dispatch_outbox() == 2
+            db.session.remove()
+        row = _message(message_id)
+        assert (row.status, row.attempts, row.last_error) == ('pending', attempt, '451 try again later')
+        wait = (row.available_at - datetime.utcnow()).total_seconds()
+        assert delay - 5 < wait <= delay
+        with app.app_context():
+            # Not due before its backoff has run out...
+            assert outbox.claim(10) == []
+            db.session.execute(update(OutboxMessage).where(OutboxMessage.status == 'pending').values(
+                available_at=datetime.utcnow() - timedelta(seconds=1),
+            ))
+            db.session.commit()
+            db.session.remove()
+
+    # ... and given up on after OUTBOX_MAX_ATTEMPTS.
+    with app.app_context():
+        assert routes._dispatch_outbox() == 2
+        record = db.session.get(FileUpload, file_id)
+        assert (record.notification_status_recipient, record.notification_status_sender) == ('failed', 'failed')
+        db.session.remove()
+    row = _message(message_id)
+    assert (row.status, row.attempts, row.last_error) == ('failed', 3, '451 try again later')
+    assert row.finished_at is not None
+    assert _claim() == []
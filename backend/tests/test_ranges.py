@@ -0,0 +1,117 @@
+import os
+import re
+
+import pytest
+
+from app import app
+
+SINGLE = [('report.bin', os.urandom(20000))]
+ZIPPED = [('photos/a.bin', os.urandom(12000)), ('photos/b.txt', b'hello ' * 2000)]
+
+
+@pytest.fixture(params=['single', 'zipped', 'lazy'])
+def stored(request, client, upload, monkeypatch):
+    """A transfer and its full download body: a single file, an archive
+    zipped at upload time, and one zipped at download time."""
+    if request.param == 'lazy':
+        monkeypatch.setitem(app.config, 'ARCHIVE_MODE', 'lazy')
+    file_id = upload(SINGLE if request.param == 'single' else ZIPPED)
+    response = client.get(f'/download/{file_id}')
+    assert response.status_code == 200
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    return file_id, response.data, response.headers['ETag']
+
+
+def _parts(response):
+    """(Content-Range, body) of each part of a multipart/byteranges body."""
+    boundary = re.search(r'boundary=(\S+)', response.headers['Content-Type']).group(1).encode()
+    assert response.content_length == len(response.data)
+    chunks = response.data.split(b'--' + boundary)
+    assert chunks[0] == b'' and chunks[-1] == b'--\r\n'
+    parts = []
+    for chunk in chunks[1:-1]:
+        head, _, body = chunk.partition(b'\r\n\r\n')
+        content_range = re.search(rb'Content-Range: (.+)', head).group(1).decode().strip()
+        assert body.endswith(b'\r\n')
+        parts.append((content_range, body[:-2]))
+    return parts
+
+
+def test_single_range(client, stored):
+    file_id, content, _ = stored
+    response = client.get(f'/download/{file_id}', headers={'Range': 'bytes=100-1099'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 100-1099/{len(content)}'
+    assert response.data == content[100:1100]
+
+
+def test_open_ended_range(client, stored):
+    file_id, content, _ = stored
+    response = client.get(f'/download/{file_id}', headers={'Range': 'bytes=5000-'})
+    assert response.status_code == 206
+    assert response.data == content[5000:]
+
+
+def test_suffix_range(client, stored):
+    file_id, content, _ = stored
+    response = client.get(f'/download/{file_id}', headers={'Range': 'bytes=-500'})
+    assert response.status_code == 206
+    size = len(content)
+    assert response.headers['Content-Range'] == f'bytes {size - 500}-{size - 1}/{size}'
+    assert response.data == content[-500:]
+
+
+def test_multiple_ranges(client, stored):
+    file_id, content, _ = stored
+    size = len(content)
+    response = client.get(f'/download/{file_id}', headers={'Range': 'bytes=-10,0-9,2000-2099'})
+    assert response.status_code == 206
+    assert response.headers['Content-Type'].startswith('multipart/byteranges')
+    # Sorted by offset, as resolved.
+    assert _parts(response) == [
+        (f'bytes 0-9/{size}', content[:10]),
+        (f'bytes 2000-2099/{size}', content[2000:2100]),
+        (f'bytes {size - 10}-{size - 1}/{size}', content[-10:]),
+    ]
+
+
+def test_overlapping_ranges_are_coalesced(client, stored):
+    file_id, content, _ = stored
+    response = client.get(f'/download/{file_id}', headers={'Range': 'bytes=50-149,0-99'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 0-149/{len(content)}'
+    assert response.data == content[:150]
+
+
+def test_if_range_with_matching_etag_serves_the_range(client, stored):
+    file_id, content, etag = stored
+    response = client.get(f'/download/{file_id}', headers={'Range': 'bytes=10-19', 'If-Range': etag})
+    assert response.status_code == 206
+    assert response.data == content[10:20]
+
+
+def test_if_range_with_stale_etag_serves_everything(client, stored):
+    file_id, content, _ = stored
+    response = client.get(f'/download/{file_id}', headers={'Range': 'bytes=10-19', 'If-Range': '"stale"'})
+    assert response.status_code == 200
+    assert response.data == content
+
+
+def test_unsatisfiable_range(client, stored):
+    file_id, content, _ = stored
+    response = client.get(f'/download/{file_id}', headers={'Range': f'bytes={len(content)}-'})
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f'bytes */{len(content)}'
+
+
+def test_malformed_range_is_ignored(client, stored):
+    file_id, content, _ = stored
+    response = client.get(f'/download/{file_id}', headers={'Range': 'bytes=oops'})
+    assert response.status_code == 200
+    assert response.data == content
+
+
+def test_conditional_get(client, stored):
+    file_id, _, etag = stored
+    response = client.get(f'/download/{file_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
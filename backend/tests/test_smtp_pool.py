@@ -0,0 +1,110 @@
+import smtplib
+
+import pytest
+
+from app import routes
+from app.smtp_pool import SMTPPool
+
+SMTP_CONFIG = {'smtp_server': 'smtp.example.com', 'smtp_port': 587, 'smtp_user': 'u', 'smtp_password': 'p'}
+
+
+class FakeServer:
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    def send_message(self, msg):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        self.sent.append(msg)
+
+    def noop(self):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        return 250, b'OK'
+
+    def quit(self):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected('please run connect() first')
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnect:
+    """Hands out FakeServers, or raises ``error`` once ``fail_after`` of
+    them were handed out."""
+
+    def __init__(self, fail_after=None, error=None):
+        self.servers = []
+        self.fail_after = fail_after
+        self.error = error
+
+    def __call__(self, smtp_config):
+        if self.fail_after is not None and len(self.servers) >= self.fail_after:
+            raise self.error
+        server = FakeServer()
+        self.servers.append(server)
+        return server
+
+
+def test_sessions_are_reused_across_batches():
+    connect = FakeConnect()
+    pool = SMTPPool(connect)
+    for _ in range(3):
+        with pool.session(SMTP_CONFIG) as session:
+            session.send('message')
+    assert len(connect.servers) == 1
+    assert len(connect.servers[0].sent) == 3
+
+
+def test_session_is_replaced_after_max_messages():
+    connect = FakeConnect()
+    pool = SMTPPool(connect, max_messages=2)
+    with pool.session(SMTP_CONFIG) as session:
+        for _ in range(5):
+            session.send('message')
+    assert [len(server.sent) for server in connect.servers] == [2, 2, 1]
+
+
+def test_config_change_retires_idle_sessions():
+    connect = FakeConnect()
+    pool = SMTPPool(connect)
+    with pool.session(SMTP_CONFIG) as session:
+        session.send('message')
+    with pool.session(dict(SMTP_CONFIG, smtp_user='other')) as session:
+        session.send('message')
+    assert len(connect.servers) == 2
+    assert connect.servers[0].closed
+
+
+def test_dropped_session_is_reopened_and_message_retried():
+    connect = FakeConnect()
+    pool = SMTPPool(connect)
+    with pool.session(SMTP_CONFIG) as session:
+        connect.servers[0].closed = True
+        session.send('message')
+    assert len(connect.servers) == 2
+    assert connect.servers[1].sent == ['message']
+
+
+def test_failed_reconnect_raises_the_connect_error():
+    connect = FakeConnect(fail_after=1, error=ConnectionRefusedError('refused'))
+    pool = SMTPPool(connect)
+    with pytest.raises(ConnectionRefusedError):
+        with pool.session(SMTP_CONFIG) as session:
+            connect.servers[0].closed = True
+            session.send('message')
+
+
+def test_failed_reconnect_is_a_transient_batch_failure(monkeypatch):
+    connect = FakeConnect(fail_after=1, error=ConnectionRefusedError('refused'))
+    pool = SMTPPool(connect, max_messages=1)
+    monkeypatch.setattr(routes, '_smtp_pool', pool)
+    results = routes.send_batch(['first', 'second', 'third'], SMTP_CONFIG)
+    assert results[0] == (True, None, False)
+    for success, error, transient in results[1:]:
+        assert not success
+        assert transient
+        assert 'refused' in error
@@ -0,0 +1,115 @@
+import json
+import os
+import uuid
+
+import pytest
+
+from app import app
+
+FILES = [('docs/a.txt', b'a' * 5000), ('docs/b.txt', b'b' * 3000)]
+
+
+def _fields(files, paths=None):
+    return [
+        ('email', 'recipient@example.com'),
+        ('sender_email', 'sender@example.com'),
+        ('expiration_days', '7'),
+        ('files_list', json.dumps([{'name': name, 'size': len(content)} for name, content in files])),
+    ] + [('paths[]', path) for path in (paths or [name for name, _ in files])]
+
+
+def _file_parts(files):
+    return [('files[]', name.split('/')[-1], content) for name, content in files]
+
+
+def _body(parts):
+    """A multipart/form-data body with ``parts`` in exactly this order:
+    ``(name, value)`` fields and ``(name, filename, bytes)`` files."""
+    boundary = uuid.uuid4().hex
+    chunks = []
+    for part in parts:
+        if len(part) == 2:
+            head = f'Content-Disposition: form-data; name="{part[0]}"'
+            data = part[1].encode()
+        else:
+            head = (f'Content-Disposition: form-data; name="{part[0]}"; filename="{part[1]}"\r\n'
+                    'Content-Type: application/octet-stream')
+            data = part[2]
+        chunks.append(f'--{boundary}\r\n{head}\r\n\r\n'.encode() + data + b'\r\n')
+    chunks.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(chunks), f'multipart/form-data; boundary={boundary}'
+
+
+@pytest.fixture
+def post_body(client, auth_headers):
+    def _post(body, content_type):
+        return client.post('/upload', data=body, content_type=content_type, headers=auth_headers)
+    return _post
+
+
+@pytest.fixture
+def leftovers():
+    """Whatever a request leaves in the staging folder or the reservation
+    ledger, compared with before it ran."""
+    upload_root = app.config['UPLOAD_FOLDER']
+
+    def listing(name):
+        try:
+            return set(os.listdir(os.path.join(upload_root, name))) - {'.lock'}
+        except FileNotFoundError:
+            return set()
+
+    before = {name: listing(name) for name in ('temp', 'reservations')}
+    return lambda: {name: listing(name) - before[name] for name in before}
+
+
+def _member_names(client, file_id):
+    return [f['name'] for f in client.get(f'/transfer/{file_id}').get_json()['files']]
+
+
+def test_paths_sent_after_the_files_fall_back_to_files_list(client, post_body):
+    parts = _fields(FILES)
+    fields = [part for part in parts if part[0] != 'paths[]']
+    late_paths = [('paths[]', 'elsewhere/' + name) for name, _ in FILES]
+    response = post_body(*_body(fields + _file_parts(FILES) + late_paths))
+    assert response.status_code == 200, response.get_json()
+    assert _member_names(client, response.get_json()['file_id']) == [name for name, _ in FILES]
+
+
+def test_fields_sent_after_the_files_are_refused(post_body, leftovers):
+    response = post_body(*_body(_file_parts(FILES) + _fields(FILES)))
+    assert response.status_code == 400
+    assert leftovers() == {'temp': set(), 'reservations': set()}
+
+
+@pytest.mark.parametrize('unsafe', ['../evil.txt', 'docs/../../evil.txt'])
+@pytest.mark.parametrize('mode', ['zip', 'lazy'])
+def test_unsafe_path_is_refused_mid_stream(post_body, leftovers, monkeypatch, mode, unsafe):
+    monkeypatch.setitem(app.config, 'ARCHIVE_MODE', mode)
+    # files_list is clean; the second file's own path is not, and only
+    # arrives once the first file has been written.
+    parts = _fields(FILES, paths=[FILES[0][0], unsafe])
+    response = post_body(*_body(parts + _file_parts(FILES)))
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid file path'
+    assert leftovers() == {'temp': set(), 'reservations': set()}
+    assert not os.path.exists(os.path.join(os.path.dirname(app.config['UPLOAD_FOLDER']), 'evil.txt'))
+
+
+def test_absolute_path_stays_inside_the_transfer(client, post_body):
+    parts = _fields(FILES, paths=[FILES[0][0], '/etc/evil.txt'])
+    response = post_body(*_body(parts + _file_parts(FILES)))
+    assert response.status_code == 200
+    assert _member_names(client, response.get_json()['file_id']) == ['docs/a.txt', 'etc/evil.txt']
+    assert not os.path.exists('/etc/evil.txt')
+
+
+@pytest.mark.parametrize('mode', ['zip', 'lazy'])
+@pytest.mark.parametrize('files', [FILES, FILES[:1]], ids=['zipped', 'single'])
+def test_truncated_body_cleans_up(post_body, leftovers, monkeypatch, mode, files):
+    monkeypatch.setitem(app.config, 'ARCHIVE_MODE', mode)
+    body, content_type = _body(_fields(files) + _file_parts(files))
+    # Cut inside the last file's data: the client went away mid-upload.
+    response = post_body(body[:len(body) - 1500], content_type)
+    assert response.status_code == 400
+    assert leftovers() == {'temp': set(), 'reservations': set()}
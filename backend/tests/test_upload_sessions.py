@@ -0,0 +1,116 @@
+import hashlib
+import os
+
+import pytest
+
+from app import app, db
+from app.models import FileUpload
+
+CHUNK = 1000
+CONTENT = os.urandom(3500)  # four chunks, the last one short
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_CHUNK_SIZE', CHUNK)
+
+
+@pytest.fixture
+def session(client, auth_headers):
+    response = client.post('/upload/sessions', headers=auth_headers, json={
+        'email': 'recipient@example.com',
+        'sender_email': 'sender@example.com',
+        'files_list': [{'name': 'big.bin', 'size': len(CONTENT)}],
+    })
+    assert response.status_code == 201
+    assert response.get_json()['chunk_size'] == CHUNK
+    return response.get_json()['file_id']
+
+
+@pytest.fixture
+def put_chunk(client, auth_headers, session):
+    def _put(index, data=None, **query):
+        if data is None:
+            data = CONTENT[index * CHUNK:(index + 1) * CHUNK]
+        return client.put(
+            f'/upload/sessions/{session}/files/0/chunks/{index}', headers=auth_headers,
+            data=data, query_string=query,
+        )
+    return _put
+
+
+def _complete(client, auth_headers, file_id):
+    return client.post(f'/upload/sessions/{file_id}/complete', headers=auth_headers)
+
+
+def _stored_sha256(file_id):
+    with app.app_context():
+        sha256 = db.session.get(FileUpload, file_id).encrypted_data
+        db.session.remove()
+    return sha256
+
+
+def test_chunks_in_any_order(client, auth_headers, session, put_chunk):
+    for index in (3, 1, 0, 2):
+        assert put_chunk(index).status_code == 200
+    assert _complete(client, auth_headers, session).status_code == 200
+    assert client.get(f'/download/{session}').data == CONTENT
+
+
+def test_duplicate_and_misaligned_chunks(client, auth_headers, session, put_chunk):
+    assert put_chunk(1).status_code == 200
+    # A retried chunk is accepted again and changes nothing.
+    response = put_chunk(1)
+    assert response.status_code == 200
+    assert response.get_json()['received'] == [[1000, 2000]]
+    # Chunks that would overlap their neighbours are refused unrecorded.
+    assert put_chunk(2, offset=1500).status_code == 400
+    assert put_chunk(2, data=CONTENT[2000:3100]).status_code == 400
+    assert put_chunk(3, data=CONTENT[3000:3400]).status_code == 400
+    status = client.get(f'/upload/sessions/{session}', headers=auth_headers).get_json()
+    assert status['files'][0]['received'] == [[1000, 2000]]
+
+    for index in (0, 2, 3):
+        assert put_chunk(index).status_code == 200
+    assert _complete(client, auth_headers, session).status_code == 200
+    assert client.get(f'/download/{session}').data == CONTENT
+
+
+def test_resume_from_the_session_status(client, auth_headers, session, put_chunk):
+    put_chunk(0)
+    put_chunk(2)
+    # Interrupted: ask the server what it has and send only the rest.
+    status = client.get(f'/upload/sessions/{session}', headers=auth_headers).get_json()
+    assert status['complete'] is False
+    received = status['files'][0]['received']
+    assert received == [[0, 1000], [2000, 3000]]
+    have = {index for start, end in received for index in range(start // CHUNK, -(-end // CHUNK))}
+    for index in sorted(set(range(4)) - have):
+        assert put_chunk(index).status_code == 200
+    status = client.get(f'/upload/sessions/{session}', headers=auth_headers).get_json()
+    assert status['complete'] is True
+    assert _complete(client, auth_headers, session).status_code == 200
+    assert client.get(f'/download/{session}').data == CONTENT
+
+
+def test_complete_with_a_missing_range_is_refused(client, auth_headers, session, put_chunk):
+    for index in (0, 1, 3):
+        put_chunk(index)
+    response = _complete(client, auth_headers, session)
+    assert response.status_code == 409
+    assert response.get_json()['files'][0]['received'] == [[0, 2000], [3000, 3500]]
+    assert client.get(f'/download/{session}').status_code == 404
+    # The session is intact: sending the gap lets it complete.
+    put_chunk(2)
+    assert _complete(client, auth_headers, session).status_code == 200
+
+
+@pytest.mark.parametrize('streaming', [True, False], ids=['streamed', 'buffered'])
+def test_session_hashes_like_a_single_request_upload(client, auth_headers, session, put_chunk, upload,
+                                                     monkeypatch, streaming):
+    monkeypatch.setitem(app.config, 'UPLOAD_STREAMING_INGEST', streaming)
+    for index in (2, 0, 3, 1):
+        put_chunk(index)
+    assert _complete(client, auth_headers, session).status_code == 200
+    single = upload([('big.bin', CONTENT)])
+    assert _stored_sha256(session) == _stored_sha256(single) == hashlib.sha256(CONTENT).hexdigest()
@@ -46,27 +46,141 @@ function NotifBadge({ label, n }) {
   return <span className={`badge ${cls}`} title={n.error || ''}>{text}</span>
 }
 
+// One-line summary of the background integrity scrubber.
+function ScrubSummary({ s }) {
+  if (!s.enabled) return null
+  const flagged = s.flagged.corrupt + s.flagged.missing
+  const pass = s.current_pass
+  return (
+    <p className="text-sm text-muted">
+      {pass
+        ? `Integrity scrub: ${pass.checked}/${pass.total} checked · ${pass.mb_per_second} MB/s`
+        : s.last_pass
+          ? `Integrity scrub: last pass ${formatDate(s.last_pass.completed_at)}`
+          : 'Integrity scrub: not run yet'}
+      {flagged > 0 && <> · <span className="badge badge--error">{flagged} flagged</span></>}
+    </p>
+  )
+}
+
+// One-line summary of the notification queue and the mail dispatcher.
+function MailSummary({ m }) {
+  const d = m.dispatcher
+  return (
+    <p className="text-sm text-muted">
+      {`Mail queue: ${m.queue.due} due · ${m.queue.pending} pending`}
+      {d
+        ? d.send_seconds && ` · ${d.sent} sent, ${d.failed} failed · send p95 ${d.send_seconds.p95}s`
+        : m.queue.due > 0 && <> · <span className="badge badge--error">no dispatcher</span></>}
+    </p>
+  )
+}
+
 // ---- Tab: Transfers ----
+const PAGE_SIZE = 50
+const NO_FILTERS = {
+  expired: '', downloaded: '', notificationFailed: false,
+  sender: '', recipient: '', createdFrom: '', createdTo: '',
+}
+
+// Query string of /api/transfers for the given filters (and page cursor).
+function transfersQuery(f, cursor) {
+  const params = new URLSearchParams({ limit: PAGE_SIZE })
+  if (f.expired) params.set('expired', f.expired)
+  if (f.downloaded) params.set('downloaded', f.downloaded)
+  if (f.notificationFailed) params.set('notification_failed', 'true')
+  if (f.sender.trim()) params.set('sender', f.sender.trim())
+  if (f.recipient.trim()) params.set('recipient', f.recipient.trim())
+  if (f.createdFrom) params.set('created_from', f.createdFrom)
+  if (f.createdTo) params.set('created_to', f.createdTo)
+  if (cursor) params.set('cursor', cursor)
+  return params.toString()
+}
+
+// The same filters as the "filter" of a /api/transfers/bulk request.
+function bulkFilter(f) {
+  const filter = {}
+  if (f.expired) filter.expired = f.expired
+  if (f.downloaded) filter.downloaded = f.downloaded
+  if (f.notificationFailed) filter.notification_failed = 'true'
+  if (f.sender.trim()) filter.sender = f.sender.trim()
+  if (f.recipient.trim()) filter.recipient = f.recipient.trim()
+  if (f.createdFrom) filter.created_from = f.createdFrom
+  if (f.createdTo) filter.created_to = f.createdTo
+  return filter
+}
+
+const BULK_POLL_MS = 1000
+
 function TransfersTab({ token }) {
   const [transfers, setTransfers] = useState([])
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [toast, setToast] = useState(null)
   const [deleting, setDeleting] = useState(null)
+  const [scrub, setScrub] = useState(null)
+  const [mail, setMail] = useState(null)
+  const [draft, setDraft] = useState(NO_FILTERS)
+  const [filters, setFilters] = useState(NO_FILTERS)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [total, setTotal] = useState(null)
+  const [bulkJob, setBulkJob] = useState(null)
 
   const frontendUrl = window.location.origin
 
+  const fetchPage = useCallback((cursor) => (
+    authFetch(`${backendUrl}/api/transfers?${transfersQuery(filters, cursor)}`, {
+      headers: { Authorization: `Bearer ${token}` },
+    }).then(r => r.ok ? r.json() : Promise.reject())
+  ), [token, filters])
+
   const load = useCallback(() => {
     setLoading(true)
-    authFetch(`${backendUrl}/api/transfers`, {
+    fetchPage(null)
+      .then(data => {
+        setTransfers(data.transfers)
+        setNextCursor(data.next_cursor)
+        setTotal(data.total)
+        setLoading(false)
+      })
+      .catch(() => { setToast({ message: 'Failed to load transfers.', type: 'error' }); setLoading(false) })
+    authFetch(`${backendUrl}/api/stats/integrity`, {
       headers: { Authorization: `Bearer ${token}` },
     })
-      .then(r => r.ok ? r.json() : Promise.reject())
-      .then(data => { setTransfers(Array.isArray(data) ? data : []); setLoading(false) })
-      .catch(() => { setToast({ message: 'Failed to load transfers.', type: 'error' }); setLoading(false) })
-  }, [token])
+      .then(r => r.ok ? r.json() : null)
+      .then(data => setScrub(data))
+      .catch(() => {})
+    authFetch(`${backendUrl}/api/stats/mail`, {
+      headers: { Authorization: `Bearer ${token}` },
+    })
+      .then(r => r.ok ? r.json() : null)
+      .then(data => setMail(data))
+      .catch(() => {})
+  }, [token, fetchPage])
 
   useEffect(() => { load() }, [load])
 
+  const loadMore = () => {
+    setLoadingMore(true)
+    fetchPage(nextCursor)
+      .then(data => {
+        setTransfers(prev => [...prev, ...data.transfers])
+        setNextCursor(data.next_cursor)
+      })
+      .catch(() => setToast({ message: 'Failed to load transfers.', type: 'error' }))
+      .finally(() => setLoadingMore(false))
+  }
+
+  const applyFilters = (e) => {
+    e.preventDefault()
+    setFilters(draft)
+  }
+
+  const resetFilters = () => {
+    setDraft(NO_FILTERS)
+    setFilters(NO_FILTERS)
+  }
+
   const handleDelete = async (id) => {
     if (!confirm('Delete this transfer and its file?')) return
     setDeleting(id)
@@ -77,6 +191,7 @@ function TransfersTab({ token }) {
       })
       if (r.ok) {
         setTransfers(prev => prev.filter(t => t.id !== id))
+        setTotal(prev => (prev === null ? prev : prev - 1))
         setToast({ message: 'Transfer deleted.', type: 'success' })
       } else {
         setToast({ message: 'Failed to delete transfer.', type: 'error' })
@@ -88,8 +203,46 @@ function TransfersTab({ token }) {
     }
   }
 
-  const active = transfers.filter(t => !t.expired)
-  const expired = transfers.filter(t => t.expired)
+  // Delete or expire every transfer matching the applied filters, then
+  // poll the job until it is done.
+  const handleBulk = async (action) => {
+    const verb = action === 'delete' ? 'Delete' : 'Expire'
+    if (!confirm(`${verb} all ${total} transfer${total === 1 ? '' : 's'} matching these filters?`)) return
+    const headers = { Authorization: `Bearer ${token}` }
+    try {
+      const r = await authFetch(`${backendUrl}/api/transfers/bulk`, {
+        method: 'POST',
+        headers: { ...headers, 'Content-Type': 'application/json' },
+        body: JSON.stringify({ action, filter: bulkFilter(filters) }),
+      })
+      if (!r.ok) {
+        setToast({ message: `Failed to ${action} transfers.`, type: 'error' })
+        return
+      }
+      let job = await r.json()
+      setBulkJob(job)
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, BULK_POLL_MS))
+        const poll = await authFetch(`${backendUrl}/api/transfers/bulk/${job.job_id}`, { headers })
+        if (!poll.ok) throw new Error()
+        job = await poll.json()
+        setBulkJob(job)
+      }
+      setToast(job.status === 'done' && !job.failed
+        ? { message: `${job.affected} transfer${job.affected === 1 ? '' : 's'} ${action === 'delete' ? 'deleted' : 'expired'}.`, type: 'success' }
+        : { message: `${verb} finished with ${job.failed} failure${job.failed === 1 ? '' : 's'}.`, type: 'error' })
+    } catch {
+      setToast({ message: 'Network error.', type: 'error' })
+    } finally {
+      setBulkJob(null)
+      load()
+    }
+  }
+
+  const setDraftField = (key) => (e) => {
+    const value = e.target.type === 'checkbox' ? e.target.checked : e.target.value
+    setDraft(prev => ({ ...prev, [key]: value }))
+  }
 
   return (
     <div>
@@ -97,8 +250,11 @@ function TransfersTab({ token }) {
 
       <div className="flex items-center justify-between mb-6" style={{ flexWrap: 'wrap', gap: 'var(--sp-3)' }}>
         <p className="text-sm text-muted">
-          {active.length} active · {expired.length} expired
+          {total === null ? transfers.length : total} transfer{total === 1 ? '' : 's'}
+          {filters !== NO_FILTERS && ' matching filters'}
         </p>
+        {scrub && <ScrubSummary s={scrub} />}
+        {mail && <MailSummary m={mail} />}
         <button className="btn btn--ghost btn--sm" onClick={load} disabled={loading}>
           <svg width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="2">
             <path d="M23 4v6h-6M1 20v-6h6"/><path d="M3.51 9a9 9 0 0114.85-3.36L23 10M1 14l4.64 4.36A9 9 0 0020.49 15"/>
@@ -107,22 +263,75 @@ function TransfersTab({ token }) {
         </button>
       </div>
 
+      <form className="flex gap-2 mb-6" style={{ flexWrap: 'wrap', alignItems: 'center' }} onSubmit={applyFilters}>
+        <select className="input" style={{ width: 'auto' }} value={draft.expired} onChange={setDraftField('expired')}>
+          <option value="">Active &amp; expired</option>
+          <option value="false">Active</option>
+          <option value="true">Expired</option>
+        </select>
+        <select className="input" style={{ width: 'auto' }} value={draft.downloaded} onChange={setDraftField('downloaded')}>
+          <option value="">Any download state</option>
+          <option value="true">Downloaded</option>
+          <option value="false">Not downloaded</option>
+        </select>
+        <input className="input" style={{ width: 'auto' }} type="email" placeholder="Sender"
+          value={draft.sender} onChange={setDraftField('sender')} />
+        <input className="input" style={{ width: 'auto' }} type="email" placeholder="Recipient"
+          value={draft.recipient} onChange={setDraftField('recipient')} />
+        <input className="input" style={{ width: 'auto' }} type="date" title="Created from"
+          value={draft.createdFrom} onChange={setDraftField('createdFrom')} />
+        <input className="input" style={{ width: 'auto' }} type="date" title="Created until"
+          value={draft.createdTo} onChange={setDraftField('createdTo')} />
+        <label className="text-sm text-muted flex gap-2" style={{ alignItems: 'center' }}>
+          <input type="checkbox" checked={draft.notificationFailed} onChange={setDraftField('notificationFailed')} />
+          Failed notifications
+        </label>
+        <button type="submit" className="btn btn--ghost btn--sm">Filter</button>
+        {filters !== NO_FILTERS && (
+          <button type="button" className="btn btn--ghost btn--sm" onClick={resetFilters}>Clear</button>
+        )}
+        {filters !== NO_FILTERS && total > 0 && (
+          bulkJob ? (
+            <span className="text-sm text-muted flex gap-2" style={{ alignItems: 'center' }}>
+              <span className="spinner" style={{ width: 12, height: 12 }} />
+              {bulkJob.action === 'delete' ? 'Deleting' : 'Expiring'} {bulkJob.processed}/{bulkJob.total}
+            </span>
+          ) : (
+            <>
+              <button type="button" className="btn btn--ghost btn--sm" onClick={() => handleBulk('expire')}>
+                Expire matching
+              </button>
+              <button type="button" className="btn btn--danger btn--sm" onClick={() => handleBulk('delete')}>
+                Delete matching
+              </button>
+            </>
+          )
+        )}
+      </form>
+
       {loading ? (
         <div className="text-center mt-6"><span className="spinner" style={{ width: 28, height: 28 }} /></div>
       ) : transfers.length === 0 ? (
-        <div className="text-center text-muted mt-6">No transfers yet.</div>
+        <div className="text-center text-muted mt-6">
+          {filters === NO_FILTERS ? 'No transfers yet.' : 'No transfers match these filters.'}
+        </div>
       ) : (
         <div className="transfer-list">
           {transfers.map(t => (
             <div key={t.id} className={`transfer-card${t.expired ? ' transfer-card--expired' : ''}`}>
               <div className="transfer-card__header">
-                <span>
+                <span className="flex gap-2">
                   {t.expired
                     ? <span className="badge badge--muted">Expired</span>
                     : t.downloaded
                       ? <span className="badge badge--success">Downloaded</span>
                       : <span className="badge badge--muted">Pending</span>
                   }
+                  {t.integrity && (t.integrity.status === 'corrupt' || t.integrity.status === 'missing') && (
+                    <span className="badge badge--error" title={t.integrity.error || ''}>
+                      {t.integrity.status === 'corrupt' ? 'Corrupt' : 'Missing'}
+                    </span>
+                  )}
                 </span>
                 <div className="flex gap-2">
                   {!t.expired && (
@@ -162,7 +371,19 @@ function TransfersTab({ token }) {
                 </div>
                 <div className="transfer-card__row">
                   <span className="transfer-card__label">To</span>
-                  <span className="transfer-card__value">{t.recipient_email}</span>
+                  {t.recipients && t.recipients.length > 1 ? (
+                    <span className="transfer-card__value flex-col gap-2">
+                      {t.recipients.map(r => (
+                        <span key={r.id} className="flex gap-2" style={{ flexWrap: 'wrap', alignItems: 'center' }}>
+                          {r.email}
+                          <NotifBadge label="Notified" n={r.notifications.recipient} />
+                          {r.downloaded && <NotifBadge label="Downloaded" n={r.notifications.download} />}
+                        </span>
+                      ))}
+                    </span>
+                  ) : (
+                    <span className="transfer-card__value">{t.recipient_email}</span>
+                  )}
                 </div>
                 <div className="transfer-card__row">
                   <span className="transfer-card__label">Files</span>
@@ -189,6 +410,128 @@ function TransfersTab({ token }) {
           ))}
         </div>
       )}
+
+      {!loading && nextCursor && (
+        <div className="text-center mt-6">
+          <button className="btn btn--ghost btn--sm" onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? <span className="spinner" style={{ width: 12, height: 12 }} /> : 'Load more'}
+          </button>
+        </div>
+      )}
+    </div>
+  )
+}
+
+// ---- Tab: Statistics ----
+function percent(ratio) {
+  return `${(ratio * 100).toFixed(1)} %`
+}
+
+function StatsTab({ token }) {
+  const [days, setDays] = useState(30)
+  const [stats, setStats] = useState(null)
+  const [loading, setLoading] = useState(true)
+  const [toast, setToast] = useState(null)
+
+  useEffect(() => {
+    setLoading(true)
+    authFetch(`${backendUrl}/api/stats/overview?days=${days}`, {
+      headers: { Authorization: `Bearer ${token}` },
+    })
+      .then(r => r.ok ? r.json() : Promise.reject())
+      .then(data => setStats(data))
+      .catch(() => setToast({ message: 'Failed to load statistics.', type: 'error' }))
+      .finally(() => setLoading(false))
+  }, [token, days])
+
+  const totals = stats?.totals
+  const storage = stats?.storage
+  return (
+    <div>
+      {toast && <Toast {...toast} onClose={() => setToast(null)} />}
+
+      <div className="flex items-center justify-between mb-6" style={{ flexWrap: 'wrap', gap: 'var(--sp-3)' }}>
+        <select className="input" style={{ width: 'auto' }} value={days} onChange={e => setDays(Number(e.target.value))}>
+          <option value={7}>Last 7 days</option>
+          <option value={30}>Last 30 days</option>
+          <option value={90}>Last 90 days</option>
+          <option value={365}>Last 365 days</option>
+        </select>
+        {stats && <p className="text-sm text-muted">Updated {formatDate(stats.generated_at + 'Z')}</p>}
+      </div>
+
+      {loading && !stats ? (
+        <div className="text-center mt-6"><span className="spinner" style={{ width: 28, height: 28 }} /></div>
+      ) : stats && (
+        <div className="flex-col gap-4">
+          <div className="transfer-card">
+            <div className="transfer-card__row">
+              <span className="transfer-card__label">Storage</span>
+              <span className="transfer-card__value">
+                {formatSize(storage.stored_bytes)} stored · {formatSize(storage.disk_free_bytes)} free of {formatSize(storage.disk_total_bytes)}
+              </span>
+            </div>
+            <div className="transfer-card__row">
+              <span className="transfer-card__label">Uploaded</span>
+              <span className="transfer-card__value">{totals.transfers} transfers · {formatSize(totals.uploaded_bytes)}</span>
+            </div>
+            <div className="transfer-card__row">
+              <span className="transfer-card__label">Downloaded</span>
+              <span className="transfer-card__value">{totals.downloads} downloads · {formatSize(totals.downloaded_bytes)}</span>
+            </div>
+            <div className="transfer-card__row">
+              <span className="transfer-card__label">Download ratio</span>
+              <span className="transfer-card__value">{percent(totals.download_ratio)} of {totals.links} links</span>
+            </div>
+            <div className="transfer-card__row">
+              <span className="transfer-card__label">Notification failures</span>
+              <span className="transfer-card__value">
+                {percent(totals.notification_failure_rate)} of {totals.notifications_sent + totals.notifications_failed} sent
+              </span>
+            </div>
+          </div>
+
+          <div className="table-wrap">
+            <table>
+              <thead>
+                <tr><th>Day</th><th>Transfers</th><th>Uploaded</th><th>Downloads</th><th>Downloaded</th><th>Failed emails</th></tr>
+              </thead>
+              <tbody>
+                {stats.days.slice().reverse().map(d => (
+                  <tr key={d.day}>
+                    <td>{d.day}</td>
+                    <td>{d.transfers}</td>
+                    <td>{formatSize(d.uploaded_bytes)}</td>
+                    <td>{d.downloads}</td>
+                    <td>{formatSize(d.downloaded_bytes)}</td>
+                    <td>{d.notifications_failed}</td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+          </div>
+
+          {stats.top_senders.length > 0 && (
+            <div className="table-wrap">
+              <table>
+                <thead>
+                  <tr><th>Top senders</th><th>Transfers</th><th>Uploaded</th><th>Downloaded</th></tr>
+                </thead>
+                <tbody>
+                  {stats.top_senders.map(s => (
+                    <tr key={s.sender_email}>
+                      <td>{s.sender_email}</td>
+                      <td>{s.transfers}</td>
+                      <td>{formatSize(s.uploaded_bytes)}</td>
+                      <td>{formatSize(s.downloaded_bytes)}</td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </div>
+          )}
+        </div>
+      )}
     </div>
   )
 }
@@ -387,12 +730,16 @@ export default function Admin() {
               <button className={`tab${tab === 'transfers' ? ' tab--active' : ''}`} onClick={() => setTab('transfers')}>
                 Transfers
               </button>
+              <button className={`tab${tab === 'stats' ? ' tab--active' : ''}`} onClick={() => setTab('stats')}>
+                Statistics
+              </button>
               <button className={`tab${tab === 'smtp' ? ' tab--active' : ''}`} onClick={() => setTab('smtp')}>
                 SMTP Settings
               </button>
             </div>
 
             {tab === 'transfers' && <TransfersTab token={token} />}
+            {tab === 'stats' && <StatsTab token={token} />}
             {tab === 'smtp' && <SmtpTab token={token} />}
           </div>
         </div>
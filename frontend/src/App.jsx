@@ -1,9 +1,38 @@
 import { useState, useRef, useEffect, useCallback } from 'react'
 import { useNavigate } from 'react-router-dom'
 import banner from './assets/banner.png'
-import { getToken, clearToken } from './storage'
+import { getToken, loadUploadSession, saveUploadSession, clearUploadSession } from './storage'
+import { authFetch } from './api'
 
 const backendUrl = window.BACKEND_URL
+const CHUNK_ATTEMPTS = 5
+
+// PUT one chunk, retrying network errors and 5xx/408/429 with backoff. A
+// re-sent chunk simply overwrites the same byte range on the server.
+async function putChunk(url, body, headers, signal) {
+  let delay = 1000
+  for (let attempt = 1; ; attempt++) {
+    let r = null
+    try {
+      r = await authFetch(url, { method: 'PUT', headers, body, signal })
+    } catch (e) {
+      // fetch rejects with a TypeError on network failure; anything else
+      // (abort, expired session) is final.
+      if (!(e instanceof TypeError) || attempt >= CHUNK_ATTEMPTS) throw e
+    }
+    if (r) {
+      if (r.ok) return
+      const retryable = r.status >= 500 || r.status === 408 || r.status === 429
+      if (!retryable || attempt >= CHUNK_ATTEMPTS) {
+        let msg = 'Transfer failed.'
+        try { msg = (await r.json()).error || msg } catch {}
+        throw new Error(msg)
+      }
+    }
+    await new Promise(res => setTimeout(res, delay))
+    delay *= 2
+  }
+}
 
 function formatSize(bytes) {
   if (!bytes) return '0 B'
@@ -35,7 +64,8 @@ export default function App() {
   const [uploading, setUploading] = useState(false)
   const [uploadPct, setUploadPct] = useState(0)
   const [toast, setToast] = useState(null)
-  const xhrRef = useRef(null)
+  const abortRef = useRef(null)
+  const sessionRef = useRef(null)
 
   useEffect(() => {
     if ('Notification' in window && Notification.permission === 'default')
@@ -109,46 +139,108 @@ export default function App() {
 
   const removeItem = (idx) => setItems(prev => prev.filter((_, i) => i !== idx))
 
+  // Resumable upload over /upload/sessions: each chunk is retried on its
+  // own, and the session id is remembered per selection so picking the same
+  // files again after a reload or crash only sends what the server lacks.
   const handleUpload = async () => {
     if (!items.length) return showToast('Please select at least one file.', 'warning')
     if (!recipientEmail) return showToast('Recipient email is required.', 'warning')
     if (!senderEmail) return showToast('Your email is required.', 'warning')
 
-    const fd = new FormData()
-    fd.append('email', recipientEmail)
-    fd.append('sender_email', senderEmail)
-    fd.append('expiration_days', expirationDays)
-    fd.append('files_list', JSON.stringify(items.map(i => ({ name: i.path, size: i.size }))))
-    items.forEach(i => { fd.append('files[]', i.file); fd.append('paths[]', i.path) })
+    const controller = new AbortController()
+    abortRef.current = controller
+    const { signal } = controller
+    const headers = { Authorization: `Bearer ${getToken() || ''}` }
+    const fingerprint = JSON.stringify([
+      recipientEmail, senderEmail, expirationDays,
+      items.map(i => [i.path, i.size, i.file.lastModified]),
+    ])
+    const total = items.reduce((acc, i) => acc + i.size, 0)
 
     setUploading(true); setUploadPct(0)
+    try {
+      let session = null
+      const savedId = loadUploadSession(fingerprint)
+      if (savedId) {
+        const r = await authFetch(`${backendUrl}/upload/sessions/${savedId}`, { headers, signal })
+        if (r.ok) session = await r.json()
+      }
+      if (!session) {
+        const r = await authFetch(`${backendUrl}/upload/sessions`, {
+          method: 'POST',
+          headers: { ...headers, 'Content-Type': 'application/json' },
+          body: JSON.stringify({
+            email: recipientEmail,
+            sender_email: senderEmail,
+            expiration_days: expirationDays,
+            files_list: items.map(i => ({ name: i.path, size: i.size })),
+          }),
+          signal,
+        })
+        const data = await r.json()
+        if (!r.ok) throw new Error(data.error || 'Transfer failed.')
+        session = data
+        saveUploadSession(fingerprint, session.file_id)
+      }
+      sessionRef.current = { id: session.file_id, fingerprint }
 
-    const xhr = new XMLHttpRequest()
-    xhrRef.current = xhr
-    xhr.open('POST', `${backendUrl}/upload`, true)
-    xhr.setRequestHeader('Authorization', `Bearer ${getToken() || ''}`)
-    xhr.upload.onprogress = (e) => {
-      if (e.lengthComputable) setUploadPct(Math.round(e.loaded * 100 / e.total))
-    }
-    xhr.onload = () => {
-      setUploading(false)
-      if (xhr.status === 200) {
-        showToast('Transfer complete!', 'success')
-        setItems([]); setRecipientEmail(''); setSenderEmail(''); setUploadPct(0)
-      } else if (xhr.status === 401) {
-        clearToken()
-        window.location.assign('/login')
-      } else {
-        let msg = 'Transfer failed.'
-        try { msg = JSON.parse(xhr.responseText).error || msg } catch {}
-        showToast(msg, 'error')
+      const chunkSize = session.chunk_size
+      let sent = session.files.reduce(
+        (acc, f) => acc + f.received.reduce((a, [start, end]) => a + end - start, 0), 0)
+      const report = () => setUploadPct(total ? Math.round(sent * 100 / total) : 100)
+      report()
+
+      for (const f of session.files) {
+        const file = items[f.index].file
+        for (let offset = 0; offset < f.size; offset += chunkSize) {
+          if (f.received.some(([start, end]) => offset >= start && offset < end)) continue
+          const body = file.slice(offset, Math.min(offset + chunkSize, f.size))
+          await putChunk(
+            `${backendUrl}/upload/sessions/${session.file_id}/files/${f.index}/chunks/${offset / chunkSize}?offset=${offset}`,
+            body, headers, signal,
+          )
+          sent += body.size
+          report()
+        }
+      }
+
+      // 503 + Retry-After means every packaging slot is busy: wait, ask again.
+      let r
+      for (let attempt = 1; ; attempt++) {
+        r = await authFetch(`${backendUrl}/upload/sessions/${session.file_id}/complete`, {
+          method: 'POST', headers, signal,
+        })
+        if (r.status !== 503 || attempt >= CHUNK_ATTEMPTS) break
+        const wait = parseInt(r.headers.get('Retry-After'), 10) || 30
+        await new Promise(res => setTimeout(res, wait * 1000))
       }
+      const data = await r.json()
+      if (!r.ok) throw new Error(data.error || 'Transfer failed.')
+      clearUploadSession(fingerprint)
+      showToast('Transfer complete!', 'success')
+      setItems([]); setRecipientEmail(''); setSenderEmail(''); setUploadPct(0)
+    } catch (e) {
+      if (e.name === 'AbortError') return
+      showToast(e instanceof TypeError ? 'Network error. Check your connection.' : e.message, 'error')
+    } finally {
+      setUploading(false)
+      sessionRef.current = null
+    }
+  }
+
+  const cancelUpload = () => {
+    abortRef.current?.abort()
+    const current = sessionRef.current
+    if (current) {
+      authFetch(`${backendUrl}/upload/sessions/${current.id}`, {
+        method: 'DELETE',
+        headers: { Authorization: `Bearer ${getToken() || ''}` },
+      }).catch(() => {})
+      clearUploadSession(current.fingerprint)
     }
-    xhr.onerror = () => { setUploading(false); showToast('Network error. Check your connection.', 'error') }
-    xhr.send(fd)
+    setUploading(false); setUploadPct(0)
   }
 
-  const cancelUpload = () => { xhrRef.current?.abort(); setUploading(false); setUploadPct(0) }
   const totalSize = items.reduce((acc, i) => acc + i.size, 0)
 
   return (
@@ -171,8 +263,8 @@ export default function App() {
 
             <div className="row-2col">
               <div className="field">
-                <label className="field__label">Recipient email</label>
-                <input className="input" type="email" placeholder="recipient@example.com"
+                <label className="field__label">Recipient email(s)</label>
+                <input className="input" type="email" multiple placeholder="alice@example.com, bob@example.com"
                   value={recipientEmail} onChange={e => setRecipientEmail(e.target.value)} disabled={uploading} />
               </div>
               <div className="field">
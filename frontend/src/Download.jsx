@@ -21,6 +21,13 @@ function formatDate(iso) {
 export default function Download() {
   const transferId = window.location.pathname.split('/').pop()
   const [files, setFiles] = useState([])
+  // Totals of the whole transfer; files and members arrive a page at a time.
+  const [fileCount, setFileCount] = useState(0)
+  const [totalSize, setTotalSize] = useState(0)
+  const [nextOffset, setNextOffset] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  // Archive members, each downloadable on its own (zipped transfers only).
+  const [members, setMembers] = useState(null)
   const [expiresAt, setExpiresAt] = useState(null)
   const [senderEmail, setSenderEmail] = useState(null)
   const [loading, setLoading] = useState(true)
@@ -36,13 +43,42 @@ export default function Download() {
       })
       .then(data => {
         setFiles(data.files || [])
+        setFileCount(data.file_count || 0)
+        setTotalSize(data.total_size || 0)
+        setNextOffset(data.next_offset ?? null)
         setExpiresAt(data.expires_at)
         setSenderEmail(data.sender_email)
         setLoading(false)
+        if (data.file_count > 1) {
+          fetch(`${backendUrl}/transfer/${transferId}/members`)
+            .then(r => (r.ok ? r.json() : null))
+            .then(m => { if (m) setMembers(m.members) })
+            .catch(() => {})
+        }
       })
       .catch(e => { setError(e.message); setLoading(false) })
   }, [transferId])
 
+  const loadMore = async () => {
+    setLoadingMore(true)
+    try {
+      const page = await fetch(`${backendUrl}/transfer/${transferId}?offset=${nextOffset}`)
+        .then(r => (r.ok ? r.json() : null))
+      if (!page) return
+      if (members) {
+        const m = await fetch(`${backendUrl}/transfer/${transferId}/members?offset=${nextOffset}`)
+          .then(r => (r.ok ? r.json() : null))
+        if (m) setMembers(prev => [...prev, ...m.members])
+      }
+      setFiles(prev => [...prev, ...page.files])
+      setNextOffset(page.next_offset ?? null)
+    } catch {
+      // The button stays available for another try.
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleDownload = async () => {
     setDownloading(true)
     try {
@@ -65,8 +101,6 @@ export default function Download() {
     }
   }
 
-  const totalSize = files.reduce((acc, f) => acc + (f.size || 0), 0)
-
   if (loading) return (
     <div className="page page--centered">
       <span className="spinner spinner--lg" />
@@ -110,19 +144,31 @@ export default function Download() {
 
               <div>
                 <p className="section-title">
-                  {files.length} file{files.length > 1 ? 's' : ''} — {formatSize(totalSize)}
+                  {fileCount} file{fileCount > 1 ? 's' : ''} — {formatSize(totalSize)}
                 </p>
                 <div className="file-list">
-                  {files.map((f, i) => (
+                  {(members || files).map((f, i) => (
                     <div key={i} className="file-item">
                       <svg width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="2" style={{ flexShrink: 0, opacity: 0.5 }}>
                         <path d="M14 2H6a2 2 0 00-2 2v16a2 2 0 002 2h12a2 2 0 002-2V8z"/><polyline points="14 2 14 8 20 8"/>
                       </svg>
-                      <span className="file-item__name" title={f.name}>{f.name}</span>
+                      {members
+                        ? <a className="file-item__name" title={`Download ${f.name} only`}
+                            href={`${backendUrl}/download/${transferId}/members/${f.index}`} download>{f.name}</a>
+                        : <span className="file-item__name" title={f.name}>{f.name}</span>}
                       <span className="file-item__size">{formatSize(f.size)}</span>
                     </div>
                   ))}
                 </div>
+                {nextOffset !== null && (
+                  <div className="text-center mt-4">
+                    <button className="btn btn--ghost btn--sm" onClick={loadMore} disabled={loadingMore}>
+                      {loadingMore
+                        ? <span className="spinner" style={{ width: 12, height: 12 }} />
+                        : `Show more (${fileCount - files.length} more)`}
+                    </button>
+                  </div>
+                )}
               </div>
 
               {done && (
@@ -139,7 +185,7 @@ export default function Download() {
                   ? <><span className="spinner" />Preparing…</>
                   : <><svg width="18" height="18" viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="2">
                       <path d="M21 15v4a2 2 0 01-2 2H5a2 2 0 01-2-2v-4"/><polyline points="7 10 12 15 17 10"/><line x1="12" y1="15" x2="12" y2="3"/>
-                    </svg>Download {files.length > 1 ? 'files' : 'file'}</>
+                    </svg>Download {fileCount > 1 ? 'files' : 'file'}</>
                 }
               </button>
 
@@ -29,3 +29,34 @@ export function clearToken() {
     // Already inaccessible -- nothing to clear.
   }
 }
+
+// Resumable upload sessions, keyed by a fingerprint of the selection (see
+// App.jsx) so re-selecting the same files resumes the same session.
+const UPLOAD_SESSION_KEY = 'uploadSession'
+
+export function loadUploadSession(fingerprint) {
+  try {
+    const saved = JSON.parse(localStorage.getItem(UPLOAD_SESSION_KEY) || 'null')
+    return saved && saved.fingerprint === fingerprint ? saved.id : null
+  } catch {
+    return null
+  }
+}
+
+export function saveUploadSession(fingerprint, id) {
+  try {
+    localStorage.setItem(UPLOAD_SESSION_KEY, JSON.stringify({ fingerprint, id }))
+    return true
+  } catch {
+    return false
+  }
+}
+
+export function clearUploadSession(fingerprint) {
+  try {
+    const saved = JSON.parse(localStorage.getItem(UPLOAD_SESSION_KEY) || 'null')
+    if (saved && saved.fingerprint === fingerprint) localStorage.removeItem(UPLOAD_SESSION_KEY)
+  } catch {
+    // Already inaccessible -- nothing to clear.
+  }
+}